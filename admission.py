@@ -0,0 +1,198 @@
+import itertools
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class AdmissionRejected(Exception):
+    """The request was not admitted: the wait queue is full or the wait took too long"""
+
+
+class TokenBucket:
+    """Continuously refilling budget of `per_minute` units, holding at most one minute's worth"""
+
+    def __init__(self, per_minute: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self._clock = clock
+        self._available = per_minute
+        self._updated = clock()
+
+    def delay(self, amount: float) -> float:
+        """Seconds until `amount` units are available (0 if they are now)"""
+        self._refill()
+        # A request bigger than the whole bucket goes through once the bucket is full
+        amount = min(amount, self.capacity)
+        return 0.0 if self._available >= amount else (amount - self._available) / self.rate
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self._available -= min(amount, self.capacity)
+
+    def refund(self, amount: float) -> None:
+        self._refill()
+        self._available = min(self.capacity, self._available + amount)
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._available = min(self.capacity, self._available + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class _Waiter:
+    __slots__ = ("endpoint", "user", "tokens", "sequence")
+
+    def __init__(self, endpoint: str, user: str, tokens: float, sequence: int):
+        self.endpoint = endpoint
+        self.user = user
+        self.tokens = tokens
+        self.sequence = sequence
+
+
+class Reservation:
+    """Tokens one admitted request took from its endpoint's budget; release() hands back what it didn't use"""
+
+    __slots__ = ("controller", "endpoint", "tokens", "released")
+
+    def __init__(self, controller: Optional["AdmissionController"], endpoint: str, tokens: float):
+        self.controller = controller
+        self.endpoint = endpoint
+        self.tokens = tokens
+        self.released = False
+
+    def release(self, used: float = 0) -> None:
+        """Refund the reserved tokens beyond `used`; only the first call counts"""
+        if self.released:
+            return
+        self.released = True
+        if self.controller is not None:
+            self.controller.refund(self.endpoint, self.tokens - used)
+
+
+class AdmissionController:
+    """Process-wide gate in front of upstream calls: per-endpoint request and token budgets,
+    fair turns between users, a bounded wait queue and a load-shedding signal"""
+
+    def __init__(self, limits: Dict[str, Tuple[float, Optional[float]]], max_queue: int = 200,
+                 shed_depth: int = 50, clock: Callable[[], float] = time.monotonic):
+        # limits: endpoint -> (requests per minute, tokens per minute or None)
+        self.max_queue = max_queue
+        self.shed_depth = shed_depth
+        self._clock = clock
+        self._requests = {endpoint: TokenBucket(rpm, clock) for endpoint, (rpm, _) in limits.items()}
+        self._tokens = {endpoint: TokenBucket(tpm, clock) for endpoint, (_, tpm) in limits.items() if tpm}
+        self._cond = threading.Condition()
+        self._waiting: List[_Waiter] = []
+        self._last_served: Dict[str, float] = {}
+        self._sequence = itertools.count()
+        self.stats = {"admitted": 0, "rejected": 0, "queued": 0, "shed": 0}
+
+    def acquire(self, endpoint: str, user: str, tokens: float = 0, timeout: Optional[float] = None,
+                on_wait: Optional[Callable[[int, int], None]] = None) -> Reservation:
+        """Block until the call may go upstream; release the returned reservation when the call is over
+
+        `on_wait(position, depth)` is called on this thread whenever the caller's place in line
+        changes, so the UI can show it. Raises AdmissionRejected if the queue is full or the
+        wait exceeds `timeout`.
+        """
+        if endpoint not in self._requests:
+            return Reservation(None, endpoint, tokens)
+        deadline = None if timeout is None else self._clock() + timeout
+        with self._cond:
+            if len(self._waiting) >= self.max_queue:
+                self.stats["rejected"] += 1
+                raise AdmissionRejected("Too many requests are waiting")
+            waiter = _Waiter(endpoint, user, tokens, next(self._sequence))
+            self._waiting.append(waiter)
+
+        reported = None
+        try:
+            while True:
+                with self._cond:
+                    delay = self._try_admit(waiter)
+                    if delay == 0.0:
+                        return Reservation(self, endpoint, tokens)
+                    if reported is None:
+                        self.stats["queued"] += 1
+                    position, depth = self._position(waiter), len(self._waiting)
+                # Report outside the lock - the callback may render UI
+                if on_wait is not None and position != reported:
+                    on_wait(position, depth)
+                reported = position
+                with self._cond:
+                    remaining = None if deadline is None else deadline - self._clock()
+                    if remaining is not None and remaining <= 0:
+                        self.stats["rejected"] += 1
+                        raise AdmissionRejected("Timed out waiting for upstream capacity")
+                    # Wake on any admission or refund, and at least every 250 ms to re-check budgets
+                    wait = 0.25 if delay is None else min(delay, 0.25)
+                    self._cond.wait(wait if remaining is None else min(wait, remaining))
+        finally:
+            with self._cond:
+                if waiter in self._waiting:
+                    self._waiting.remove(waiter)
+                    self._cond.notify_all()
+
+    def refund(self, endpoint: str, tokens: float) -> None:
+        """Return tokens that were reserved but not used (the estimate exceeded the actual usage)"""
+        if tokens > 0 and endpoint in self._tokens:
+            with self._cond:
+                self._tokens[endpoint].refund(tokens)
+                self._cond.notify_all()
+
+    def shedding(self) -> bool:
+        """Whether the queue is deep enough that optional work (voice) should be skipped"""
+        with self._cond:
+            return len(self._waiting) >= self.shed_depth
+
+    def record_shed(self) -> None:
+        with self._cond:
+            self.stats["shed"] += 1
+
+    def snapshot_stats(self) -> Dict:
+        with self._cond:
+            stats = dict(self.stats)
+            stats["waiting"] = len(self._waiting)
+        return stats
+
+    # Caller holds the lock
+
+    def _try_admit(self, waiter: _Waiter) -> Optional[float]:
+        """0.0 if admitted now, seconds to the next budget refill if first in line, None if not first"""
+        if self._next(waiter.endpoint) is not waiter:
+            return None
+        delay = self._requests[waiter.endpoint].delay(1)
+        if waiter.endpoint in self._tokens:
+            delay = max(delay, self._tokens[waiter.endpoint].delay(waiter.tokens))
+        if delay > 0:
+            return delay
+        self._requests[waiter.endpoint].take(1)
+        if waiter.endpoint in self._tokens:
+            self._tokens[waiter.endpoint].take(waiter.tokens)
+        self._waiting.remove(waiter)
+        self._last_served[waiter.user] = self._clock()
+        if len(self._last_served) > 4096:
+            # Forget the users served longest ago; they simply rank as "never served" again
+            for user, _ in sorted(self._last_served.items(), key=lambda item: item[1])[:2048]:
+                del self._last_served[user]
+        self.stats["admitted"] += 1
+        self._cond.notify_all()
+        return 0.0
+
+    def _next(self, endpoint: str) -> Optional[_Waiter]:
+        # Fairness: the user served least recently goes first; each user's own requests stay in order
+        heads: Dict[str, _Waiter] = {}
+        for waiter in self._waiting:
+            if waiter.endpoint == endpoint and waiter.user not in heads:
+                heads[waiter.user] = waiter
+        if not heads:
+            return None
+        return min(heads.values(), key=lambda waiter: (self._last_served.get(waiter.user, 0.0), waiter.sequence))
+
+    def _position(self, waiter: _Waiter) -> int:
+        return 1 + sum(
+            1 for other in self._waiting
+            if other.endpoint == waiter.endpoint and other is not waiter and (
+                self._last_served.get(other.user, 0.0), other.sequence
+            ) < (self._last_served.get(waiter.user, 0.0), waiter.sequence)
+        )
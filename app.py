@@ -1,13 +1,37 @@
 import streamlit as st
-from openai import OpenAI
 import requests
 import json
 import time
 import datetime
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterator, List, Optional
 import re
-import io
-import base64
+import os
+import uuid
+import hashlib
+import hmac
+import secrets
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from admission import AdmissionController, AdmissionRejected, Reservation
+from audio_preprocess import TARGET_SAMPLE_RATE, encode_for_upload, load_speech
+from context_window import RollingSummary, build_context_messages, count_tokens, prompt_tokens, split_for_budget
+from journey import JOURNEY_FIELDS, JourneyEngine
+from openai_gateway import OpenAIGateway
+from response_cache import ResponseCache, normalize_prompt
+from prefetch import PrefetchStore
+from prompts import MONTHLY_PROMPTS, build_system_prompt
+from safety import SAFETY_MATCHER
+from session_memory import (
+    SESSION_REGISTRY, MessageRecord, SessionMemory, compact_history, ensure_resident, estimate_bytes, spill_history
+)
+from session_store import SessionStore, SessionStoreError, open_session_store
+from styles import APP_STYLE_HTML, AUDIO_INPUT_STYLE_HTML
+from speech_pipeline import SegmentPlayer, SpeechPipeline, estimate_mp3_duration
+from themes import ThemeTracker
+from tracing import TRACER, ContextThreadPoolExecutor
+from transcription import LONG_RECORDING_SECONDS, RecordingLedger, split_at_silence, transcribe_chunks
+from tts_cache import TTSCache
 
 # Page configuration
 st.set_page_config(
@@ -17,282 +41,411 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Custom CSS for better UX
-st.markdown("""
-<style>
-    /* Main container max width */
-    .main .block-container {
-        max-width: 1200px;
-        padding-top: 2rem;
-        padding-bottom: 2rem;
-    }
-    
-    .main-header {
-        text-align: center;
-        padding: 2rem 0;
-        background: linear-gradient(135deg, #1e3c72 0%, #2a5298 100%);
-        color: white;
-        border-radius: 15px;
-        margin-bottom: 2rem;
-        box-shadow: 0 4px 20px rgba(0,0,0,0.1);
-    }
-    
-    .hero-image {
-        width: 100%;
-        max-width: 600px;
-        height: auto;
-        border-radius: 10px;
-        margin: 1rem 0;
-        box-shadow: 0 4px 15px rgba(0,0,0,0.1);
-    }
-    
-    .chat-message {
-        padding: 1.5rem;
-        margin: 1rem 0;
-        border-radius: 15px;
-        box-shadow: 0 2px 10px rgba(0,0,0,0.05);
-    }
-    
-    .user-message {
-        background: linear-gradient(135deg, #e3f2fd 0%, #bbdefb 100%);
-        border-left: 4px solid #1976d2;
-        margin-left: 2rem;
-    }
-    
-    .ai-message {
-        background: linear-gradient(135deg, #f3e5f5 0%, #e1bee7 100%);
-        border-left: 4px solid #7b1fa2;
-        margin-right: 2rem;
-    }
-    
-    .theme-box {
-        background: linear-gradient(135deg, #fff3e0 0%, #ffe0b2 100%);
-        padding: 1.5rem;
-        border-radius: 12px;
-        border-left: 4px solid #ff9800;
-        margin: 1rem 0;
-        box-shadow: 0 2px 8px rgba(0,0,0,0.05);
-    }
-    
-    .warning-box {
-        background: linear-gradient(135deg, #ffebee 0%, #ffcdd2 100%);
-        padding: 1.5rem;
-        border-radius: 12px;
-        border-left: 4px solid #f44336;
-        margin: 1rem 0;
-        box-shadow: 0 2px 8px rgba(0,0,0,0.05);
-    }
-    
-    /* Big Talk Button */
-    .talk-button {
-        display: flex;
-        justify-content: center;
-        align-items: center;
-        margin: 2rem 0;
-    }
-    
-    .talk-btn {
-        background: linear-gradient(135deg, #4caf50 0%, #45a049 100%);
-        color: white;
-        border: none;
-        border-radius: 50px;
-        padding: 20px 40px;
-        font-size: 24px;
-        font-weight: bold;
-        cursor: pointer;
-        transition: all 0.3s ease;
-        box-shadow: 0 4px 15px rgba(76, 175, 80, 0.3);
-        min-width: 200px;
-        text-transform: uppercase;
-        letter-spacing: 1px;
-    }
-    
-    .talk-btn:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 6px 20px rgba(76, 175, 80, 0.4);
-    }
-    
-    .talk-btn.recording {
-        background: linear-gradient(135deg, #f44336 0%, #d32f2f 100%);
-        box-shadow: 0 4px 15px rgba(244, 67, 54, 0.3);
-        animation: pulse 1.5s infinite;
-    }
-    
-    .talk-btn.recording:hover {
-        box-shadow: 0 6px 20px rgba(244, 67, 54, 0.4);
-    }
-    
-    @keyframes pulse {
-        0% { transform: scale(1); }
-        50% { transform: scale(1.05); }
-        100% { transform: scale(1); }
-    }
-    
-    /* Audio player styling */
-    .audio-player {
-        margin: 1rem 0;
-        text-align: center;
-    }
-    
-    .audio-player audio {
-        width: 100%;
-        max-width: 400px;
-        border-radius: 25px;
-    }
-    
-    /* Input styling */
-    .stTextArea textarea {
-        border-radius: 15px;
-        border: 2px solid #e0e0e0;
-        font-size: 16px;
-        padding: 15px;
-    }
-    
-    .stTextArea textarea:focus {
-        border-color: #2a5298;
-        box-shadow: 0 0 10px rgba(42, 82, 152, 0.1);
-    }
-    
-    /* Button styling */
-    .stButton button {
-        border-radius: 25px;
-        border: none;
-        padding: 12px 24px;
-        font-weight: 600;
-        transition: all 0.3s ease;
-    }
-    
-    .stButton button:hover {
-        transform: translateY(-1px);
-        box-shadow: 0 4px 12px rgba(0,0,0,0.15);
-    }
-    
-    /* Sidebar styling */
-    .css-1d391kg {
-        background: linear-gradient(180deg, #f8f9fa 0%, #e9ecef 100%);
-    }
-    
-    /* Hide Streamlit elements */
-    #MainMenu {visibility: hidden;}
-    footer {visibility: hidden;}
-    header {visibility: hidden;}
-    
-    /* Responsive design */
-    @media (max-width: 768px) {
-        .main .block-container {
-            padding-left: 1rem;
-            padding-right: 1rem;
-        }
-        
-        .talk-btn {
-            font-size: 20px;
-            padding: 15px 30px;
-            min-width: 150px;
-        }
-        
-        .user-message, .ai-message {
-            margin-left: 0;
-            margin-right: 0;
-        }
-    }
-</style>
-""", unsafe_allow_html=True)
+# Custom CSS for better UX (minified once per process)
+st.markdown(APP_STYLE_HTML, unsafe_allow_html=True)
 
 # Initialize session state
 if 'initialized' not in st.session_state:
     st.session_state.initialized = True
     st.session_state.conversation_history = []
+    st.session_state.rolling_summary = RollingSummary()
     st.session_state.life_themes = []
+    st.session_state.theme_tracker = ThemeTracker()
+    st.session_state.recording_ledger = RecordingLedger()
     st.session_state.user_profile = {}
     st.session_state.current_month = 1
     st.session_state.session_count = 0
+    st.session_state.journey = {}
     st.session_state.consent_given = False
     st.session_state.api_keys_set = False
 
-# Safety keywords for risk detection
-SAFETY_KEYWORDS = [
-    'suicide', 'kill myself', 'end it all', 'want to die', 'hurt myself',
-    'self harm', 'cutting', 'overdose', 'jumping', 'hanging'
-]
-
-# Monthly prompt frameworks
-MONTHLY_PROMPTS = {
-    1: {
-        "theme": "Orientation & Life Audit",
-        "description": "Understanding where you are and what feels 'off'",
-        "sample_prompts": [
-            "What part of your daily routine feels most automatic or disconnected?",
-            "If you could change one thing about how you spend your time, what would it be?",
-            "What used to bring you joy that doesn't anymore?",
-            "When did you last feel truly engaged with what you were doing?"
-        ],
-        "focus_areas": ["current_state", "disconnection", "routine_audit", "engagement_patterns"]
-    },
-    2: {
-        "theme": "Mortality & Time Awareness",
-        "description": "Confronting the finite nature of life and time",
-        "sample_prompts": [
-            "Imagine your 75-year-old self looking back. What do they wish you had done differently?",
-            "What would you regret not doing if you only had five years left?",
-            "How do you want to be remembered by the people closest to you?",
-            "What legacy do you want to leave behind?"
-        ],
-        "focus_areas": ["future_regrets", "legacy", "time_consciousness", "mortality_reflection"]
-    },
-    3: {
-        "theme": "Freedom & Personal Agency",
-        "description": "Exploring choice, control, and authentic decision-making",
-        "sample_prompts": [
-            "What choices do you make on autopilot every day?",
-            "Where in your life do you feel most free? Least free?",
-            "What would you do if you weren't afraid of judgment?",
-            "What responsibilities could you let go of without real consequence?"
-        ],
-        "focus_areas": ["autonomy", "fear_patterns", "authentic_choices", "responsibility_audit"]
-    },
-    4: {
-        "theme": "Connection & Authentic Relationships",
-        "description": "Examining isolation, intimacy, and being truly known",
-        "sample_prompts": [
-            "Who really knows the real you? What parts do you hide?",
-            "What would deeper connection look like in your relationships?",
-            "When do you feel most lonely, even when surrounded by people?",
-            "What prevents you from being more vulnerable with others?"
-        ],
-        "focus_areas": ["intimacy", "vulnerability", "loneliness", "authentic_connection"]
-    },
-    5: {
-        "theme": "Vision & Creative Imagination",
-        "description": "Reconnecting with dreams, possibilities, and creative potential",
-        "sample_prompts": [
-            "Design a perfect day that's entirely yours. What does it feel like?",
-            "What dreams did you abandon that still whisper to you?",
-            "If resources weren't a constraint, what would you create or explore?",
-            "What would 'enough' look like in your life?"
-        ],
-        "focus_areas": ["ideal_vision", "abandoned_dreams", "creative_potential", "sufficiency"]
-    },
-    6: {
-        "theme": "Commitment & Life Integration",
-        "description": "Aligning values with actions and creating sustainable change",
-        "sample_prompts": [
-            "What values feel worth protecting for the rest of your life?",
-            "How can you honor what you've discovered about yourself?",
-            "What small change could you make that would have the biggest impact?",
-            "How will you remember these insights when life gets busy again?"
-        ],
-        "focus_areas": ["core_values", "sustainable_change", "integration", "commitment"]
-    }
+# Chat completion settings
+CHAT_MODEL = "gpt-4o-mini"  # Much faster than gpt-4, still very good quality
+CHAT_MAX_TOKENS = 400  # Slightly shorter responses for speed
+CHAT_TEMPERATURE = 0.7
+
+# Prompt tokens available for conversation history; older turns are summarized instead
+CONTEXT_TOKEN_BUDGET = 1500
+
+# Fold evicted turns into the model-written summary every this many exchanges
+SUMMARY_EVERY_EXCHANGES = 3
+SUMMARY_MAX_TOKENS = 250
+
+# Cached replies to the reflection starters (shared by every session) and the voices pre-warmed for them.
+# Only the starters themselves are cached, matched exactly - never anything a user wrote.
+RESPONSE_CACHE_TTL_HOURS = 24
+PREWARM_VOICES = "alloy"
+# A cached reply is only reused under the chat settings that produced it
+RESPONSE_CACHE_VARIANT = f"{CHAT_MODEL}|{CHAT_MAX_TOKENS}|{CHAT_TEMPERATURE}"
+
+# A journey is found by the id in the ?journey= link, but only opened by the browser holding its key.
+# The key lives in a cookie (never in the URL), so a shared, bookmarked or logged link alone shows nothing;
+# the record keeps only the key's hash. Clearing cookies (or another browser) starts a new journey.
+JOURNEY_KEY_COOKIE = "existentia_journey_key"
+JOURNEY_KEY_DAYS = 365
+
+# Journey pacing: a month's focus moves on once this many days have passed since it began
+# and this many sessions were held in it
+JOURNEY_DAYS_PER_MONTH = 30
+JOURNEY_SESSIONS_PER_MONTH = 4
+
+# Speculative prefetch of the starter buttons on screen: how long an unused result is kept, and
+# the most a click waits for a prefetched reply that is still being written before streaming its own
+# (never more than a fresh reply usually takes to show its first words)
+VISIBLE_STARTERS = 2
+PREFETCH_TTL_MINUTES = 10
+PREFETCH_CLAIM_WAIT = 1.5
+
+# Normalized reflection starters per month - the only prompts whose replies are shared
+STARTER_PROMPTS = {
+    month: frozenset(normalize_prompt(prompt) for prompt in month_info["sample_prompts"])
+    for month, month_info in MONTHLY_PROMPTS.items()
 }
 
+# Messages shown per page of conversation history
+HISTORY_PAGE_SIZE = 20
+
+# Messages kept in memory beyond what the context window and visible page still need;
+# older ones live only in the session store. Idle sessions release their state entirely.
+SESSION_RESIDENT_MESSAGES = 40
+SESSION_IDLE_TTL_MINUTES = 30
+
+# Minimum gap between progressive re-renders of a streaming reply (seconds)
+STREAM_RENDER_INTERVAL = 0.05
+
+# Per-call upstream timeouts (seconds)
+CHAT_TIMEOUT = 30.0
+TTS_TIMEOUT = 60.0
+TRANSCRIPTION_TIMEOUT = 120.0
+
+# Re-encode trimmed recordings to Opus before upload when ffmpeg is available
+AUDIO_COMPRESSION = True
+
+# Upstream admission: per-endpoint budgets (requests and tokens per minute), the longest a
+# request may wait, the wait-queue bound, and the queue depth at which voice is skipped
+CHAT_RPM = 500
+CHAT_TPM = 200000
+TTS_RPM = 500
+TRANSCRIPTION_RPM = 500
+ADMISSION_MAX_WAIT = 45.0
+ADMISSION_QUEUE_LIMIT = 200
+ADMISSION_SHED_DEPTH = 50
+
+BUSY_MESSAGE = "Lots of people are reflecting right now and I couldn't get to your message in time. Could you try again in a moment?"
+
+# Text-to-speech settings (every one of these is part of the TTS cache key)
+TTS_MODEL = "tts-1-hd"
+TTS_SPEED = 1.1
+TTS_FORMAT = "mp3"
+
+def get_setting(name: str, default=None):
+    """Read an optional setting from Streamlit secrets, falling back to the environment"""
+    try:
+        if name in st.secrets:
+            return st.secrets[name]
+    except Exception:
+        pass
+    return os.environ.get(name, default)
+
+@st.cache_resource
+def get_tts_cache() -> TTSCache:
+    """Process-wide TTS cache shared by every session"""
+    return TTSCache(
+        max_memory_bytes=int(get_setting("TTS_CACHE_MEMORY_MB", 32)) * 1024 * 1024,
+        disk_dir=get_setting("TTS_CACHE_DIR"),
+        max_disk_bytes=int(get_setting("TTS_CACHE_DISK_MB", 512)) * 1024 * 1024
+    )
+
+@st.cache_resource
+def get_tts_executor() -> ThreadPoolExecutor:
+    """Process-wide worker pool for synthesizing reply sentences concurrently"""
+    return ContextThreadPoolExecutor(
+        max_workers=int(get_setting("TTS_PIPELINE_WORKERS", 4)),
+        thread_name_prefix="tts-pipeline"
+    )
+
+@st.cache_resource
+def get_transcription_executor() -> ThreadPoolExecutor:
+    """Process-wide pool transcribing the chunks of long recordings in parallel"""
+    return ContextThreadPoolExecutor(
+        max_workers=int(get_setting("TRANSCRIPTION_WORKERS", 8)),
+        thread_name_prefix="transcription"
+    )
+
+@st.cache_resource
+def get_openai_gateway(api_key: str) -> OpenAIGateway:
+    """One pooled async OpenAI client per API key, shared by every session in the process"""
+    return OpenAIGateway(
+        api_key,
+        base_url=get_setting("OPENAI_BASE_URL"),
+        max_concurrency=int(get_setting("OPENAI_MAX_CONCURRENCY", 32)),
+        max_connections=int(get_setting("OPENAI_MAX_CONNECTIONS", 64)),
+        max_retries=int(get_setting("OPENAI_MAX_RETRIES", 3))
+    )
+
+def get_gateway() -> OpenAIGateway:
+    """Shared OpenAI gateway for the current session's API key"""
+    return get_openai_gateway(st.session_state.openai_api_key)
+
+@st.cache_resource
+def get_summary_executor() -> ThreadPoolExecutor:
+    """Process-wide background workers for rolling conversation summaries"""
+    return ContextThreadPoolExecutor(
+        max_workers=int(get_setting("SUMMARY_WORKERS", 2)),
+        thread_name_prefix="summarizer"
+    )
+
+@st.cache_resource
+def get_response_cache() -> ResponseCache:
+    """Process-wide cache of replies to the reflection starters"""
+    return ResponseCache(
+        max_entries=int(get_setting("RESPONSE_CACHE_ENTRIES", 1024)),
+        ttl_seconds=float(get_setting("RESPONSE_CACHE_TTL_HOURS", RESPONSE_CACHE_TTL_HOURS)) * 3600,
+        similarity_threshold=None
+    )
+
+@st.cache_resource
+def get_prewarm_executor() -> ThreadPoolExecutor:
+    """Small pool for background warm-up work"""
+    return ContextThreadPoolExecutor(
+        max_workers=int(get_setting("PREWARM_WORKERS", 4)),
+        thread_name_prefix="prewarm"
+    )
+
+@st.cache_resource
+def get_prefetch_store() -> PrefetchStore:
+    """Process-wide speculative replies and audio for the reflection starters on screen"""
+    return PrefetchStore(ttl_seconds=float(get_setting("PREFETCH_TTL_MINUTES", PREFETCH_TTL_MINUTES)) * 60)
+
+@st.cache_resource
+def get_admission_controller() -> AdmissionController:
+    """Process-wide gate keeping every session's upstream calls within the API's rate limits"""
+    return AdmissionController(
+        limits={
+            "chat": (float(get_setting("CHAT_RPM", CHAT_RPM)), float(get_setting("CHAT_TPM", CHAT_TPM))),
+            "tts": (float(get_setting("TTS_RPM", TTS_RPM)), None),
+            "transcription": (float(get_setting("TRANSCRIPTION_RPM", TRANSCRIPTION_RPM)), None),
+        },
+        max_queue=int(get_setting("ADMISSION_QUEUE_LIMIT", ADMISSION_QUEUE_LIMIT)),
+        shed_depth=int(get_setting("ADMISSION_SHED_DEPTH", ADMISSION_SHED_DEPTH))
+    )
+
+def admit(endpoint: str, tokens: float = 0, on_wait=None) -> Reservation:
+    """Wait for this session's turn at an upstream endpoint (script thread only)"""
+    return get_admission_controller().acquire(
+        endpoint, get_journey_id(), tokens, timeout=ADMISSION_MAX_WAIT, on_wait=on_wait
+    )
+
+def voice_shed() -> bool:
+    """Whether voice should be skipped because the upstream queue is deep"""
+    admission = get_admission_controller()
+    if admission.shedding():
+        admission.record_shed()
+        return True
+    return False
+
+def queue_notice(placeholder):
+    """on_wait callback showing the user's place in line in a placeholder"""
+    def show(position: int, depth: int) -> None:
+        placeholder.caption(f"⏳ It's busy right now - you're number {position} in line ({depth} waiting)")
+    return show
+
+@st.cache_resource
+def get_session_store() -> SessionStore:
+    """Process-wide journey store (SQLite by default, or a Redis-compatible server)"""
+    return open_session_store(
+        backend=get_setting("SESSION_STORE", "sqlite"),
+        path=get_setting("SESSION_DB_PATH", "existentia.db"),
+        url=get_setting("SESSION_STORE_URL")
+    )
+
+@st.cache_resource
+def get_journey_engine() -> JourneyEngine:
+    """Month progression rules, shared by every session"""
+    return JourneyEngine(
+        days_per_month=int(get_setting("JOURNEY_DAYS_PER_MONTH", JOURNEY_DAYS_PER_MONTH)),
+        sessions_per_month=int(get_setting("JOURNEY_SESSIONS_PER_MONTH", JOURNEY_SESSIONS_PER_MONTH))
+    )
+
+def journey_record() -> Dict:
+    """The journey fields of this session's record"""
+    return {
+        "current_month": st.session_state.current_month,
+        "session_count": st.session_state.session_count,
+        **st.session_state.get('journey', {})
+    }
+
+def advance_journey() -> None:
+    """Open the next month if the current one is complete (called when a session starts)"""
+    record = journey_record()
+    advanced = get_journey_engine().advance(record)
+    st.session_state.current_month = record["current_month"]
+    st.session_state.journey = {field: record[field] for field in JOURNEY_FIELDS}
+    if advanced:
+        st.session_state.month_changed = True
+        # Saved at once, so a reload neither announces the month again nor loses it
+        persist_session_record()
+
+def get_journey_id() -> str:
+    """Stable id for this user's journey, kept in the URL so reloads and other replicas find it
+
+    The id only locates the journey - restore_session also requires the browser's journey key.
+    """
+    if 'journey_id' not in st.session_state:
+        journey_id = st.query_params.get("journey", "")
+        if not re.fullmatch(r"[0-9a-f]{32}", journey_id):
+            journey_id = start_new_journey_id()
+        st.session_state.journey_id = journey_id
+    return st.session_state.journey_id
+
+def start_new_journey_id() -> str:
+    """A fresh journey id, put in the URL in place of any other"""
+    journey_id = st.session_state.journey_id = uuid.uuid4().hex
+    st.query_params["journey"] = journey_id
+    return journey_id
+
+def get_journey_key() -> str:
+    """This browser's secret journey key, read from its cookie or newly made for it"""
+    if 'journey_key' not in st.session_state:
+        key = str(st.context.cookies.get(JOURNEY_KEY_COOKIE) or "")
+        if not re.fullmatch(r"[0-9A-Za-z_-]{43}", key):
+            key = secrets.token_urlsafe(32)
+            st.session_state.journey_key_unsaved = True
+        st.session_state.journey_key = key
+    return st.session_state.journey_key
+
+def journey_key_hash() -> str:
+    return hashlib.sha256(get_journey_key().encode("utf-8")).hexdigest()
+
+def save_journey_key_cookie() -> None:
+    """Store a newly made journey key in the browser (Streamlit can read cookies but not set them)"""
+    if not st.session_state.get('journey_key_unsaved'):
+        return
+    # window.top is the app page whether the script runs in it or in a component iframe
+    script = (
+        f"<script>window.top.document.cookie = '{JOURNEY_KEY_COOKIE}={get_journey_key()}; path=/; "
+        f"max-age={JOURNEY_KEY_DAYS * 86400}; SameSite=Strict' + "
+        f"(window.top.location.protocol === 'https:' ? '; Secure' : '');</script>"
+    )
+    try:
+        st.html(script, unsafe_allow_javascript=True)
+    except TypeError:  # Releases before st.html could run scripts
+        import streamlit.components.v1 as components
+        components.html(script, height=0)
+
+def restore_session() -> None:
+    """Load a persisted journey once, when the browser session starts"""
+    if st.session_state.get('session_restored'):
+        return
+    st.session_state.session_restored = True
+    
+    store = get_session_store()
+    journey_id = get_journey_id()
+    record = store.load_session(journey_id)
+    if record and record.get("key_hash") and not hmac.compare_digest(record["key_hash"], journey_key_hash()):
+        # Someone else's journey (or this browser lost its key): never show it, start afresh instead
+        start_new_journey_id()
+        st.session_state.journey_link_refused = True
+        record = None
+    if not record:
+        advance_journey()
+        return
+    
+    st.session_state.current_month = record.get("current_month", 1)
+    st.session_state.session_count = record.get("session_count", 0)
+    st.session_state.journey = {field: record[field] for field in JOURNEY_FIELDS if field in record}
+    st.session_state.consent_given = record.get("consent_given", False)
+    st.session_state.life_themes = record.get("life_themes", [])
+    st.session_state.theme_tracker = ThemeTracker.from_record(record.get("themes", {}))
+    st.session_state.rolling_summary = RollingSummary.from_record(record.get("summary", {}))
+    st.session_state.conversation_history = compact_history(store.load_messages(journey_id, st.session_state.session_count))
+    advance_journey()
+
+def persist_session_record() -> None:
+    """Queue a write of the journey record - batched off the request path"""
+    get_session_store().save_session(get_journey_id(), {
+        **journey_record(),
+        # Records written before journey keys existed are claimed by the first browser to save them
+        "key_hash": journey_key_hash(),
+        "consent_given": st.session_state.consent_given,
+        "life_themes": st.session_state.life_themes,
+        "themes": st.session_state.theme_tracker.to_record() if 'theme_tracker' in st.session_state else {},
+        "summary": st.session_state.rolling_summary.to_record() if 'rolling_summary' in st.session_state else {},
+        "updated_at": datetime.datetime.now().isoformat()
+    })
+
+def append_to_history(message: Dict) -> None:
+    """Add a message to the conversation and queue it for the append-only message log"""
+    history = st.session_state.conversation_history
+    record = MessageRecord.from_message(message)
+    history.append(record)
+    if 'session_memory' in st.session_state:
+        st.session_state.session_memory.bytes += estimate_bytes(record)
+    get_session_store().append_message(
+        get_journey_id(), st.session_state.session_count, len(history) - 1, record
+    )
+
+def load_spilled_messages(before: int, count: int) -> List[Dict]:
+    """Read back the `count` messages before position `before` from the session store"""
+    return get_session_store().load_messages(
+        get_journey_id(), st.session_state.session_count, limit=count, before=before
+    )
+
+def get_session_memory() -> SessionMemory:
+    """This session's memory bookkeeping, registered with the process-wide sweep"""
+    if 'session_memory' not in st.session_state:
+        st.session_state.session_memory = SessionMemory()
+        SESSION_REGISTRY.register(st.session_state.session_memory)
+    return st.session_state.session_memory
+
+def manage_session_memory() -> None:
+    """Keep only the messages this session still works with in memory and release idle sessions' state"""
+    memory = get_session_memory()
+    history = st.session_state.conversation_history
+    memory.track(history)
+    rendered = st.session_state.setdefault('rendered_messages', {})
+    ledger = get_recording_ledger()
+    flush = get_session_store().flush
+    # How another session's sweep frees this one while it is idle (never during a run - see main):
+    # every message, once the store has it, and the caches that are cheap to rebuild
+    memory.touch([lambda: spill_history(history, len(history), flush=flush), rendered.clear, ledger.clear])
+    
+    # Everything the summary, theme tracker and visible page still read stays resident
+    summary = st.session_state.get('rolling_summary')
+    tracker = st.session_state.get('theme_tracker')
+    keep_recent = max(int(get_setting("SESSION_RESIDENT_MESSAGES", SESSION_RESIDENT_MESSAGES)),
+                      st.session_state.get('visible_messages', HISTORY_PAGE_SIZE))
+    keep_from = min(
+        summary.covered if summary is not None else 0,
+        tracker.processed if tracker is not None else 0,
+        len(history) - keep_recent
+    )
+    memory.bytes += ensure_resident(history, keep_from, load_spilled_messages)
+    # Queued writes reach the store before any message is dropped from memory
+    try:
+        memory.bytes -= spill_history(history, keep_from, flush=get_session_store().flush)
+    except SessionStoreError:
+        # Some writes were dropped - save the record and resident messages again (messages are written
+        # by position, so repeats are harmless) and keep everything in memory until a flush succeeds
+        store = get_session_store()
+        for position, message in enumerate(history):
+            if message is not None:
+                store.append_message(get_journey_id(), st.session_state.session_count, position, message)
+        persist_session_record()
+    
+    SESSION_REGISTRY.sweep(float(get_setting("SESSION_IDLE_TTL_MINUTES", SESSION_IDLE_TTL_MINUTES)) * 60)
+
 def check_api_keys():
     """Check if required API keys are configured"""
+    # Resolved once per session; the gateway built from the key is shared process-wide
+    if st.session_state.get('openai_api_key'):
+        return True
     try:
         openai_key = st.secrets["OPENAI_API_KEY"]
         
-        # Initialize OpenAI client
-        if 'openai_client' not in st.session_state:
-            st.session_state.openai_client = OpenAI(api_key=openai_key)
+        # The client itself is process-wide - the session only remembers which key it uses
+        if 'openai_api_key' not in st.session_state:
+            st.session_state.openai_api_key = openai_key
         
         return True
     except:
@@ -302,8 +455,8 @@ def check_api_keys():
 
 def detect_safety_concerns(text: str) -> bool:
     """Detect potential safety concerns in user input"""
-    text_lower = text.lower()
-    return any(keyword in text_lower for keyword in SAFETY_KEYWORDS)
+    # Compiled once per process - one regex pass regardless of how many phrases are listed
+    return SAFETY_MATCHER.matches(text)
 
 def generate_safety_response():
     """Generate appropriate safety response"""
@@ -320,153 +473,592 @@ def extract_themes_from_conversation(conversation: List[Dict]) -> List[str]:
     """Extract recurring themes from conversation history"""
     # Simple keyword-based theme extraction
     # In a full version, this would use more sophisticated NLP
+    tracker = ThemeTracker()
+    tracker.update(conversation)
+    return tracker.top(5)  # Return top 5 themes
+
+def update_life_themes() -> None:
+    """Fold newly added messages into the session's theme scores - cost grows with new text only"""
+    if 'theme_tracker' not in st.session_state:
+        st.session_state.theme_tracker = ThemeTracker()
+    tracker = st.session_state.theme_tracker
+    tracker.update(st.session_state.conversation_history)
+    st.session_state.life_themes = tracker.top(5)
+
+def build_chat_messages(user_input: str, conversation_history: List[Dict], current_month: int,
+                        summary: Optional[RollingSummary] = None) -> List[Dict]:
+    """Build the message list sent to the chat model"""
     
-    themes = []
-    conversation_text = " ".join([msg["content"] for msg in conversation if msg["role"] == "user"])
-    
-    theme_keywords = {
-        "Work Dissatisfaction": ["work", "job", "career", "meaningless", "unfulfilled"],
-        "Relationship Concerns": ["lonely", "connection", "relationship", "family", "friends"],
-        "Time Awareness": ["time", "aging", "years", "future", "past", "regret"],
-        "Purpose & Meaning": ["purpose", "meaning", "point", "why", "direction"],
-        "Identity Questions": ["who am i", "identity", "self", "authentic", "real me"],
-        "Freedom & Control": ["trapped", "stuck", "control", "choice", "freedom"]
-    }
-    
-    for theme, keywords in theme_keywords.items():
-        if any(keyword in conversation_text.lower() for keyword in keywords):
-            themes.append(theme)
-    
-    return themes[:5]  # Return top 5 themes
+    # Rendered once per month and shared by every session
+    system_prompt = build_system_prompt(current_month)
 
-def get_ai_response(user_input: str, conversation_history: List[Dict], current_month: int) -> str:
+    # Pack as much recent history as the token budget allows; older turns come from the rolling summary
+    if summary is None:
+        if 'rolling_summary' not in st.session_state:
+            st.session_state.rolling_summary = RollingSummary()
+        summary = st.session_state.rolling_summary
+    return build_context_messages(
+        system_prompt,
+        conversation_history,
+        user_input,
+        budget=int(get_setting("CONTEXT_TOKEN_BUDGET", CONTEXT_TOKEN_BUDGET)),
+        summary=summary
+    )
+
+def get_ai_response(user_input: str, conversation_history: List[Dict], current_month: int,
+                    metrics: Optional[Dict] = None, on_wait=None) -> str:
     """Generate AI response using GPT-4"""
+    started = time.perf_counter()
+    metrics = metrics if metrics is not None else {}
+    metrics["streamed"] = False
     
     # Check for safety concerns first
     if detect_safety_concerns(user_input):
+        metrics["safety"] = True
+        metrics["time_to_first_token"] = metrics["total_latency"] = time.perf_counter() - started
         return generate_safety_response()
     
-    # Get current month's framework
-    month_info = MONTHLY_PROMPTS.get(current_month, MONTHLY_PROMPTS[1])
+    messages = build_chat_messages(user_input, conversation_history, current_month)
+    metrics["prompt_tokens"] = prompt_tokens(messages)
+    
+    try:
+        reservation = admit("chat", metrics["prompt_tokens"] + CHAT_MAX_TOKENS, on_wait)
+        response = ""
+        try:
+            response = get_gateway().chat(
+                messages,
+                model=CHAT_MODEL,
+                max_tokens=CHAT_MAX_TOKENS,
+                temperature=CHAT_TEMPERATURE,
+                timeout=CHAT_TIMEOUT
+            )
+        finally:
+            # The budget reserved the full max_tokens; hand back what the reply didn't use, even on failure
+            reservation.release(metrics["prompt_tokens"] + count_tokens(response))
+        return response.strip()
+    
+    except AdmissionRejected:
+        metrics["error"] = True
+        return BUSY_MESSAGE
     
-    # Build system prompt
-    system_prompt = f"""You are an empathetic AI companion helping someone navigate existential questions and find meaning. You are NOT a therapist.
+    except Exception as e:
+        metrics["error"] = True
+        return f"I'm having trouble connecting right now. Could you try again? (Error: {str(e)})"
+    
+    finally:
+        # Without streaming the first token arrives together with the last one
+        metrics["time_to_first_token"] = metrics["total_latency"] = time.perf_counter() - started
 
-Current focus: {month_info['theme']} - {month_info['description']}
+def stream_ai_response(user_input: str, conversation_history: List[Dict], current_month: int,
+                       metrics: Optional[Dict] = None, on_wait=None) -> Iterator[str]:
+    """Stream the AI response as text deltas, recording time-to-first-token and total latency"""
+    started = time.perf_counter()
+    metrics = metrics if metrics is not None else {}
+    metrics["streamed"] = True
+    
+    try:
+        if detect_safety_concerns(user_input):
+            metrics["safety"] = True
+            metrics["time_to_first_token"] = time.perf_counter() - started
+            yield generate_safety_response()
+            return
+        
+        messages = build_chat_messages(user_input, conversation_history, current_month)
+        metrics["prompt_tokens"] = prompt_tokens(messages)
+        
+        try:
+            reservation = admit("chat", metrics["prompt_tokens"] + CHAT_MAX_TOKENS, on_wait)
+            streamed = []
+            try:
+                deltas = get_gateway().stream_chat(
+                    messages,
+                    model=CHAT_MODEL,
+                    max_tokens=CHAT_MAX_TOKENS,
+                    temperature=CHAT_TEMPERATURE,
+                    timeout=CHAT_TIMEOUT
+                )
+                for delta in deltas:
+                    if "time_to_first_token" not in metrics:
+                        metrics["time_to_first_token"] = time.perf_counter() - started
+                    streamed.append(delta)
+                    yield delta
+            finally:
+                # Runs when the stream ends, fails or is abandoned by the consumer (GeneratorExit)
+                reservation.release(metrics["prompt_tokens"] + count_tokens("".join(streamed)))
+        
+        except AdmissionRejected:
+            metrics["error"] = True
+            metrics.setdefault("time_to_first_token", time.perf_counter() - started)
+            yield BUSY_MESSAGE
+        
+        except Exception as e:
+            metrics["error"] = True
+            if "time_to_first_token" not in metrics:
+                metrics["time_to_first_token"] = time.perf_counter() - started
+            yield f"I'm having trouble connecting right now. Could you try again? (Error: {str(e)})"
+    
+    finally:
+        metrics["total_latency"] = time.perf_counter() - started
 
-Your approach:
-- Ask thoughtful, deeper questions that invite reflection
-- Be warm but not overly enthusiastic
-- Avoid therapy language or clinical terms
-- Help users explore their own insights rather than giving advice
-- Focus on the current month's theme when relevant
-- Keep responses conversational and human-like
-- If they seem stuck, offer a gentle prompt or question
-- Acknowledge their thoughts before asking new questions
+def record_turn_metrics(metrics: Dict, response_text: str) -> None:
+    """Keep latency figures for the most recent turns in the session"""
+    if 'turn_metrics' not in st.session_state:
+        st.session_state.turn_metrics = []
+    st.session_state.turn_metrics.append({
+        "time_to_first_token": round(metrics.get("time_to_first_token", 0.0), 3),
+        "total_latency": round(metrics.get("total_latency", 0.0), 3),
+        "streamed": metrics.get("streamed", False),
+        "cached": metrics.get("cached", False),
+        "prompt_tokens": metrics.get("prompt_tokens", 0),
+        "response_chars": len(response_text),
+        "timestamp": datetime.datetime.now().isoformat()
+    })
+    # Only the recent turns are interesting - keep the list bounded
+    del st.session_state.turn_metrics[:-50]
+    
+    # Process-wide percentiles across every session
+    TRACER.add(
+        "chat",
+        metrics.get("total_latency", 0.0) * 1000,
+        time_to_first_token_ms=round(metrics.get("time_to_first_token", 0.0) * 1000, 1),
+        prompt_tokens=metrics.get("prompt_tokens", 0),
+        completion_tokens=count_tokens(response_text),
+        streamed=metrics.get("streamed", False),
+        cache_hit=metrics.get("cached", False),
+        error=metrics.get("error", False)
+    )
+    TRACER.add("chat.first_token", metrics.get("time_to_first_token", 0.0) * 1000)
 
-Remember: You're a supportive companion for self-reflection, not a counselor or life coach."""
+def response_cache_scope(user_input: str, history: List[Dict], month: int) -> Optional[str]:
+    """Cache scope for a reply to one of the month's starters opening a conversation, else None"""
+    if history or normalize_prompt(user_input) not in STARTER_PROMPTS.get(month, ()):
+        return None
+    summary = st.session_state.get('rolling_summary')
+    if summary is not None and summary.render():
+        return None
+    return ResponseCache.scope(month, history, variant=RESPONSE_CACHE_VARIANT)
 
-    # Prepare messages for API
-    messages = [{"role": "system", "content": system_prompt}]
-    
-    # Add conversation history (last 10 exchanges to manage token limits)
-    recent_history = conversation_history[-10:] if len(conversation_history) > 10 else conversation_history
-    messages.extend(recent_history)
-    
-    # Add current user input
-    messages.append({"role": "user", "content": user_input})
-    
+def generate_starter_reply(gateway: OpenAIGateway, prompt: str, month: int,
+                           admission: Optional[AdmissionController] = None) -> str:
+    """Reply to an opening prompt without any session state - safe to call from worker threads"""
+    messages = build_chat_messages(prompt, [], month, summary=RollingSummary())
+    estimate = prompt_tokens(messages)
+    reservation = None
+    if admission is not None:
+        reservation = admission.acquire("chat", "prewarm", estimate + CHAT_MAX_TOKENS, timeout=ADMISSION_MAX_WAIT)
+    reply = ""
     try:
-        client = st.session_state.openai_client
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",  # Much faster than gpt-4, still very good quality
-            messages=messages,
-            max_tokens=400,  # Slightly shorter responses for speed
-            temperature=0.7
+        reply = gateway.chat(
+            messages,
+            model=CHAT_MODEL,
+            max_tokens=CHAT_MAX_TOKENS,
+            temperature=CHAT_TEMPERATURE,
+            timeout=CHAT_TIMEOUT
+        )
+    finally:
+        if reservation is not None:
+            reservation.release(estimate + count_tokens(reply))
+    return reply.strip()
+
+@st.cache_resource(show_spinner=False)
+def prewarm_starter_replies(api_key: str) -> List[Future]:
+    """Once per process, generate and voice the reply to every month's reflection starters in the background"""
+    gateway = get_openai_gateway(api_key)
+    response_cache = get_response_cache()
+    tts_cache = get_tts_cache()
+    admission = get_admission_controller()
+    voices = [voice.strip() for voice in str(get_setting("PREWARM_VOICES", PREWARM_VOICES)).split(",") if voice.strip()]
+    
+    def warm(prompt: str, month: int) -> None:
+        scope = ResponseCache.scope(month, [], variant=RESPONSE_CACHE_VARIANT)
+        reply = response_cache.get_or_create(
+            scope, prompt, lambda: generate_starter_reply(gateway, prompt, month, admission)
+        )
+        # Warming is optional work - it never competes with real users for a busy upstream
+        if reply and not admission.shedding():
+            for voice in voices:
+                synthesize_speech(reply, voice, gateway, tts_cache, admission, "prewarm")
+    
+    executor = get_prewarm_executor()
+    return [
+        executor.submit(warm, prompt, month)
+        for month, month_info in MONTHLY_PROMPTS.items()
+        for prompt in month_info["sample_prompts"]
+    ]
+
+def prefetch_key(prompt: str, month: int, voice: Optional[str]) -> str:
+    return f"{RESPONSE_CACHE_VARIANT}|{month}|{voice or ''}|{normalize_prompt(prompt)}"
+
+def prefetch_starter(gateway: OpenAIGateway, response_cache: ResponseCache, tts_cache: TTSCache,
+                     admission: AdmissionController, executor: ThreadPoolExecutor, prompt: str, month: int,
+                     voice: Optional[str]) -> str:
+    """Speculative reply for one starter button, with its audio queued behind it - safe to call from worker threads"""
+    with TRACER.span("prefetch", voice=bool(voice)) as span:
+        # Reuse what pre-warming or another session already paid for
+        reply = response_cache.peek(ResponseCache.scope(month, [], variant=RESPONSE_CACHE_VARIANT), prompt)
+        span.set(generated=reply is None)
+        if reply is None:
+            reply = generate_starter_reply(gateway, prompt, month, admission)
+        # The audio goes through the shared TTS cache on its own task, so a click only waits for the text
+        # and its player joins the synthesis in flight instead of paying for it again
+        if voice and not admission.shedding():
+            executor.submit(synthesize_speech, reply, voice, gateway, tts_cache, admission, "prefetch")
+        return reply
+
+def prefetch_visible_starters() -> None:
+    """After the page has rendered, prepare the replies (and audio) behind the starter buttons on screen"""
+    if str(get_setting("PREFETCH_STARTERS", "1")).lower() in ("0", "false", "no"):
+        return
+    admission = get_admission_controller()
+    # Speculation only uses idle capacity
+    if admission.shedding():
+        return
+    month = st.session_state.current_month
+    voice = st.session_state.get('selected_voice', 'alloy') if st.session_state.get('enable_tts', True) else None
+    gateway = get_gateway()
+    response_cache = get_response_cache()
+    tts_cache = get_tts_cache()
+    store = get_prefetch_store()
+    executor = get_prewarm_executor()
+    for prompt in MONTHLY_PROMPTS[month]["sample_prompts"][:VISIBLE_STARTERS]:
+        store.schedule(
+            prefetch_key(prompt, month, voice),
+            executor,
+            lambda prompt=prompt: prefetch_starter(
+                gateway, response_cache, tts_cache, admission, executor, prompt, month, voice
+            )
+        )
+
+def prefetch_claim_wait() -> float:
+    """How long a click waits for a running prefetch: the usual time to first token, capped by the setting"""
+    cap = float(get_setting("PREFETCH_CLAIM_WAIT", PREFETCH_CLAIM_WAIT))
+    first_token = TRACER.snapshot().get("chat.first_token")
+    if first_token is None:
+        return cap
+    return min(cap, first_token["p50_ms"] / 1000)
+
+def claim_prefetched_starter(prompt: str, history: List[Dict]) -> Optional[str]:
+    """The prefetched reply to an opening prompt, or None to stream a fresh one"""
+    month = st.session_state.current_month
+    if history or prompt not in MONTHLY_PROMPTS[month]["sample_prompts"][:VISIBLE_STARTERS]:
+        return None
+    voice = st.session_state.get('selected_voice', 'alloy') if st.session_state.get('enable_tts', True) else None
+    reply = get_prefetch_store().claim(prefetch_key(prompt, month, voice), wait=prefetch_claim_wait())
+    if reply is None:
+        return None
+    get_response_cache().put(ResponseCache.scope(month, [], variant=RESPONSE_CACHE_VARIANT), prompt, reply)
+    return reply
+
+def summarize_turns(gateway: OpenAIGateway, previous_summary: str, turns: List[Dict],
+                    admission: Optional[AdmissionController] = None, user: str = "background") -> str:
+    """Merge older turns into the running summary - runs on a background worker"""
+    estimate = sum(count_tokens(turn["content"]) for turn in turns)
+    reservation = None
+    if admission is not None:
+        reservation = admission.acquire("chat", user, SUMMARY_MAX_TOKENS + estimate, timeout=ADMISSION_MAX_WAIT)
+    transcript = "\n".join(
+        f"{'Them' if turn['role'] == 'user' else 'Companion'}: {turn['content']}" for turn in turns
+    )
+    summary = ""
+    try:
+        summary = gateway.chat(
+            [
+                {"role": "system", "content": (
+                    "You maintain a running summary of a reflective conversation between a person and their companion. "
+                    "Merge the new turns into the existing summary. Keep what the person shared about themselves: "
+                    "circumstances, feelings, values, recurring themes and questions still open. "
+                    "Write in the third person, at most 150 words, with no preamble."
+                )},
+                {"role": "user", "content": f"Existing summary:\n{previous_summary or '(none yet)'}\n\nNew turns:\n{transcript}"}
+            ],
+            model=CHAT_MODEL,
+            max_tokens=SUMMARY_MAX_TOKENS,
+            temperature=0.3,
+            timeout=CHAT_TIMEOUT
+        )
+    finally:
+        if reservation is not None:
+            reservation.release(estimate + count_tokens(summary))
+    return summary
+
+def schedule_summary_update() -> None:
+    """Every few exchanges, summarize the turns that have left the context window in the background"""
+    history = st.session_state.conversation_history
+    if len(history) % (2 * SUMMARY_EVERY_EXCHANGES) != 0:
+        return
+    summary = st.session_state.get('rolling_summary')
+    if summary is None:
+        return
+    budget = int(get_setting("CONTEXT_TOKEN_BUDGET", CONTEXT_TOKEN_BUDGET))
+    boundary = split_for_budget(history, summary.covered, budget)
+    gateway = get_gateway()
+    admission = get_admission_controller()
+    user = get_journey_id()
+    summary.fold(
+        history,
+        boundary,
+        get_summary_executor(),
+        lambda previous, turns: summarize_turns(gateway, previous, turns, admission, user)
+    )
+
+def synthesize_speech(text: str, voice: str, gateway: OpenAIGateway, cache: TTSCache,
+                      admission: Optional[AdmissionController] = None, user: str = "background") -> Optional[bytes]:
+    """Synthesize speech through the shared cache - safe to call from worker threads"""
+    synthesized = False
+    
+    def synthesize() -> bytes:
+        nonlocal synthesized
+        synthesized = True
+        if admission is not None:
+            admission.acquire("tts", user, timeout=ADMISSION_MAX_WAIT)
+        return gateway.speech(
+            text,
+            model=TTS_MODEL,
+            voice=voice,
+            response_format=TTS_FORMAT,
+            speed=TTS_SPEED,  # Slightly faster speech
+            timeout=TTS_TIMEOUT
         )
-        return response.choices[0].message.content.strip()
     
-    except Exception as e:
-        return f"I'm having trouble connecting right now. Could you try again? (Error: {str(e)})"
+    # Reruns ask for the same reply again - only the first request pays for synthesis
+    cache_key = TTSCache.make_key(text, voice, TTS_MODEL, TTS_SPEED, TTS_FORMAT)
+    with TRACER.span("tts", chars=len(text)) as span:
+        audio = cache.get_or_create(cache_key, synthesize)
+        span.set(audio_bytes=len(audio or b""), cache_hit=not synthesized)
+        return audio
 
 def text_to_speech(text: str, voice: str = None) -> Optional[bytes]:
-    """Convert text to speech using OpenAI TTS API"""
+    """Convert text to speech using OpenAI TTS API, reusing cached audio when possible"""
     try:
-        client = st.session_state.openai_client
-        
         # Use selected voice or default to 'alloy'
         selected_voice = voice or st.session_state.get('selected_voice', 'alloy')
         
-        response = client.audio.speech.create(
-            model="tts-1-hd",  # Faster than tts-1, still high quality
-            voice=selected_voice,
-            input=text,
-            response_format="mp3",
-            speed=1.1  # Slightly faster speech
+        return synthesize_speech(
+            text, selected_voice, get_gateway(), get_tts_cache(), get_admission_controller(), get_journey_id()
         )
         
-        return response.content
+    except AdmissionRejected:
+        return None
         
     except Exception as e:
         st.error(f"Text-to-speech error: {str(e)}")
         return None
 
-def create_audio_player(audio_bytes: bytes, key: str = "audio_player") -> None:
+def start_speech_pipeline(audio_placeholder) -> SpeechPipeline:
+    """Start a sentence-pipelined TTS run whose segments play through the given placeholder"""
+    gateway = get_gateway()
+    voice = st.session_state.get('selected_voice', 'alloy')
+    cache = get_tts_cache()
+    admission = get_admission_controller()
+    user = get_journey_id()
+    
+    # Resolve session-bound values here - worker threads have no access to session state
+    return SpeechPipeline(
+        get_tts_executor(),
+        lambda sentence: synthesize_speech(sentence, voice, gateway, cache, admission, user),
+        player=SegmentPlayer(lambda audio: audio_placeholder.audio(audio, format="audio/mp3", autoplay=True))
+    )
+
+def play_ready_segments(pipeline: SpeechPipeline) -> None:
+    """Start the next synthesized sentence if the previous one has finished playing"""
+    if pipeline.player.ready:
+        segment = pipeline.next_segment()
+        if segment:
+            pipeline.player.play(segment)
+
+def finish_speech_pipeline(pipeline: SpeechPipeline, full_text: str, reply_index: int) -> None:
+    """Collect the remaining sentences, cache the whole reply's audio and hand playback to the browser
+    
+    Only synthesis is waited for, never playback: after the rerun the audio panel resumes the
+    joined reply from where the pipelined playback has got to, so the script thread stays free.
+    """
+    pipeline.finish()
+    while pipeline.pending:
+        pipeline.next_segment(block=True)
+    
+    # MP3 frames concatenate cleanly, so the joined segments serve as the reply's audio on rerun
+    if pipeline.segments and not pipeline.failed:
+        voice = st.session_state.get('selected_voice', 'alloy')
+        cache_key = TTSCache.make_key(full_text, voice, TTS_MODEL, TTS_SPEED, TTS_FORMAT)
+        get_tts_cache().put(cache_key, b"".join(pipeline.segments))
+    if pipeline.player.started is not None:
+        st.session_state.spoken_reply_index = reply_index
+        st.session_state.spoken_reply_started = pipeline.player.started
+
+def create_audio_player(audio_bytes: bytes, autoplay: bool = True, start_time: int = 0) -> None:
     """Create an audio player for the generated speech"""
-    if audio_bytes:
-        audio_b64 = base64.b64encode(audio_bytes).decode()
-        audio_html = f"""
-        <div class="audio-player">
-            <audio controls autoplay>
-                <source src="data:audio/mp3;base64,{audio_b64}" type="audio/mp3">
-                Your browser does not support the audio element.
-            </audio>
-        </div>
-        """
-        st.markdown(audio_html, unsafe_allow_html=True)
+    if not audio_bytes:
+        return
+    with TRACER.span("audio_player", audio_bytes=len(audio_bytes)):
+        # st.audio registers the clip with Streamlit's media endpoint under a hash of its bytes,
+        # so the page only carries a short /media URL and reruns with the same clip reuse it
+        # instead of pushing (and re-decoding) an inline base64 copy every time
+        st.audio(audio_bytes, format="audio/mp3", autoplay=autoplay, start_time=start_time)
 
 def speech_to_text(audio_data: bytes) -> str:
     """Convert speech to text using OpenAI Whisper"""
+    st.session_state.pop('last_audio_metrics', None)
     try:
-        # Create a temporary file-like object
-        audio_file = io.BytesIO(audio_data)
-        audio_file.name = "audio.wav"
+        # Upload only the speech: trimmed, 16 kHz mono and compressed where possible
+        compress = str(get_setting("AUDIO_COMPRESSION", AUDIO_COMPRESSION)).lower() not in ("0", "false", "no")
+        with TRACER.span("audio_preprocess", audio_bytes=len(audio_data)):
+            samples, audio_metrics = load_speech(audio_data)
+        st.session_state.last_audio_metrics = audio_metrics
+        if samples is None:
+            # Not a PCM WAV we understand - upload it untouched
+            return transcribe_audio(audio_data, "audio.wav")
+        if not audio_metrics["speech_detected"]:
+            audio_metrics["processed_bytes"] = 0
+            return ""
         
-        client = st.session_state.openai_client
-        response = client.audio.transcriptions.create(
-            model="whisper-1",
-            file=audio_file,
-            response_format="text"
-        )
-        return response
+        long_after = float(get_setting("LONG_RECORDING_SECONDS", LONG_RECORDING_SECONDS))
+        if len(samples) / TARGET_SAMPLE_RATE > long_after:
+            return transcribe_long_recording(samples, compress, audio_metrics)
+        
+        upload, filename = encode_for_upload(samples, compress)
+        audio_metrics["processed_bytes"] = len(upload)
+        return transcribe_audio(upload, filename)
+        
+    except AdmissionRejected:
+        st.warning("Lots of people are talking right now - please try your recording again in a moment.")
+        return ""
         
     except Exception as e:
         st.error(f"Speech recognition error: {str(e)}")
         return ""
 
-def process_audio_input(audio_bytes: bytes):
-    """Process audio input through Whisper and then to conversation"""
+def transcribe_audio(upload: bytes, filename: str, gateway: Optional[OpenAIGateway] = None,
+                     admission: Optional[AdmissionController] = None, user: str = "background") -> str:
+    """Single Whisper call for one prepared upload (pass gateway and admission from worker threads)"""
+    with TRACER.span("transcription", audio_bytes=len(upload)) as span:
+        if admission is not None:
+            admission.acquire("transcription", user, timeout=ADMISSION_MAX_WAIT)
+        else:
+            admit("transcription")
+        text = (gateway or get_gateway()).transcribe(
+            upload,
+            filename=filename,
+            model="whisper-1",
+            timeout=TRANSCRIPTION_TIMEOUT
+        )
+        span.set(chars=len(text))
+        return text
+
+def transcribe_long_recording(samples, compress: bool, audio_metrics: Dict) -> str:
+    """Split a long recording at pauses and transcribe the pieces concurrently, showing progress"""
+    bounds = split_at_silence(samples, TARGET_SAMPLE_RATE)
+    uploads = [encode_for_upload(samples[start:end], compress) for start, end, _ in bounds]
+    audio_metrics["processed_bytes"] = sum(len(upload) for upload, _ in uploads)
+    audio_metrics["chunks"] = len(uploads)
+    
+    # Worker threads have no script context, so the gateway is resolved here
+    gateway = get_gateway()
+    admission = get_admission_controller()
+    user = get_journey_id()
+    partial = st.empty()
+    
+    def show_progress(done: int, total: int, text: str) -> None:
+        partial.caption(f"📝 Transcribed {done}/{total} parts… {text}")
+    
+    try:
+        return transcribe_chunks(
+            uploads,
+            [overlapped for _, _, overlapped in bounds],
+            get_transcription_executor(),
+            lambda upload: transcribe_audio(*upload, gateway=gateway, admission=admission, user=user),
+            on_progress=show_progress
+        )
+    finally:
+        partial.empty()
+
+def describe_audio_metrics(audio_metrics: Dict) -> str:
+    """One-line before/after summary of a preprocessed recording"""
+    summary = f"{audio_metrics['original_bytes'] / 1024:.0f} KB → {audio_metrics['processed_bytes'] / 1024:.0f} KB uploaded"
+    if "original_seconds" in audio_metrics:
+        summary += f", {audio_metrics['original_seconds']:.1f}s → {audio_metrics['processed_seconds']:.1f}s of audio"
+    if audio_metrics.get("chunks", 1) > 1:
+        summary += f" in {audio_metrics['chunks']} parallel parts"
+    return summary
+
+def get_recording_ledger() -> RecordingLedger:
+    """This session's record of recordings already transcribed and answered"""
+    if 'recording_ledger' not in st.session_state:
+        st.session_state.recording_ledger = RecordingLedger()
+    return st.session_state.recording_ledger
+
+@TRACER.traced("voice_turn")
+def process_audio_input(audio_bytes: bytes, response_area=None):
+    """Process audio input through Whisper and then to conversation - at most once per recording"""
     if not audio_bytes:
         return
     
-    # Step 1: Transcribe with clear progress
-    with st.spinner("🎤 Listening... (transcribing your voice)"):
-        transcribed_text = speech_to_text(audio_bytes)
+    ledger = get_recording_ledger()
+    digest = ledger.fingerprint(audio_bytes)
+    if ledger.is_processed(digest):
+        return
+    
+    # Step 1: Transcribe with clear progress (or reuse the transcript from an interrupted run)
+    transcribed_text = ledger.transcript(digest)
+    if transcribed_text is None:
+        with st.spinner("🎤 Listening... (transcribing your voice)"):
+            transcribed_text = speech_to_text(audio_bytes)
+        if transcribed_text.strip():
+            ledger.remember_transcript(digest, transcribed_text)
+    
+    def mark_answered():
+        # Never answered again, and the widget holding its raw audio is replaced on the next run.
+        # Until then a rerun, stop or failed reply retries it from the saved transcript.
+        ledger.mark_processed(digest)
+        st.session_state.recorder_generation = st.session_state.get('recorder_generation', 0) + 1
     
     if transcribed_text.strip():
         # Show what was transcribed immediately
         st.info(f"💭 **You said:** \"{transcribed_text}\"")
+        if st.session_state.get('last_audio_metrics'):
+            st.caption(f"🎚️ {describe_audio_metrics(st.session_state.last_audio_metrics)}")
         
         # Step 2: Process with AI - show what's happening
         with st.spinner("🤔 Thinking about your message..."):
             # Process the transcribed text as regular input
-            process_user_input(transcribed_text.strip())
+            process_user_input(transcribed_text.strip(), response_area, on_saved=mark_answered)
+        return
+    
+    # Nothing to answer - only the user's retry can help
+    mark_answered()
+    if not st.session_state.get('last_audio_metrics', {}).get("speech_detected", True):
+        st.warning("🎤 I didn't hear any speech in that recording. Please try again a little closer to the mic.")
     else:
         st.error("🎤 Sorry, I couldn't understand what you said. Please try recording again.")
-        st.rerun()
 
 # Main App Interface
 
+def format_message_html(role: str, content: str) -> str:
+    """Render one conversation message as a styled HTML block"""
+    if role == "user":
+        return f'<div class="chat-message user-message"><strong>You:</strong> {content}</div>'
+    return f'<div class="chat-message ai-message"><strong>Companion:</strong> {content}</div>'
+
+def render_history_html(history: List[Dict], start: int) -> str:
+    """HTML for history[start:], reusing each message's cached rendering"""
+    # Messages are append-only, so (conversation, position) identifies a message's HTML for good
+    conversation = st.session_state.session_count
+    cache = st.session_state.setdefault('rendered_messages', {})
+    blocks = []
+    for position in range(start, len(history)):
+        if history[position] is None:
+            continue  # Spilled and missing from the store
+        message_id = (conversation, position)
+        html = cache.get(message_id)
+        if html is None:
+            html = cache[message_id] = format_message_html(history[position]["role"], history[position]["content"])
+        blocks.append(html)
+    
+    # Only keep renderings for the visible window
+    if len(cache) > len(blocks):
+        for message_id in [key for key in cache if key[0] != conversation or key[1] < start]:
+            del cache[message_id]
+    return "\n\n".join(blocks)
+
 def show_consent_screen():
     """Show initial consent and onboarding"""
     st.markdown('''
@@ -500,6 +1092,7 @@ def show_consent_screen():
     with col2:
         if st.button("I understand and want to continue", key="consent_button", use_container_width=True):
             st.session_state.consent_given = True
+            persist_session_record()
             st.rerun()
 
 def show_api_setup():
@@ -532,31 +1125,29 @@ def show_api_setup():
                 st.session_state.temp_openai_key = openai_key
                 st.session_state.temp_elevenlabs_key = elevenlabs_key
                 st.session_state.api_keys_set = True
-                st.session_state.openai_client = OpenAI(api_key=openai_key)
+                st.session_state.openai_api_key = openai_key
                 st.success("🎉 All set! Your app is ready.")
                 time.sleep(1)
                 st.rerun()
             else:
                 st.error("Please enter both API keys to continue")
 
-def show_main_interface():
-    """Show the main chat interface"""
-    
-    # Header
-    st.markdown('''
-    <div class="main-header">
-        <h1>Existential Companion</h1>
-        <p>Your AI partner for life's deeper questions</p>
-    </div>
-    ''', unsafe_allow_html=True)
-    
-    # Sidebar with current month info and themes
-    with st.sidebar:
-        st.markdown("### Current Focus")
-        month_info = MONTHLY_PROMPTS[st.session_state.current_month]
-        st.markdown(f"**Month {st.session_state.current_month}:** {month_info['theme']}")
-        st.markdown(month_info['description'])
-        
+@contextmanager
+def rerun_timer(scope: str):
+    """Record how long a full rerun ("app") or a fragment rerun takes"""
+    started = time.perf_counter()
+    try:
+        with TRACER.span(f"rerun.{scope}"):
+            yield
+    finally:
+        timings = st.session_state.setdefault('rerun_timings', [])
+        timings.append({"scope": scope, "ms": round((time.perf_counter() - started) * 1000, 1)})
+        del timings[:-100]
+
+@st.fragment
+def show_sidebar_settings():
+    """Voice and streaming settings - changing them only reruns this fragment"""
+    with rerun_timer("sidebar_settings"):
         # Voice selection
         st.markdown("### 🎙️ Voice Settings")
         voice_options = {
@@ -579,6 +1170,253 @@ def show_main_interface():
         # Store voice selection
         st.session_state.selected_voice = selected_voice
         
+        st.checkbox("⚡ Stream replies as they're written", value=True, key="stream_responses")
+        st.checkbox(
+            "🗣️ Start speaking before the reply is finished",
+            value=True,
+            key="pipelined_voice",
+            help="Speaks each sentence as soon as it is written (needs streaming and voice responses)"
+        )
+        
+        if st.session_state.get('last_audio_metrics'):
+            st.caption(f"🎚️ Last recording: {describe_audio_metrics(st.session_state.last_audio_metrics)}")
+
+def show_rerun_timings():
+    """Average cost of full reruns versus fragment reruns in this session"""
+    timings = st.session_state.get('rerun_timings', [])
+    if not timings:
+        return
+    with st.expander("⏱️ Rerun timings"):
+        by_scope: Dict[str, List[float]] = {}
+        for timing in timings:
+            by_scope.setdefault(timing["scope"], []).append(timing["ms"])
+        for scope, values in by_scope.items():
+            st.caption(f"{scope}: {sum(values) / len(values):.0f} ms avg, last {values[-1]:.0f} ms ({len(values)} runs)")
+
+def is_admin() -> bool:
+    """Whether this visitor opened the app with ?admin=<ADMIN_TOKEN>"""
+    token = get_setting("ADMIN_TOKEN")
+    return bool(token) and st.query_params.get("admin") == token
+
+def show_performance_panel():
+    """Admin-only view of per-stage latency percentiles across all sessions in this process"""
+    with st.expander("📈 Performance (all sessions)"):
+        stages = TRACER.snapshot()
+        if not stages:
+            st.caption("No spans recorded yet")
+        else:
+            st.table([
+                {
+                    "stage": name,
+                    "count": stage["count"],
+                    "p50 ms": round(stage["p50_ms"], 1),
+                    "p95 ms": round(stage["p95_ms"], 1),
+                    "p99 ms": round(stage["p99_ms"], 1),
+                }
+                for name, stage in stages.items()
+            ])
+        
+        chat_totals = stages.get("chat", {}).get("totals", {})
+        if chat_totals:
+            st.caption(
+                f"Tokens: {chat_totals.get('prompt_tokens', 0):.0f} prompt / "
+                f"{chat_totals.get('completion_tokens', 0):.0f} completion, "
+                f"{chat_totals.get('cache_hit', 0):.0f} cached replies"
+            )
+        memory_report = SESSION_REGISTRY.report()
+        st.caption(
+            f"Sessions: {memory_report['resident_sessions']} resident of {memory_report['sessions']}, "
+            f"{memory_report['mean_bytes'] / 1024:.0f} KB avg / {memory_report['max_bytes'] / 1024:.0f} KB max, "
+            f"{memory_report['evictions']} idle evictions"
+        )
+        reply_stats = get_response_cache().snapshot_stats()
+        st.caption(f"Reply cache: {reply_stats['hit_rate']:.0%} hit rate, {reply_stats['entries']} entries")
+        prefetch_stats = get_prefetch_store().snapshot_stats()
+        st.caption(
+            f"Starter prefetch: {prefetch_stats['hit_rate']:.0%} of starter clicks served "
+            f"({prefetch_stats['hits']} hits / {prefetch_stats['misses']} misses), "
+            f"{prefetch_stats['prefetched']} prefetched, {prefetch_stats['wasted']} expired unused"
+        )
+        admission_stats = get_admission_controller().snapshot_stats()
+        st.caption(
+            f"Admission: {admission_stats['admitted']} admitted, {admission_stats['queued']} queued, "
+            f"{admission_stats['rejected']} rejected, {admission_stats['shed']} voice replies shed, "
+            f"{admission_stats['waiting']} waiting now"
+        )
+        
+        st.download_button("OpenMetrics", TRACER.export_openmetrics(), file_name="existentia_metrics.txt",
+                           mime="application/openmetrics-text")
+        st.download_button("Recent spans (JSONL)", TRACER.export_jsonl(), file_name="existentia_spans.jsonl",
+                           mime="application/x-ndjson")
+
+@st.fragment
+def show_history_panel():
+    """Most recent page of the conversation - paging only reruns this fragment"""
+    with rerun_timer("history_panel"):
+        # Display the most recent page of the conversation - rerun cost stays flat however long it gets
+        history = st.session_state.conversation_history
+        visible = st.session_state.get('visible_messages', HISTORY_PAGE_SIZE)
+        if len(history) > visible:
+            if st.button(f"⬆️ Show earlier messages ({len(history) - visible} more)", key="load_earlier"):
+                visible += HISTORY_PAGE_SIZE
+                st.session_state.visible_messages = visible
+        start = max(0, len(history) - visible)
+        ensure_resident(history, start, load_spilled_messages)
+        if history:
+            # The whole page goes out as a single element instead of one per message
+            with TRACER.span("render_history", messages=len(history) - start):
+                st.markdown(render_history_html(history, start), unsafe_allow_html=True)
+
+@st.fragment
+def show_audio_panel():
+    """Spoken version of the latest reply"""
+    with rerun_timer("audio_panel"):
+        # Add audio player for the latest AI response if TTS is enabled
+        history = st.session_state.conversation_history
+        last = len(history) - 1
+        if st.session_state.get('enable_tts', True) and history and history[last]["role"] == "assistant":
+            # Under heavy load text replies keep flowing and voice waits
+            if st.session_state.get('spoken_reply_index') != last and voice_shed():
+                st.caption("🔇 Voice is paused while things are busy - the text reply is above.")
+                return
+            with st.spinner("Generating speech..."):
+                audio_bytes = text_to_speech(history[last]["content"])
+                if audio_bytes:
+                    # A pipelined reply began playing during streaming - carry on from where it has got to
+                    start_time = 0
+                    autoplay = True
+                    if st.session_state.get('spoken_reply_index') == last:
+                        elapsed = time.time() - st.session_state.get('spoken_reply_started', 0.0)
+                        autoplay = elapsed < estimate_mp3_duration(audio_bytes)
+                        start_time = int(elapsed) if autoplay else 0
+                    create_audio_player(audio_bytes, autoplay=autoplay, start_time=start_time)
+
+@st.fragment
+def show_input_panel():
+    """Voice and text input - typing or toggling options only reruns this fragment"""
+    with rerun_timer("input_panel"):
+        # Replies generated during this run stream in here, directly below the history
+        response_area = st.container()
+        
+        # Input methods
+        st.markdown("### Share Your Thoughts")
+        
+        # Voice input section - Style the Streamlit recorder to look like the big button
+        st.markdown("### 🎤 Voice Conversation")
+        
+        # Instructions
+        st.markdown("""
+        <div style="text-align: center; margin: 1rem 0; font-size: 18px; color: #666;">
+            <strong>Click the button below to start talking</strong><br>
+            <em>Click again to stop and send your message</em>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        # The actual functional audio input (now styled like a big button)
+        # A fresh key after each processed recording lets Streamlit drop the previous clip's bytes
+        audio_input = st.audio_input("🎤 TALK", key=f"audio_recorder_{st.session_state.get('recorder_generation', 0)}")
+        
+        # Auto-process when audio is recorded
+        if audio_input is not None:
+            # Identify recordings by content: the widget returns a new object on every rerun
+            audio_bytes = audio_input.getvalue()
+            if audio_bytes and not get_recording_ledger().is_processed(RecordingLedger.fingerprint(audio_bytes)):
+                # Show immediate feedback
+                st.markdown("""
+                <div style="text-align: center; margin: 1rem 0;">
+                    <div style="background: linear-gradient(135deg, #e8f5e8 0%, #c8e6c9 100%); 
+                               padding: 1rem; border-radius: 10px; border-left: 4px solid #4caf50;">
+                        <strong>🎤 Voice message received!</strong><br>
+                        <em>Processing your message...</em>
+                    </div>
+                </div>
+                """, unsafe_allow_html=True)
+                
+                # Auto-submit the audio immediately
+                with st.spinner("🤖 AI is listening and thinking..."):
+                    process_audio_input(audio_bytes, response_area)
+        
+        st.markdown("---")
+        
+        # Text input
+        st.markdown("### ✍️ Text Conversation")
+        st.markdown("*Prefer to type? Share your thoughts here:*")
+        user_input = st.text_area(
+            "What's on your mind today?", 
+            height=120, 
+            key="text_input", 
+            value="", 
+            placeholder="Type your thoughts, questions, or reflections here..."
+        )
+        
+        col1, col2, col3 = st.columns([1, 2, 1])
+        
+        with col2:
+            if st.button("💬 Send Message", use_container_width=True, disabled=not user_input.strip(), type="primary"):
+                if user_input.strip():
+                    process_user_input(user_input.strip(), response_area)
+        
+        with col2:
+            # TTS Toggle
+            tts_enabled = st.checkbox("🔊 Voice responses", value=st.session_state.get('enable_tts', True), key="tts_toggle")
+            if tts_enabled != st.session_state.get('enable_tts', True):
+                # The audio panel depends on this setting - rerun the whole page once
+                st.session_state.enable_tts = tts_enabled
+                st.rerun()
+            st.session_state.enable_tts = tts_enabled
+        
+        with col3:
+            if st.button("🎤 Voice Demo", help="Test text-to-speech with a sample message"):
+                demo_text = "Hello! This is how I sound. I'm here to help you explore life's deeper questions."
+                with st.spinner("Generating demo voice..."):
+                    audio_bytes = text_to_speech(demo_text)
+                    if audio_bytes:
+                        create_audio_player(audio_bytes)
+                    else:
+                        st.error("Voice synthesis not available. Please check your ElevenLabs API key.")
+            # Note: Browser-based audio recording requires additional setup
+            # For MVP, we'll focus on text input
+        
+        # Show sample prompts for current month
+        if not st.session_state.conversation_history:
+            st.markdown("### Reflection Starters")
+            month_info = MONTHLY_PROMPTS[st.session_state.current_month]
+            
+            for i, prompt in enumerate(month_info["sample_prompts"][:VISIBLE_STARTERS]):
+                if st.button(f"💭 {prompt}", key=f"prompt_{i}"):
+                    process_user_input(prompt, response_area)
+
+def show_main_interface():
+    """Show the main chat interface"""
+    
+    # Header
+    st.markdown('''
+    <div class="main-header">
+        <h1>Existential Companion</h1>
+        <p>Your AI partner for life's deeper questions</p>
+    </div>
+    ''', unsafe_allow_html=True)
+
+    # Announce a newly opened month once
+    if st.session_state.pop('month_changed', False):
+        month_info = MONTHLY_PROMPTS[st.session_state.current_month]
+        st.success(f"🌱 Month {st.session_state.current_month} begins: {month_info['theme']} - {month_info['description']}")
+
+    # Sidebar with current month info and themes
+    with st.sidebar:
+        st.markdown("### Current Focus")
+        month_info = MONTHLY_PROMPTS[st.session_state.current_month]
+        st.markdown(f"**Month {st.session_state.current_month}:** {month_info['theme']}")
+        st.markdown(month_info['description'])
+        progress = get_journey_engine().progress(journey_record())
+        if not progress["final_month"]:
+            st.caption(
+                f"Next focus opens after {progress['days_left']} more days and "
+                f"{progress['sessions_left']} more sessions"
+            )
+        
+        show_sidebar_settings()
+        
         st.markdown("### Emerging Themes")
         if st.session_state.life_themes:
             for theme in st.session_state.life_themes[-5:]:
@@ -589,232 +1427,174 @@ def show_main_interface():
         st.markdown("### Session Info")
         st.markdown(f"Sessions: {st.session_state.session_count}")
         st.markdown(f"Messages: {len(st.session_state.conversation_history)}")
+        if 'session_memory' in st.session_state:
+            st.caption(f"Messages in memory: {st.session_state.session_memory.bytes / 1024:.0f} KB")
+        
+        if st.session_state.get('turn_metrics'):
+            last_turn = st.session_state.turn_metrics[-1]
+            st.caption(
+                f"Last reply: first words after {last_turn['time_to_first_token']:.1f}s, "
+                f"complete after {last_turn['total_latency']:.1f}s"
+            )
+        
+        tts_stats = get_tts_cache().snapshot_stats()
+        cache_hits = tts_stats["memory_hits"] + tts_stats["disk_hits"]
+        st.caption(
+            f"Voice cache: {cache_hits} hits / {tts_stats['misses']} misses "
+            f"({tts_stats['bytes_served_from_cache'] // 1024} KB not re-synthesized)"
+        )
+        show_rerun_timings()
+        
+        if is_admin():
+            show_performance_panel()
         
         if st.button("Start New Session"):
             st.session_state.conversation_history = []
+            st.session_state.rolling_summary = RollingSummary()
+            if 'theme_tracker' in st.session_state:
+                st.session_state.theme_tracker.start_conversation()
+            st.session_state.spoken_reply_index = None
+            st.session_state.visible_messages = HISTORY_PAGE_SIZE
             st.session_state.session_count += 1
+            advance_journey()
+            persist_session_record()
             st.rerun()
     
     # Main chat interface
     st.markdown("### Conversation")
     
-    # Display conversation history
-    for i, message in enumerate(st.session_state.conversation_history):
-        if message["role"] == "user":
-            st.markdown(f'<div class="chat-message user-message"><strong>You:</strong> {message["content"]}</div>', unsafe_allow_html=True)
-        else:
-            st.markdown(f'<div class="chat-message ai-message"><strong>Companion:</strong> {message["content"]}</div>', unsafe_allow_html=True)
-            
-            # Add audio player for AI responses if TTS is enabled
-            if st.session_state.get('enable_tts', True) and len(st.session_state.conversation_history) > 0:
-                # Only generate audio for the most recent AI response to avoid overwhelming
-                if i == len(st.session_state.conversation_history) - 1 and message["role"] == "assistant":
-                    with st.spinner("Generating speech..."):
-                        audio_bytes = text_to_speech(message["content"])
-                        if audio_bytes:
-                            create_audio_player(audio_bytes, f"audio_{i}")
-    
-    # Input methods
-    st.markdown("### Share Your Thoughts")
-    
-    # Voice input section - Style the Streamlit recorder to look like the big button
-    st.markdown("### 🎤 Voice Conversation")
+    show_history_panel()
+    show_audio_panel()
     
     # Custom CSS to style the Streamlit audio input like a big button
-    st.markdown("""
-    <style>
-    /* Hide the default audio input styling and create custom button look */
-    .stAudioInput > div > div > div > button {
-        background: linear-gradient(135deg, #4caf50 0%, #45a049 100%) !important;
-        color: white !important;
-        border: none !important;
-        border-radius: 50px !important;
-        padding: 20px 40px !important;
-        font-size: 24px !important;
-        font-weight: bold !important;
-        cursor: pointer !important;
-        transition: all 0.3s ease !important;
-        box-shadow: 0 4px 15px rgba(76, 175, 80, 0.3) !important;
-        min-width: 200px !important;
-        text-transform: uppercase !important;
-        letter-spacing: 1px !important;
-        width: 100% !important;
-        max-width: 300px !important;
-        margin: 0 auto !important;
-        display: block !important;
-    }
-    
-    .stAudioInput > div > div > div > button:hover {
-        transform: translateY(-2px) !important;
-        box-shadow: 0 6px 20px rgba(76, 175, 80, 0.4) !important;
-    }
-    
-    .stAudioInput > div > div > div > button:active,
-    .stAudioInput > div > div > div > button[aria-pressed="true"] {
-        background: linear-gradient(135deg, #f44336 0%, #d32f2f 100%) !important;
-        box-shadow: 0 4px 15px rgba(244, 67, 54, 0.3) !important;
-        animation: pulse 1.5s infinite !important;
-    }
+    st.markdown(AUDIO_INPUT_STYLE_HTML, unsafe_allow_html=True)
     
-    .stAudioInput > div > div > div > button[aria-pressed="true"]:hover {
-        box-shadow: 0 6px 20px rgba(244, 67, 54, 0.4) !important;
-    }
-    
-    @keyframes pulse {
-        0% { transform: scale(1); }
-        50% { transform: scale(1.05); }
-        100% { transform: scale(1); }
-    }
-    
-    /* Center the audio input */
-    .stAudioInput {
-        display: flex !important;
-        justify-content: center !important;
-        align-items: center !important;
-        margin: 2rem 0 !important;
-    }
-    
-    /* Hide the label */
-    .stAudioInput > label {
-        display: none !important;
-    }
-    
-    /* Style the recording indicator */
-    .stAudioInput > div > div > div > div {
-        text-align: center !important;
-        margin-top: 1rem !important;
-        font-weight: bold !important;
-        color: #666 !important;
-    }
-    </style>
-    """, unsafe_allow_html=True)
-    
-    # Instructions
-    st.markdown("""
-    <div style="text-align: center; margin: 1rem 0; font-size: 18px; color: #666;">
-        <strong>Click the button below to start talking</strong><br>
-        <em>Click again to stop and send your message</em>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # The actual functional audio input (now styled like a big button)
-    audio_input = st.audio_input("🎤 TALK", key="audio_recorder")
-    
-    # Auto-process when audio is recorded
-    if audio_input is not None:
-        # Check if this is a new recording by comparing with previous state
-        if 'last_audio_input' not in st.session_state or st.session_state.last_audio_input != audio_input:
-            st.session_state.last_audio_input = audio_input
-            
-            # Show immediate feedback
-            st.markdown("""
-            <div style="text-align: center; margin: 1rem 0;">
-                <div style="background: linear-gradient(135deg, #e8f5e8 0%, #c8e6c9 100%); 
-                           padding: 1rem; border-radius: 10px; border-left: 4px solid #4caf50;">
-                    <strong>🎤 Voice message received!</strong><br>
-                    <em>Processing your message...</em>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            # Auto-submit the audio immediately
-            with st.spinner("🤖 AI is listening and thinking..."):
-                audio_bytes = audio_input.read()
-                if audio_bytes:
-                    # Process the audio
-                    process_audio_input(audio_bytes)
-    
-    st.markdown("---")
-    
-    # Text input
-    st.markdown("### ✍️ Text Conversation")
-    st.markdown("*Prefer to type? Share your thoughts here:*")
-    user_input = st.text_area(
-        "What's on your mind today?", 
-        height=120, 
-        key="text_input", 
-        value="", 
-        placeholder="Type your thoughts, questions, or reflections here..."
-    )
-    
-    col1, col2, col3 = st.columns([1, 2, 1])
-    
-    with col2:
-        if st.button("💬 Send Message", use_container_width=True, disabled=not user_input.strip(), type="primary"):
-            if user_input.strip():
-                process_user_input(user_input.strip())
-    
-    with col2:
-        # TTS Toggle
-        tts_enabled = st.checkbox("🔊 Voice responses", value=st.session_state.get('enable_tts', True), key="tts_toggle")
-        st.session_state.enable_tts = tts_enabled
-    
-    with col3:
-        if st.button("🎤 Voice Demo", help="Test text-to-speech with a sample message"):
-            demo_text = "Hello! This is how I sound. I'm here to help you explore life's deeper questions."
-            with st.spinner("Generating demo voice..."):
-                audio_bytes = text_to_speech(demo_text)
-                if audio_bytes:
-                    create_audio_player(audio_bytes, "demo_audio")
-                else:
-                    st.error("Voice synthesis not available. Please check your ElevenLabs API key.")
-        # Note: Browser-based audio recording requires additional setup
-        # For MVP, we'll focus on text input
-    
-    # Show sample prompts for current month
-    if not st.session_state.conversation_history:
-        st.markdown("### Reflection Starters")
-        month_info = MONTHLY_PROMPTS[st.session_state.current_month]
-        
-        for i, prompt in enumerate(month_info["sample_prompts"][:2]):
-            if st.button(f"💭 {prompt}", key=f"prompt_{i}"):
-                process_user_input(prompt)
+    show_input_panel()
 
-def process_user_input(user_input: str):
-    """Process user input and generate AI response"""
+@TRACER.traced("turn")
+def process_user_input(user_input: str, response_area=None, on_saved: Optional[Callable[[], None]] = None):
+    """Process user input and generate AI response; `on_saved` runs once the reply is saved"""
+    
+    # Add user message to history - unless a run interrupted before replying already did
+    history = st.session_state.conversation_history
+    if not (history and history[-1] is not None and history[-1]["role"] == "user"
+            and history[-1]["content"] == user_input):
+        append_to_history({
+            "role": "user", 
+            "content": user_input,
+            "timestamp": datetime.datetime.now().isoformat()
+        })
+    
+    metrics = {}
+    pipeline = None
+    history = st.session_state.conversation_history[:-1]  # Don't include the message we just added
+    
+    # Reflection starters opening a conversation are answered from the shared cache; nothing a user
+    # typed is ever stored there or served to anyone else
+    cache_scope = response_cache_scope(user_input, history, st.session_state.current_month)
+    cached_reply = None
+    if not detect_safety_concerns(user_input):
+        cached_reply = claim_prefetched_starter(user_input, history) or get_response_cache().get(cache_scope, user_input)
+    
+    if cached_reply is not None:
+        ai_response = cached_reply
+        metrics.update({"streamed": False, "cached": True, "time_to_first_token": 0.0, "total_latency": 0.0})
+    elif st.session_state.get('stream_responses', True):
+        # Render the reply progressively as tokens arrive
+        with response_area if response_area is not None else st.container():
+            st.markdown(format_message_html("user", user_input), unsafe_allow_html=True)
+            reply_placeholder = st.empty()
+            audio_placeholder = st.empty()
+        
+        # In pipelined voice mode each finished sentence is synthesized while the rest is still streaming
+        if st.session_state.get('enable_tts', True) and st.session_state.get('pipelined_voice', True) and not voice_shed():
+            pipeline = start_speech_pipeline(audio_placeholder)
+        
+        ai_response = ""
+        last_render = 0.0
+        replies = stream_ai_response(user_input, history, st.session_state.current_month, metrics,
+                                     on_wait=queue_notice(reply_placeholder))
+        for delta in replies:
+            ai_response += delta
+            if pipeline:
+                pipeline.feed(delta)
+                play_ready_segments(pipeline)
+            # Throttle re-renders so each token doesn't become its own websocket message
+            now = time.perf_counter()
+            if now - last_render >= STREAM_RENDER_INTERVAL:
+                reply_placeholder.markdown(format_message_html("assistant", ai_response.lstrip() + "▌"), unsafe_allow_html=True)
+                last_render = now
+        ai_response = ai_response.strip()
+        reply_placeholder.markdown(format_message_html("assistant", ai_response), unsafe_allow_html=True)
+    else:
+        # Generate AI response with progress indicator
+        queue_status = st.empty()
+        with st.spinner("💭 Crafting a thoughtful response..."):
+            ai_response = get_ai_response(user_input, history, st.session_state.current_month, metrics,
+                                          on_wait=queue_notice(queue_status))
+        queue_status.empty()
     
-    # Add user message to history
-    st.session_state.conversation_history.append({
-        "role": "user", 
-        "content": user_input,
-        "timestamp": datetime.datetime.now().isoformat()
-    })
+    if cache_scope is not None and cached_reply is None and not metrics.get("safety") and not metrics.get("error"):
+        get_response_cache().put(cache_scope, user_input, ai_response)
     
-    # Generate AI response with progress indicator
-    with st.spinner("💭 Crafting a thoughtful response..."):
-        ai_response = get_ai_response(
-            user_input, 
-            st.session_state.conversation_history[:-1],  # Don't include the message we just added
-            st.session_state.current_month
-        )
+    record_turn_metrics(metrics, ai_response)
     
     # Add AI response to history
-    st.session_state.conversation_history.append({
+    append_to_history({
         "role": "assistant",
         "content": ai_response,
         "timestamp": datetime.datetime.now().isoformat()
     })
     
-    # Extract themes periodically
-    if len(st.session_state.conversation_history) % 6 == 0:  # Every 3 exchanges
-        st.session_state.life_themes = extract_themes_from_conversation(
-            st.session_state.conversation_history
-        )
+    # Keep the rolling summary current without making this turn wait for it
+    schedule_summary_update()
+    
+    # Incremental, so themes can be refreshed every turn
+    update_life_themes()
+    
+    persist_session_record()
+    if on_saved is not None:
+        on_saved()
+    
+    # The reply is saved - only now collect the rest of its audio, so an interruption can't lose it
+    if pipeline:
+        finish_speech_pipeline(pipeline, ai_response, len(st.session_state.conversation_history) - 1)
     
     st.rerun()
 
 # Main App Logic
 def main():
-    # Check API configuration
-    api_keys_configured = check_api_keys()
-    
-    # Show consent screen first
-    if not st.session_state.consent_given:
-        show_consent_screen()
-        return
-    
-    # Main interface
-    show_main_interface()
+    # Full reruns are timed too, to compare against fragment-only reruns. Holding the session's
+    # running lock keeps the idle sweep from releasing its state mid-run.
+    with rerun_timer("app"), get_session_memory().running:
+        # Optionally append every span to a JSON lines file for offline analysis
+        TRACER.jsonl_path = get_setting("TRACE_JSONL_PATH")
+        
+        # Check API configuration
+        api_keys_configured = check_api_keys()
+        
+        # Pick up a persisted journey (after a reload, restart or move to another replica)
+        restore_session()
+        save_journey_key_cookie()
+        if st.session_state.pop('journey_link_refused', False):
+            st.info("🔒 That journey belongs to another browser, so a new one has started here.")
+        manage_session_memory()
+        
+        # Starter replies and their audio are generated once per process, ahead of the first click
+        if api_keys_configured and str(get_setting("PREWARM_STARTERS", "1")).lower() not in ("0", "false", "no"):
+            prewarm_starter_replies(st.session_state.openai_api_key)
+        
+        # Show consent screen first
+        if not st.session_state.consent_given:
+            show_consent_screen()
+            return
+        
+        # Main interface
+        show_main_interface()
+        
+        # The page is on screen - use the idle time to prepare the starter buttons the user can see
+        if api_keys_configured and not st.session_state.conversation_history:
+            prefetch_visible_starters()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
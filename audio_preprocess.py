@@ -0,0 +1,157 @@
+import io
+import shutil
+import subprocess
+import wave
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# Whisper works at 16 kHz mono internally - anything more is upload overhead
+TARGET_SAMPLE_RATE = 16000
+
+FRAME_MS = 30
+# Frames quieter than this (dBFS) never count as speech, however quiet the room is
+SILENCE_FLOOR_DB = -50.0
+# Speech must stand this far above the estimated noise floor
+SPEECH_MARGIN_DB = 10.0
+# Padding kept around speech, and the longest pause kept inside it
+EDGE_PADDING_MS = 200
+MAX_PAUSE_MS = 700
+
+
+def decode_wav(data: bytes) -> Tuple[np.ndarray, int]:
+    """Decode 8/16/32-bit PCM WAV into float samples shaped (frames, channels)"""
+    with wave.open(io.BytesIO(data), "rb") as wav:
+        channels = wav.getnchannels()
+        width = wav.getsampwidth()
+        rate = wav.getframerate()
+        raw = wav.readframes(wav.getnframes())
+
+    if width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif width == 2:
+        samples = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768
+    elif width == 4:
+        samples = np.frombuffer(raw, dtype="<i4").astype(np.float32) / 2147483648
+    else:
+        raise ValueError(f"Unsupported sample width: {width * 8} bits")
+    return samples.reshape(-1, channels), rate
+
+
+def encode_wav(samples: np.ndarray, rate: int) -> bytes:
+    """Encode mono float samples as 16-bit PCM WAV"""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def downmix_and_resample(samples: np.ndarray, rate: int, target_rate: int = TARGET_SAMPLE_RATE) -> np.ndarray:
+    """Average channels to mono and resample to the target rate"""
+    mono = samples.mean(axis=1) if samples.ndim == 2 else samples
+    if rate == target_rate or len(mono) == 0:
+        return mono
+    if rate % target_rate == 0:
+        # Integer ratio (48k/32k -> 16k): averaging each block doubles as a simple low-pass filter
+        factor = rate // target_rate
+        usable = len(mono) - len(mono) % factor
+        return mono[:usable].reshape(-1, factor).mean(axis=1)
+    duration = len(mono) / rate
+    target_times = np.arange(int(duration * target_rate)) / target_rate
+    return np.interp(target_times, np.arange(len(mono)) / rate, mono).astype(np.float32)
+
+
+def frame_energy_db(samples: np.ndarray, rate: int, frame_ms: int = FRAME_MS) -> np.ndarray:
+    """Mean energy in dBFS of each full frame"""
+    frame = max(1, rate * frame_ms // 1000)
+    count = len(samples) // frame
+    frames = samples[:count * frame].reshape(count, frame)
+    return 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-12)
+
+
+def speech_frames(samples: np.ndarray, rate: int, frame_ms: int = FRAME_MS) -> np.ndarray:
+    """Energy-based voice activity: one boolean per frame"""
+    energy_db = frame_energy_db(samples, rate, frame_ms)
+    if len(energy_db) == 0:
+        return np.zeros(0, dtype=bool)
+    # The quietest tenth of the recording approximates the room's noise floor; capping the
+    # threshold below the peak keeps recordings with no pauses at all from reading as silence
+    noise_floor = np.percentile(energy_db, 10)
+    threshold = max(SILENCE_FLOOR_DB, min(noise_floor + SPEECH_MARGIN_DB, energy_db.max() - SPEECH_MARGIN_DB))
+    return energy_db > threshold
+
+
+def trim_silence(samples: np.ndarray, rate: int, frame_ms: int = FRAME_MS) -> np.ndarray:
+    """Drop leading/trailing silence and shorten long pauses; empty if there is no speech"""
+    voiced = speech_frames(samples, rate, frame_ms)
+    if not voiced.any():
+        return samples[:0]
+
+    frame = max(1, rate * frame_ms // 1000)
+    padding = EDGE_PADDING_MS // frame_ms
+    max_pause = MAX_PAUSE_MS // frame_ms
+    voiced_indices = np.flatnonzero(voiced)
+    first = max(0, voiced_indices[0] - padding)
+    last = min(len(voiced), voiced_indices[-1] + padding + 1)
+
+    # Keep every voiced frame plus at most `max_pause` frames of each silent gap
+    keep = np.zeros(len(voiced), dtype=bool)
+    keep[first:last] = True
+    gap_start = None
+    for index in range(first, last):
+        if voiced[index]:
+            if gap_start is not None and index - gap_start > max_pause:
+                keep[gap_start + max_pause // 2:index - max_pause // 2] = False
+            gap_start = None
+        elif gap_start is None:
+            gap_start = index
+
+    # The tail after the last full frame is silence by construction
+    frame_mask = np.repeat(keep, frame)
+    return samples[:len(frame_mask)][frame_mask]
+
+
+def encode_compact(wav_bytes: bytes, bitrate: str = "24k") -> Optional[bytes]:
+    """Re-encode to Opus in Ogg with ffmpeg when it is installed"""
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        return None
+    try:
+        result = subprocess.run(
+            [ffmpeg, "-hide_banner", "-loglevel", "error", "-i", "pipe:0",
+             "-c:a", "libopus", "-b:a", bitrate, "-application", "voip", "-f", "ogg", "pipe:1"],
+            input=wav_bytes, capture_output=True, timeout=30, check=True
+        )
+    except (subprocess.SubprocessError, OSError):
+        return None
+    return result.stdout or None
+
+
+def load_speech(data: bytes) -> Tuple[Optional[np.ndarray], Dict]:
+    """Decode, downmix, resample and trim a recording; samples are None if it isn't a PCM WAV"""
+    metrics = {"original_bytes": len(data), "processed_bytes": len(data), "speech_detected": True}
+    try:
+        samples, rate = decode_wav(data)
+    except (wave.Error, ValueError, EOFError):
+        return None, metrics
+
+    metrics["original_seconds"] = round(len(samples) / rate, 2) if rate else 0.0
+    trimmed = trim_silence(downmix_and_resample(samples, rate), TARGET_SAMPLE_RATE)
+    metrics["processed_seconds"] = round(len(trimmed) / TARGET_SAMPLE_RATE, 2)
+    metrics["speech_detected"] = len(trimmed) > 0
+    return trimmed, metrics
+
+
+def encode_for_upload(samples: np.ndarray, compress: bool = True) -> Tuple[bytes, str]:
+    """Encode 16 kHz mono samples for upload, as Opus when that is smaller"""
+    processed, filename = encode_wav(samples, TARGET_SAMPLE_RATE), "audio.wav"
+    if compress:
+        compact = encode_compact(processed)
+        if compact and len(compact) < len(processed):
+            processed, filename = compact, "audio.ogg"
+    return processed, filename
+
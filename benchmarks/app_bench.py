@@ -0,0 +1,232 @@
+"""Offline benchmarks for the app's own overhead, against the mock OpenAI server.
+
+Run from the repository root (needs the app's requirements installed):
+
+    python benchmarks/app_bench.py functions [--iterations 20]
+    python benchmarks/app_bench.py sessions [--sessions 8] [--turns 3]
+
+"functions" times the request-path helpers inside one headless script run; "sessions" drives N concurrent headless
+sessions (one process each) through Streamlit's AppTest and reports turns/sec, rerun time and memory per session.
+Upstream latency comes from the mock server's settings, so anything above it is the app's own cost.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+APP_PATH = os.path.join(REPO_DIR, "app.py")
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from mock_openai import MockConfig, start_mock_server  # noqa: E402
+
+MOCK_API_KEY = "sk-mock"
+
+
+def configure_environment(base_url: str, prewarm: bool) -> None:
+    """Point the app at the mock server and keep its state out of the working tree"""
+    state_dir = tempfile.mkdtemp(prefix="existentia-bench-")
+    os.environ.update({
+        "OPENAI_BASE_URL": base_url,
+        "SESSION_DB_PATH": os.path.join(state_dir, "existentia.db"),
+        "PREWARM_STARTERS": "1" if prewarm else "0",
+    })
+
+
+def summarize(samples_ms: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples_ms)
+    return {
+        "n": len(ordered),
+        "mean": statistics.fmean(ordered),
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+    }
+
+
+def timed(call: Callable[[int], object], iterations: int) -> List[float]:
+    samples = []
+    for index in range(iterations):
+        started = time.perf_counter()
+        call(index)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def print_table(rows: Dict[str, List[float]], upstream_ms: Dict[str, float]) -> None:
+    print(f"{'operation':<28} {'n':>4} {'mean ms':>9} {'p50 ms':>8} {'p95 ms':>8} {'upstream ms':>12}")
+    for name, samples in rows.items():
+        stats = summarize(samples)
+        upstream = upstream_ms.get(name)
+        print(
+            f"{name:<28} {stats['n']:>4} {stats['mean']:>9.1f} {stats['p50']:>8.1f} {stats['p95']:>8.1f} "
+            f"{(f'{upstream:.0f}' if upstream is not None else '-'):>12}"
+        )
+
+
+def sample_recording(seconds: float = 4.0) -> bytes:
+    """A WAV with a tone between two pauses, so preprocessing has something to trim"""
+    import numpy as np
+
+    from audio_preprocess import encode_wav
+
+    rate = 16000
+    times = np.arange(int(seconds * rate)) / rate
+    speech = 0.3 * np.sin(2 * np.pi * 220 * times)
+    pause = np.zeros(rate)
+    return encode_wav(np.concatenate([pause, speech, pause]).astype(np.float32), rate)
+
+
+def run_turn(app, user_input: str) -> None:
+    """Run one full turn outside a script run; the closing st.rerun() is expected"""
+    try:
+        app.process_user_input(user_input)
+    except BaseException as e:  # Streamlit's rerun/stop signals derive from BaseException
+        if type(e).__name__ not in ("RerunException", "StopException"):
+            raise
+
+
+def measure_functions(iterations: int) -> Dict[str, List[float]]:
+    """Time the request-path helpers; must run inside a script run so session state is real"""
+    import streamlit as st
+
+    import app
+
+    st.session_state.openai_api_key = MOCK_API_KEY
+    st.session_state.enable_tts = False  # process_user_input is timed without the audio pipeline
+    recording = sample_recording()
+    spoken = "This is sentence number {}, spoken only once."
+
+    def fresh_turn(index: int) -> None:
+        st.session_state.conversation_history = []
+        run_turn(app, f"What would make this year feel meaningful? (turn {index})")
+        if len(st.session_state.conversation_history) != 2:
+            raise RuntimeError("process_user_input did not record a full turn")
+
+    return {
+        "get_ai_response": timed(
+            lambda i: app.get_ai_response(f"Why does my work feel empty? ({i})", [], 1), iterations),
+        "text_to_speech (miss)": timed(lambda i: app.text_to_speech(spoken.format(i)), iterations),
+        "text_to_speech (hit)": timed(lambda i: app.text_to_speech("This sentence is always the same."), iterations),
+        "speech_to_text": timed(lambda i: app.speech_to_text(recording), iterations),
+        "process_user_input": timed(fresh_turn, iterations),
+    }
+
+
+def functions_script() -> None:
+    """AppTest script for "functions" mode; AppTest runs only this function's source"""
+    import streamlit as st
+
+    from app_bench import measure_functions
+
+    if "bench_rows" not in st.session_state:
+        st.session_state.bench_rows = measure_functions(st.session_state.bench_iterations)
+
+
+def bench_functions(args, config: MockConfig) -> None:
+    # Outside a script run st.session_state is a fresh empty state on every access, so the helpers
+    # are timed inside one AppTest run, where the session behaves as under `streamlit run`
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_function(functions_script, default_timeout=args.timeout)
+    at.secrets["OPENAI_API_KEY"] = MOCK_API_KEY
+    at.session_state["bench_iterations"] = args.iterations
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+
+    words = len(config.reply.split(" "))
+    spoken = "This is sentence number {}, spoken only once."
+    upstream = {
+        "get_ai_response": config.first_token_ms + config.token_ms * words,
+        "text_to_speech (miss)": config.speech_base_ms + config.speech_ms_per_char * len(spoken.format(0)),
+        "text_to_speech (hit)": 0.0,
+        "speech_to_text": config.transcription_base_ms,
+        "process_user_input": config.first_token_ms + config.token_ms * (words - 1),
+    }
+    print_table(at.session_state["bench_rows"], upstream)
+
+
+def run_session(index: int, turns: int, timeout: float) -> Dict:
+    """Drive one headless session from consent through `turns` typed messages"""
+    from streamlit.testing.v1 import AppTest
+
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    at.secrets["OPENAI_API_KEY"] = MOCK_API_KEY
+    reruns, turn_times = [], []
+
+    def rerun(action: Callable[[], object] = None) -> None:
+        started = time.perf_counter()
+        (action or at.run)()
+        reruns.append((time.perf_counter() - started) * 1000)
+        if at.exception:
+            raise RuntimeError(f"Session {index}: {at.exception[0].value}")
+
+    rerun()
+    rerun(lambda: at.button(key="consent_button").click().run())
+    for turn in range(turns):
+        # Typing reruns the app (as leaving the text box does in a browser), which enables Send
+        rerun(lambda: at.text_area(key="text_input").input(f"Session {index}, turn {turn}: what am I really looking for?").run())
+        send = next(button for button in at.button if button.label.startswith("💬"))
+        started = time.perf_counter()
+        rerun(lambda: send.click().run())
+        turn_times.append((time.perf_counter() - started) * 1000)
+    if len(at.session_state["conversation_history"]) != 2 * turns:
+        raise RuntimeError(f"Session {index}: not every turn was answered")
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"reruns": reruns, "turns": turn_times, "retained": current - baseline, "peak": peak - baseline}
+
+
+def bench_sessions(args) -> None:
+    # AppTest installs a process-wide runtime for each run, so concurrent sessions need their own processes
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.sessions) as pool:
+        results = list(pool.map(run_session, range(args.sessions), [args.turns] * args.sessions,
+                                [args.timeout] * args.sessions))
+    elapsed = time.perf_counter() - started
+
+    turns = [ms for result in results for ms in result["turns"]]
+    reruns = [ms for result in results for ms in result["reruns"]]
+    print(f"{args.sessions} sessions x {args.turns} turns in {elapsed:.1f}s: {len(turns) / elapsed:.2f} turns/sec")
+    print_table({"turn (click to reply)": turns, "rerun (any)": reruns}, {})
+    # Includes the app's imports and each AppTest's element tree, so this is an upper bound on real
+    # per-session state
+    print(f"Memory per session: {statistics.fmean(r['retained'] for r in results) / 1024:.0f} KB retained, "
+          f"{statistics.fmean(r['peak'] for r in results) / 1024:.0f} KB peak")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("mode", choices=["functions", "sessions"])
+    parser.add_argument("--iterations", type=int, default=20, help="calls per operation (functions mode)")
+    parser.add_argument("--sessions", type=int, default=8, help="concurrent sessions (sessions mode)")
+    parser.add_argument("--turns", type=int, default=3, help="messages per session (sessions mode)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="AppTest timeout per script run (seconds)")
+    parser.add_argument("--first-token-ms", type=float, default=MockConfig.first_token_ms)
+    parser.add_argument("--token-ms", type=float, default=MockConfig.token_ms)
+    parser.add_argument("--prewarm", action="store_true", help="let the app pre-warm the starter replies")
+    args = parser.parse_args()
+
+    config = MockConfig(first_token_ms=args.first_token_ms, token_ms=args.token_ms)
+    server, base_url = start_mock_server(config)
+    configure_environment(base_url, args.prewarm)
+    try:
+        if args.mode == "functions":
+            bench_functions(args, config)
+        else:
+            bench_sessions(args)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Local stand-in for the OpenAI chat, speech and transcription endpoints.
+
+Point the app at it with OPENAI_BASE_URL=http://127.0.0.1:<port>/v1. Run standalone:
+
+    python benchmarks/mock_openai.py [--port 8765] [--first-token-ms 300] [--token-ms 15]
+"""
+import argparse
+import json
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+REPLY = (
+    "That sounds like something worth sitting with for a moment. When you notice that feeling, "
+    "what tends to be happening around you? Sometimes the routines that feel most automatic are "
+    "the ones that once mattered most. What would it look like to choose one of them again, on purpose?"
+)
+
+TRANSCRIPT = "I keep wondering whether the work I do every day actually means anything to me."
+
+# One silent MPEG-1 Layer III frame (128 kbps, 44.1 kHz): 417 bytes, about 26 ms of audio
+_MP3_FRAME = b"\xff\xfb\x90\x64" + bytes(413)
+
+
+@dataclass
+class MockConfig:
+    first_token_ms: float = 300.0  # Chat latency before the first streamed token (or the whole reply)
+    token_ms: float = 15.0  # Gap between streamed tokens
+    speech_ms_per_char: float = 2.0  # TTS latency grows with text length
+    speech_base_ms: float = 150.0
+    transcription_ms_per_kb: float = 2.0
+    transcription_base_ms: float = 200.0
+    reply: str = REPLY
+    transcript: str = TRANSCRIPT
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = MockConfig()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        path = self.path.split("?")[0]
+        if path.endswith("/chat/completions"):
+            self._chat(json.loads(body or b"{}"))
+        elif path.endswith("/audio/speech"):
+            self._speech(json.loads(body or b"{}"))
+        elif path.endswith("/audio/transcriptions"):
+            self._transcription(body)
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown endpoint {path}", "type": "invalid_request_error"}})
+
+    # Endpoints
+
+    def _chat(self, request):
+        config = self.config
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        words = config.reply.split(" ")
+        time.sleep(config.first_token_ms / 1000)
+
+        if not request.get("stream"):
+            time.sleep(config.token_ms * len(words) / 1000)
+            self._send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "mock"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": config.reply},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": len(words), "total_tokens": len(words)},
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for index, word in enumerate(words):
+            if index:
+                time.sleep(config.token_ms / 1000)
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": request.get("model", "mock"),
+                "choices": [{"index": 0, "delta": {"content": word if index == 0 else " " + word}, "finish_reason": None}],
+            }
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _speech(self, request):
+        config = self.config
+        text = request.get("input", "")
+        time.sleep((config.speech_base_ms + config.speech_ms_per_char * len(text)) / 1000)
+        # Roughly 15 characters of speech per second
+        frames = max(1, int(len(text) / 15 / 0.026))
+        audio = _MP3_FRAME * frames
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/mpeg")
+        self.send_header("Content-Length", str(len(audio)))
+        self.end_headers()
+        self.wfile.write(audio)
+
+    def _transcription(self, body: bytes):
+        config = self.config
+        time.sleep((config.transcription_base_ms + config.transcription_ms_per_kb * len(body) / 1024) / 1000)
+        self._send_json(200, {"text": config.transcript})
+
+    # Helpers
+
+    def _send_json(self, status: int, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+def start_mock_server(config: MockConfig = None, host: str = "127.0.0.1", port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """Serve the mock API on a background thread; returns the server and its /v1 base URL"""
+    handler = type("ConfiguredHandler", (MockOpenAIHandler,), {"config": config or MockConfig()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-openai", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--first-token-ms", type=float, default=MockConfig.first_token_ms)
+    parser.add_argument("--token-ms", type=float, default=MockConfig.token_ms)
+    parser.add_argument("--speech-base-ms", type=float, default=MockConfig.speech_base_ms)
+    parser.add_argument("--transcription-base-ms", type=float, default=MockConfig.transcription_base_ms)
+    args = parser.parse_args()
+
+    config = MockConfig(
+        first_token_ms=args.first_token_ms,
+        token_ms=args.token_ms,
+        speech_base_ms=args.speech_base_ms,
+        transcription_base_ms=args.transcription_base_ms,
+    )
+    server, url = start_mock_server(config, args.host, args.port)
+    print(f"Mock OpenAI API at {url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
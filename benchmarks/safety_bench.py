@@ -0,0 +1,118 @@
+"""Throughput and accuracy benchmark for the safety matcher.
+
+Run from the repository root:
+
+    python benchmarks/safety_bench.py [--phrases 500] [--transcript-kb 256]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from safety import SAFETY_KEYWORDS, SafetyMatcher  # noqa: E402
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "safety_corpus.jsonl")
+
+# The keyword list and substring check the app used before the compiled matcher
+LEGACY_KEYWORDS = [
+    'suicide', 'kill myself', 'end it all', 'want to die', 'hurt myself',
+    'self harm', 'cutting', 'overdose', 'jumping', 'hanging'
+]
+
+
+def legacy_matcher(keywords: List[str]) -> Callable[[str], bool]:
+    def matches(text: str) -> bool:
+        text_lower = text.lower()
+        return any(keyword in text_lower for keyword in keywords)
+    return matches
+
+
+def load_corpus(path: str = CORPUS_PATH) -> List[Dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def padded_phrases(base: List[str], total: int) -> List[str]:
+    """Grow a phrase list to `total` entries with phrases that never occur in the corpus"""
+    padding = [f"placeholder phrase {i} zq" for i in range(max(0, total - len(base)))]
+    return list(base) + padding
+
+
+def accuracy(matches: Callable[[str], bool], corpus: List[Dict]) -> Dict:
+    tp = fp = tn = fn = 0
+    for example in corpus:
+        predicted = matches(example["text"])
+        if example["concern"]:
+            tp += predicted
+            fn += not predicted
+        else:
+            fp += predicted
+            tn += not predicted
+    return {
+        "recall": tp / (tp + fn) if tp + fn else 0.0,
+        "precision": tp / (tp + fp) if tp + fp else 0.0,
+        "false_positive_rate": fp / (fp + tn) if fp + tn else 0.0,
+    }
+
+
+# Everyday reflection with none of the phrases' first words - what most messages look like
+EVERYDAY_TEXT = (
+    "Today I walked to the park after work and thought about the week. My sister called, we talked "
+    "about her garden and the trip we are planning for the summer. I still feel a little restless "
+    "at the office, though the morning coffee with my colleagues helps. Maybe this month I will "
+    "finally sign up for the pottery class I keep mentioning."
+)
+
+
+def throughput(matches: Callable[[str], bool], text: str, repeat: int) -> float:
+    """Megabytes of text scanned per second"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        matches(text)
+    elapsed = time.perf_counter() - started
+    return len(text.encode("utf-8")) * repeat / elapsed / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--phrases", type=int, default=500, help="phrase list size for the scaling run")
+    parser.add_argument("--transcript-kb", type=int, default=256, help="size of the long transcript")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    matcher = SafetyMatcher(SAFETY_KEYWORDS)
+    legacy = legacy_matcher(LEGACY_KEYWORDS)
+    # A long transcript that neither matcher flags, so both have to scan all of it
+    benign = " ".join(
+        example["text"] for example in corpus
+        if not example["concern"] and not matcher.matches(example["text"]) and not legacy(example["text"])
+    )
+    transcript = (benign + " ") * (args.transcript_kb * 1024 // (len(benign) + 1) + 1)
+    everyday = (EVERYDAY_TEXT + " ") * (args.transcript_kb * 1024 // (len(EVERYDAY_TEXT) + 1) + 1)
+
+    candidates = {
+        "legacy substring": (legacy, legacy_matcher(padded_phrases(LEGACY_KEYWORDS, args.phrases))),
+        "compiled matcher": (matcher.matches, SafetyMatcher(padded_phrases(SAFETY_KEYWORDS, args.phrases)).matches),
+    }
+
+    print(f"Corpus: {len(corpus)} labelled examples, transcript: {len(transcript) // 1024} KB\n")
+    # MB/s: benign text full of near-miss words (worst case); everyday: text without them
+    print(f"{'matcher':<18} {'recall':>7} {'precision':>10} {'FPR':>6} {'MB/s':>8} "
+          f"{'everyday':>9} {f'MB/s@{args.phrases}':>12}")
+    for name, (matches, scaled) in candidates.items():
+        scores = accuracy(matches, corpus)
+        print(
+            f"{name:<18} {scores['recall']:>7.2f} {scores['precision']:>10.2f} "
+            f"{scores['false_positive_rate']:>6.2f} {throughput(matches, transcript, args.repeat):>8.1f} "
+            f"{throughput(matches, everyday, args.repeat):>9.1f} "
+            f"{throughput(scaled, transcript, args.repeat):>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
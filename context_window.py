@@ -0,0 +1,196 @@
+import math
+import re
+import threading
+from concurrent.futures import Executor, Future
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import tiktoken
+except ImportError:  # Token counts fall back to a character-based estimate
+    tiktoken = None
+
+# Fields the chat API accepts on a message - everything else (timestamps etc.) stays local
+API_MESSAGE_FIELDS = ("role", "content")
+
+# Per-message framing tokens added by the chat format
+MESSAGE_OVERHEAD_TOKENS = 4
+
+FIRST_SENTENCE = re.compile(r'^(.+?[.!?…])(?:\s|$)', re.DOTALL)
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=4096)
+def count_tokens(text: str) -> int:
+    """Count tokens locally, estimating roughly four characters per token without tiktoken"""
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return math.ceil(len(text) / 4)
+
+
+def message_tokens(message: Dict) -> int:
+    """Tokens a single chat message costs in the prompt"""
+    return count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+
+def to_api_message(message: Dict) -> Dict:
+    """Strip a stored message down to the fields the chat API expects"""
+    return {field: message[field] for field in API_MESSAGE_FIELDS}
+
+
+def _key_point(message: Dict, max_chars: int = 200) -> Optional[str]:
+    """First sentence of a user turn, used as one line of the local digest"""
+    if message["role"] != "user":
+        return None
+    text = " ".join(message["content"].split())
+    if not text:
+        return None
+    match = FIRST_SENTENCE.match(text)
+    point = match.group(1) if match else text
+    if len(point) > max_chars:
+        point = point[:max_chars].rsplit(" ", 1)[0] + "…"
+    return f"- They said: {point}"
+
+
+class RollingSummary:
+    """Per-session summary of the turns that no longer fit in the context window"""
+
+    def __init__(self, max_digest_tokens: int = 300):
+        # A model-written summary is refreshed off the request path by fold(); turns evicted
+        # since the last fold are bridged by a cheap local digest so a request never waits
+        self.max_digest_tokens = max_digest_tokens
+        self.text = ""  # Model-written summary of history[:covered]
+        self.covered = 0
+        self._points: List[Tuple[int, str]] = []  # (message index, digest line) past `covered`
+        self._digest_covered = 0
+        self._pending: Optional[Future] = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Locks and futures are process-local; a restored summary simply has no fold in flight
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["_pending"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def to_record(self) -> Dict:
+        """Persistable form - the local digest is rebuilt on demand"""
+        with self._lock:
+            return {"text": self.text, "covered": self.covered}
+
+    @classmethod
+    def from_record(cls, record: Dict) -> "RollingSummary":
+        summary = cls()
+        summary.text = record.get("text", "")
+        summary.covered = summary._digest_covered = record.get("covered", 0)
+        return summary
+
+    @property
+    def start(self) -> int:
+        """Index of the first history message that is not summarized"""
+        with self._lock:
+            return max(self.covered, self._digest_covered)
+
+    def update(self, history: List[Dict], dropped: int) -> None:
+        """Add local digest lines for history[:dropped] that nothing covers yet"""
+        with self._lock:
+            first = max(self.covered, self._digest_covered)
+            if dropped <= first:
+                return
+            for index in range(first, dropped):
+                point = _key_point(history[index])
+                if point:
+                    self._points.append((index, point))
+            self._digest_covered = dropped
+            # Keep the most recent points within the digest's own budget
+            while self._points and sum(count_tokens(point) for _, point in self._points) > self.max_digest_tokens:
+                self._points.pop(0)
+
+    def render(self) -> str:
+        """Summary text to inject into the prompt"""
+        with self._lock:
+            parts = [self.text] if self.text else []
+            parts.extend(point for _, point in self._points)
+        return "\n".join(parts)
+
+    def fold(self, history: List[Dict], boundary: int, executor: Executor,
+             summarize: Callable[[str, List[Dict]], str]) -> bool:
+        """Summarize history[covered:boundary] into the running summary on a background worker"""
+        with self._lock:
+            if boundary <= self.covered or (self._pending is not None and not self._pending.done()):
+                return False
+            previous = self.text
+            turns = [to_api_message(message) for message in history[self.covered:boundary]]
+            self._pending = executor.submit(summarize, previous, turns)
+        self._pending.add_done_callback(lambda future: self._apply(future, boundary))
+        return True
+
+    def _apply(self, future: Future, boundary: int) -> None:
+        try:
+            text = future.result()
+        except Exception:
+            # Keep serving the local digest; the next fold retries these turns
+            return
+        if not text:
+            return
+        with self._lock:
+            if boundary <= self.covered:
+                return
+            self.text = text.strip()
+            self.covered = boundary
+            self._points = [(index, point) for index, point in self._points if index >= boundary]
+            self._digest_covered = max(self._digest_covered, boundary)
+
+
+def split_for_budget(history: List[Dict], start: int, budget: int) -> int:
+    """Index of the oldest message in history[start:] that still fits the budget, newest first"""
+    used = 0
+    first = len(history)
+    while first > start:
+        cost = message_tokens(history[first - 1])
+        if used + cost > budget:
+            break
+        used += cost
+        first -= 1
+    return first
+
+
+def build_context_messages(system_prompt: str, history: List[Dict], user_input: str,
+                           budget: int, summary: Optional[RollingSummary] = None) -> List[Dict]:
+    """Pack the most recent history into a token budget, summarizing whatever is left out"""
+    # Turns already folded into the summary are never sent verbatim again
+    start = summary.start if summary is not None else 0
+    first = split_for_budget(history, start, budget)
+
+    summary_text = ""
+    if summary is not None:
+        summary.update(history, first)
+        summary_text = summary.render()
+
+    # The summary goes after the fixed instructions so the prompt prefix stays identical between turns
+    if summary_text:
+        system_prompt = f"{system_prompt}\n\nWhat they have shared earlier in this conversation:\n{summary_text}"
+
+    messages = [{"role": "system", "content": system_prompt}]
+    messages.extend(to_api_message(message) for message in history[first:])
+    messages.append({"role": "user", "content": user_input})
+    return messages
+
+
+def prompt_tokens(messages: List[Dict]) -> int:
+    """Total prompt tokens for a list of chat messages"""
+    return sum(message_tokens(message) for message in messages)
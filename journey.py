@@ -0,0 +1,61 @@
+import datetime
+from typing import Dict, Optional
+
+from prompts import MONTHLY_PROMPTS
+
+JOURNEY_MONTHS = len(MONTHLY_PROMPTS)
+
+# Fields the engine keeps in the session record besides current_month and session_count
+JOURNEY_FIELDS = ("journey_started", "month_started", "month_session_start")
+
+
+class JourneyEngine:
+    """Decides which month of the journey a user is in from the dates and session counts in their record
+
+    A month is complete once enough days have passed since it started and the user has held
+    enough sessions in it, so neither time alone nor a burst of sessions skips a theme.
+    """
+
+    def __init__(self, days_per_month: int = 30, sessions_per_month: int = 4, months: int = JOURNEY_MONTHS):
+        self.days_per_month = days_per_month
+        self.sessions_per_month = sessions_per_month
+        self.months = months
+
+    def start(self, record: Dict, today: Optional[datetime.date] = None) -> Dict:
+        """Fill in the journey fields of a new (or pre-journey) record"""
+        today = today or datetime.date.today()
+        record.setdefault("current_month", 1)
+        record.setdefault("journey_started", today.isoformat())
+        record.setdefault("month_started", today.isoformat())
+        record.setdefault("month_session_start", record.get("session_count", 0))
+        return record
+
+    def advance(self, record: Dict, today: Optional[datetime.date] = None) -> bool:
+        """Move the record on to the next month if the current one is complete; True if it moved"""
+        today = today or datetime.date.today()
+        self.start(record, today)
+        month = record["current_month"]
+        if month >= self.months:
+            return False
+        days = (today - datetime.date.fromisoformat(record["month_started"])).days
+        sessions = record.get("session_count", 0) - record["month_session_start"]
+        if days < self.days_per_month or sessions < self.sessions_per_month:
+            return False
+        record["current_month"] = month + 1
+        record["month_started"] = today.isoformat()
+        record["month_session_start"] = record.get("session_count", 0)
+        return True
+
+    def progress(self, record: Dict, today: Optional[datetime.date] = None) -> Dict:
+        """Days and sessions still needed before the next month opens (zeros in the last month)"""
+        today = today or datetime.date.today()
+        self.start(record, today)
+        if record["current_month"] >= self.months:
+            return {"days_left": 0, "sessions_left": 0, "final_month": True}
+        days = (today - datetime.date.fromisoformat(record["month_started"])).days
+        sessions = record.get("session_count", 0) - record["month_session_start"]
+        return {
+            "days_left": max(0, self.days_per_month - days),
+            "sessions_left": max(0, self.sessions_per_month - sessions),
+            "final_month": False,
+        }
@@ -0,0 +1,254 @@
+"""Bulk export and import of journeys from the session store.
+
+    python journey_export.py export journeys.ndjson [--store sqlite --db existentia.db]
+    python journey_export.py export journeys.parquet
+    python journey_export.py import journeys.ndjson.zst --db restored.db
+
+The format follows the file extension: .ndjson/.jsonl (plain), .ndjson.gz, .ndjson.zst (needs
+zstandard) or .parquet (needs pyarrow). "--format compact" picks Parquet when pyarrow is installed,
+else zstd- or gzip-compressed NDJSON. Journeys stream through generators a batch at a time, so
+memory use does not grow with the number of journeys.
+"""
+import argparse
+import gzip
+import io
+import json
+import sys
+from typing import Dict, Iterable, Iterator, Optional
+
+from session_store import SessionStore, open_session_store
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Only needed for Parquet files
+    pa = pq = None
+
+try:
+    import zstandard
+except ImportError:  # Only needed for .zst files
+    zstandard = None
+
+FORMATS = ("ndjson", "ndjson.gz", "ndjson.zst", "parquet")
+
+# One Parquet row per journey; conversations flatten to a list of messages tagged with their conversation
+PARQUET_SCHEMA = pa.schema([
+    ("journey_id", pa.string()),
+    ("current_month", pa.int32()),
+    ("session_count", pa.int32()),
+    ("life_themes", pa.list_(pa.string())),
+    ("record", pa.string()),
+    ("messages", pa.list_(pa.struct([
+        ("conversation", pa.int32()),
+        ("position", pa.int32()),
+        ("role", pa.string()),
+        ("content", pa.string()),
+        ("timestamp", pa.string()),
+    ]))),
+]) if pa is not None else None
+
+
+def compact_format() -> str:
+    """Best compressed format available in this environment"""
+    if pa is not None:
+        return "parquet"
+    return "ndjson.zst" if zstandard is not None else "ndjson.gz"
+
+
+def format_for_path(path: str) -> str:
+    lowered = path.lower()
+    if lowered.endswith(".parquet"):
+        return "parquet"
+    if lowered.endswith(".zst"):
+        return "ndjson.zst"
+    if lowered.endswith(".gz"):
+        return "ndjson.gz"
+    return "ndjson"
+
+
+# Pipeline stages
+
+def iter_documents(store: SessionStore, batch_size: int = 500) -> Iterator[Dict]:
+    """One self-contained document per journey: its record plus every conversation's messages"""
+    # iter_journeys waits for queued writes once up front; the per-journey reads don't wait again
+    for journey_id, record in store.iter_journeys(batch_size):
+        yield {
+            "journey_id": journey_id,
+            "record": record,
+            "conversations": [
+                {"conversation": conversation, "messages": messages}
+                for conversation, messages in store.iter_conversations(journey_id, flush=False)
+            ],
+        }
+
+
+def import_documents(store: SessionStore, documents: Iterable[Dict], flush_every: int = 1000) -> int:
+    """Write journey documents into the store; returns how many were imported"""
+    count = 0
+    for document in documents:
+        journey_id = document["journey_id"]
+        store.save_session(journey_id, document["record"])
+        for conversation in document["conversations"]:
+            for position, message in enumerate(conversation["messages"]):
+                store.append_message(journey_id, conversation["conversation"], position, message)
+        count += 1
+        # Writes are queued; waiting now and then keeps the queue (and memory) bounded
+        if count % flush_every == 0:
+            store.flush()
+    store.flush()
+    return count
+
+
+# NDJSON
+
+def open_text(path: str, mode: str, fmt: str):
+    if fmt == "ndjson.gz":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    if fmt == "ndjson.zst":
+        if zstandard is None:
+            raise RuntimeError("zstd-compressed files need the 'zstandard' package installed")
+        return zstandard.open(path, mode + "t", encoding="utf-8")
+    if path == "-":
+        return io.TextIOWrapper(sys.stdout.buffer if mode == "w" else sys.stdin.buffer, encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def write_ndjson(documents: Iterable[Dict], stream) -> int:
+    count = 0
+    for document in documents:
+        stream.write(json.dumps(document, ensure_ascii=False, separators=(",", ":")) + "\n")
+        count += 1
+    return count
+
+
+def read_ndjson(stream) -> Iterator[Dict]:
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+# Parquet
+
+def to_parquet_row(document: Dict) -> Dict:
+    record = document["record"]
+    return {
+        "journey_id": document["journey_id"],
+        "current_month": record.get("current_month"),
+        "session_count": record.get("session_count"),
+        "life_themes": record.get("life_themes", []),
+        "record": json.dumps(record, ensure_ascii=False),
+        "messages": [
+            {
+                "conversation": conversation["conversation"],
+                "position": position,
+                "role": message["role"],
+                "content": message["content"],
+                "timestamp": message.get("timestamp"),
+            }
+            for conversation in document["conversations"]
+            for position, message in enumerate(conversation["messages"])
+        ],
+    }
+
+
+def from_parquet_row(row: Dict) -> Dict:
+    conversations: Dict[int, list] = {}
+    for message in row["messages"]:
+        conversations.setdefault(message["conversation"], []).append(
+            {"role": message["role"], "content": message["content"], "timestamp": message["timestamp"]}
+        )
+    return {
+        "journey_id": row["journey_id"],
+        "record": json.loads(row["record"]),
+        "conversations": [
+            {"conversation": conversation, "messages": messages}
+            for conversation, messages in sorted(conversations.items())
+        ],
+    }
+
+
+def write_parquet(documents: Iterable[Dict], path: str, row_group_size: int = 500) -> int:
+    if pa is None:
+        raise RuntimeError("Parquet files need the 'pyarrow' package installed")
+    count = 0
+    rows = []
+    with pq.ParquetWriter(path, PARQUET_SCHEMA, compression="zstd") as writer:
+        for document in documents:
+            rows.append(to_parquet_row(document))
+            if len(rows) >= row_group_size:
+                writer.write_table(pa.Table.from_pylist(rows, schema=PARQUET_SCHEMA))
+                count += len(rows)
+                rows = []
+        if rows:
+            writer.write_table(pa.Table.from_pylist(rows, schema=PARQUET_SCHEMA))
+            count += len(rows)
+    return count
+
+
+def read_parquet(path: str, batch_size: int = 500) -> Iterator[Dict]:
+    if pa is None:
+        raise RuntimeError("Parquet files need the 'pyarrow' package installed")
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+        for row in batch.to_pylist():
+            yield from_parquet_row(row)
+
+
+# Entry points
+
+def export_journeys(store: SessionStore, path: str, fmt: Optional[str] = None, batch_size: int = 500) -> int:
+    """Export every journey to `path`; returns how many were written"""
+    fmt = fmt or format_for_path(path)
+    documents = iter_documents(store, batch_size)
+    if fmt == "parquet":
+        return write_parquet(documents, path, batch_size)
+    with open_text(path, "w", fmt) as stream:
+        return write_ndjson(documents, stream)
+
+
+def import_journeys(store: SessionStore, path: str, fmt: Optional[str] = None, batch_size: int = 500) -> int:
+    """Import every journey in `path`; records and messages with the same id and position are overwritten"""
+    return import_documents(store, read_documents(path, fmt, batch_size))
+
+
+def read_documents(path: str, fmt: Optional[str] = None, batch_size: int = 500) -> Iterator[Dict]:
+    """Stream the journey documents in an exported file"""
+    fmt = fmt or format_for_path(path)
+    if fmt == "parquet":
+        yield from read_parquet(path, batch_size)
+        return
+    with open_text(path, "r", fmt) as stream:
+        yield from read_ndjson(stream)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("path", help="file to write or read ('-' for NDJSON on stdout/stdin)")
+    parser.add_argument("--format", choices=FORMATS + ("compact",), help="default: from the file extension")
+    parser.add_argument("--store", default="sqlite", choices=["sqlite", "redis"])
+    parser.add_argument("--db", default="existentia.db", help="SQLite database path")
+    parser.add_argument("--url", help="Redis URL for --store redis")
+    parser.add_argument("--batch-size", type=int, default=500, help="journeys read or written per batch")
+    args = parser.parse_args()
+
+    fmt = args.format
+    if fmt == "compact":
+        if args.command == "export":
+            fmt = compact_format()
+            # Keep the extension truthful so a later import detects the format on its own
+            if format_for_path(args.path) != fmt:
+                args.path = f"{args.path}.{fmt.rsplit('.', 1)[-1]}"
+        else:
+            # The file was written by whatever the exporting machine had installed, not this one
+            fmt = format_for_path(args.path)
+    store = open_session_store(backend=args.store, path=args.db, url=args.url)
+    if args.command == "export":
+        count = export_journeys(store, args.path, fmt, args.batch_size)
+        print(f"Exported {count} journeys to {args.path}", file=sys.stderr)
+    else:
+        count = import_journeys(store, args.path, fmt, args.batch_size)
+        print(f"Imported {count} journeys from {args.path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import importlib.util
+import io
+import queue
+import random
+import threading
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional, TypeVar
+
+import httpx
+from openai import APIConnectionError, AsyncOpenAI, InternalServerError, RateLimitError
+
+T = TypeVar("T")
+
+# Upstream failures that are worth another attempt (APITimeoutError is an APIConnectionError)
+RETRYABLE_ERRORS = (APIConnectionError, RateLimitError, InternalServerError)
+
+_DONE = object()
+
+
+class _StreamFailure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class OpenAIGateway:
+    """Process-wide async OpenAI client with one pooled transport, bounded concurrency and retries"""
+
+    def __init__(self, api_key: str, base_url: Optional[str] = None, max_concurrency: int = 32,
+                 max_connections: int = 64, timeout: float = 30.0, max_retries: int = 3,
+                 backoff_base: float = 0.5, backoff_max: float = 8.0):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="openai-gateway", daemon=True)
+        self._thread.start()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+        # One transport for every session: connections and TLS sessions are reused (HTTP/2 when h2 is installed)
+        http_client = httpx.AsyncClient(
+            http2=importlib.util.find_spec("h2") is not None,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=timeout
+        )
+        # Retries are handled here so a backing-off call does not hold a concurrency slot
+        self._client = AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=http_client, max_retries=0)
+
+    # Blocking facade - script threads wait on a future while the I/O runs on the gateway loop
+
+    def run(self, coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+        """Run a coroutine on the gateway loop and wait for its result"""
+        return self._submit(coro).result(timeout)
+
+    def _submit(self, coro: Awaitable[T]) -> "concurrent.futures.Future[T]":
+        # The loop thread has its own context; carry the caller's over (the trace's turn id, for one)
+        context = contextvars.copy_context()
+
+        async def in_caller_context():
+            for variable, value in context.items():
+                variable.set(value)
+            return await coro
+
+        return asyncio.run_coroutine_threadsafe(in_caller_context(), self._loop)
+
+    def chat(self, messages: List[Dict], timeout: Optional[float] = None, **params) -> str:
+        """Blocking chat completion returning the reply text"""
+        return self.run(self.achat(messages, timeout=timeout, **params))
+
+    def stream_chat(self, messages: List[Dict], timeout: Optional[float] = None, **params) -> Iterator[str]:
+        """Blocking iterator over the text deltas of a streaming chat completion"""
+        deltas: "queue.Queue" = queue.Queue()
+
+        async def pump():
+            try:
+                async for delta in self.astream_chat(messages, timeout=timeout, **params):
+                    deltas.put(delta)
+            except BaseException as e:
+                deltas.put(_StreamFailure(e))
+            finally:
+                deltas.put(_DONE)
+
+        future = self._submit(pump())
+        try:
+            while True:
+                item = deltas.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, _StreamFailure):
+                    raise item.error
+                yield item
+        finally:
+            # The consumer stopped early - release the upstream stream and its slot
+            if not future.done():
+                future.cancel()
+
+    def speech(self, text: str, timeout: Optional[float] = None, **params) -> bytes:
+        """Blocking speech synthesis returning the encoded audio"""
+        return self.run(self.aspeech(text, timeout=timeout, **params))
+
+    def transcribe(self, audio_data: bytes, filename: str = "audio.wav",
+                   timeout: Optional[float] = None, **params) -> str:
+        """Blocking transcription returning plain text"""
+        return self.run(self.atranscribe(audio_data, filename=filename, timeout=timeout, **params))
+
+    def close(self) -> None:
+        """Close the transport and stop the loop thread"""
+        self.run(self._client.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    # Async API
+
+    async def achat(self, messages: List[Dict], timeout: Optional[float] = None, **params) -> str:
+        response = await self._call(lambda: self._client.chat.completions.create(
+            messages=messages, timeout=timeout or self.timeout, **params
+        ))
+        return response.choices[0].message.content or ""
+
+    async def astream_chat(self, messages: List[Dict], timeout: Optional[float] = None, **params):
+        # A stream holds its slot until it is fully consumed; only opening it is retried,
+        # since replaying after deltas have been delivered would duplicate text
+        async with self._semaphore:
+            stream = await self._retry(lambda: self._client.chat.completions.create(
+                messages=messages, stream=True, timeout=timeout or self.timeout, **params
+            ))
+            try:
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        yield delta
+            finally:
+                await stream.close()
+
+    async def aspeech(self, text: str, timeout: Optional[float] = None, **params) -> bytes:
+        response = await self._call(lambda: self._client.audio.speech.create(
+            input=text, timeout=timeout or self.timeout, **params
+        ))
+        return response.content
+
+    async def atranscribe(self, audio_data: bytes, filename: str = "audio.wav",
+                          timeout: Optional[float] = None, **params) -> str:
+        def make_call():
+            # A fresh file object per attempt, since a failed upload may have consumed it
+            audio_file = io.BytesIO(audio_data)
+            audio_file.name = filename
+            return self._client.audio.transcriptions.create(
+                file=audio_file, response_format="text", timeout=timeout or self.timeout, **params
+            )
+        return await self._call(make_call)
+
+    # Concurrency limiting and retries
+
+    async def _call(self, make_call: Callable[[], Awaitable[T]]) -> T:
+        """Run one upstream call under the concurrency limit, retrying transient failures"""
+        return await self._retry(make_call, limit=True)
+
+    async def _retry(self, make_call: Callable[[], Awaitable[T]], limit: bool = False) -> T:
+        attempt = 0
+        while True:
+            try:
+                if limit:
+                    async with self._semaphore:
+                        return await make_call()
+                return await make_call()
+            except RETRYABLE_ERRORS as e:
+                if attempt >= self.max_retries:
+                    raise
+                await asyncio.sleep(self._backoff_delay(attempt, e))
+                attempt += 1
+
+    def _backoff_delay(self, attempt: int, error: Exception) -> float:
+        # Honour an explicit Retry-After from the upstream when it sends one
+        response = getattr(error, "response", None)
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+            try:
+                if retry_after is not None:
+                    return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        delay = min(self.backoff_base * (2 ** attempt), self.backoff_max)
+        return delay * (0.5 + random.random())
@@ -0,0 +1,105 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, TimeoutError
+from typing import Any, Callable, Dict, Optional
+
+
+class _Prefetch:
+    __slots__ = ("future", "expires_at", "hits")
+
+    def __init__(self, future: Future, expires_at: float):
+        self.future = future
+        self.expires_at = expires_at
+        self.hits = 0
+
+
+class PrefetchStore:
+    """Speculative results computed ahead of a likely request, kept for a limited time
+
+    Results live only here until they are claimed, so an unused prefetch is simply dropped when
+    its TTL runs out. Counters show how much of the speculative work was actually used.
+    """
+
+    def __init__(self, ttl_seconds: float = 600, max_entries: int = 256, clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Prefetch]" = OrderedDict()
+        self.stats = {"prefetched": 0, "hits": 0, "misses": 0, "wasted": 0, "failed": 0}
+
+    def schedule(self, key: str, executor: Executor, work: Callable[[], Any]) -> bool:
+        """Start `work` in the background unless a live prefetch for this key exists; True if started"""
+        with self._lock:
+            self._expire()
+            if key in self._entries:
+                return False
+            entry = _Prefetch(executor.submit(work), self._clock() + self.ttl_seconds)
+            self._entries[key] = entry
+            self.stats["prefetched"] += 1
+            while len(self._entries) > self.max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._retire(evicted)
+        return True
+
+    def claim(self, key: str, wait: float = 0.0) -> Optional[Any]:
+        """The prefetched result for this key, waiting up to `wait` seconds if it is still running"""
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(key)
+        if entry is None:
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+        try:
+            result = entry.future.result(timeout=wait)
+        except TimeoutError:
+            result = None
+        except Exception:
+            # A failed prefetch is forgotten; the caller does the work itself
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+                    self.stats["failed"] += 1
+            result = None
+        with self._lock:
+            if result is None:
+                self.stats["misses"] += 1
+            else:
+                entry.hits += 1
+                self.stats["hits"] += 1
+        return result
+
+    def expire(self) -> None:
+        with self._lock:
+            self._expire()
+
+    def snapshot_stats(self) -> Dict:
+        """Counters plus live entries and the claim hit rate"""
+        with self._lock:
+            self._expire()
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+            used = sum(1 for entry in self._entries.values() if entry.hits)
+        claims = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / claims if claims else 0.0
+        stats["used_entries"] = used
+        return stats
+
+    # Caller holds the lock
+
+    def _expire(self) -> None:
+        now = self._clock()
+        for key in [key for key, entry in self._entries.items() if entry.expires_at <= now]:
+            self._retire(self._entries.pop(key))
+
+    def _retire(self, entry: _Prefetch) -> None:
+        if entry.hits or entry.future.cancel():
+            # Used, or dropped before it started - nothing was spent for nothing
+            return
+        if entry.future.done() and entry.future.exception() is not None:
+            self.stats["failed"] += 1
+        else:
+            # Finished unused, or still running and its result will not be kept
+            self.stats["wasted"] += 1
@@ -0,0 +1,111 @@
+# Monthly prompt frameworks
+MONTHLY_PROMPTS = {
+    1: {
+        "theme": "Orientation & Life Audit",
+        "description": "Understanding where you are and what feels 'off'",
+        "sample_prompts": [
+            "What part of your daily routine feels most automatic or disconnected?",
+            "If you could change one thing about how you spend your time, what would it be?",
+            "What used to bring you joy that doesn't anymore?",
+            "When did you last feel truly engaged with what you were doing?"
+        ],
+        "focus_areas": ["current_state", "disconnection", "routine_audit", "engagement_patterns"]
+    },
+    2: {
+        "theme": "Mortality & Time Awareness",
+        "description": "Confronting the finite nature of life and time",
+        "sample_prompts": [
+            "Imagine your 75-year-old self looking back. What do they wish you had done differently?",
+            "What would you regret not doing if you only had five years left?",
+            "How do you want to be remembered by the people closest to you?",
+            "What legacy do you want to leave behind?"
+        ],
+        "focus_areas": ["future_regrets", "legacy", "time_consciousness", "mortality_reflection"]
+    },
+    3: {
+        "theme": "Freedom & Personal Agency",
+        "description": "Exploring choice, control, and authentic decision-making",
+        "sample_prompts": [
+            "What choices do you make on autopilot every day?",
+            "Where in your life do you feel most free? Least free?",
+            "What would you do if you weren't afraid of judgment?",
+            "What responsibilities could you let go of without real consequence?"
+        ],
+        "focus_areas": ["autonomy", "fear_patterns", "authentic_choices", "responsibility_audit"]
+    },
+    4: {
+        "theme": "Connection & Authentic Relationships",
+        "description": "Examining isolation, intimacy, and being truly known",
+        "sample_prompts": [
+            "Who really knows the real you? What parts do you hide?",
+            "What would deeper connection look like in your relationships?",
+            "When do you feel most lonely, even when surrounded by people?",
+            "What prevents you from being more vulnerable with others?"
+        ],
+        "focus_areas": ["intimacy", "vulnerability", "loneliness", "authentic_connection"]
+    },
+    5: {
+        "theme": "Vision & Creative Imagination",
+        "description": "Reconnecting with dreams, possibilities, and creative potential",
+        "sample_prompts": [
+            "Design a perfect day that's entirely yours. What does it feel like?",
+            "What dreams did you abandon that still whisper to you?",
+            "If resources weren't a constraint, what would you create or explore?",
+            "What would 'enough' look like in your life?"
+        ],
+        "focus_areas": ["ideal_vision", "abandoned_dreams", "creative_potential", "sufficiency"]
+    },
+    6: {
+        "theme": "Commitment & Life Integration",
+        "description": "Aligning values with actions and creating sustainable change",
+        "sample_prompts": [
+            "What values feel worth protecting for the rest of your life?",
+            "How can you honor what you've discovered about yourself?",
+            "What small change could you make that would have the biggest impact?",
+            "How will you remember these insights when life gets busy again?"
+        ],
+        "focus_areas": ["core_values", "sustainable_change", "integration", "commitment"]
+    }
+}
+
+# Instructions shared by every month. They come first and never vary, so every request starts
+# with the same bytes and the upstream prompt cache can reuse them across months and sessions.
+SYSTEM_PROMPT_PREFIX = """You are an empathetic AI companion helping someone navigate existential questions and find meaning. You are NOT a therapist.
+
+Your approach:
+- Ask thoughtful, deeper questions that invite reflection
+- Be warm but not overly enthusiastic
+- Avoid therapy language or clinical terms
+- Help users explore their own insights rather than giving advice
+- Focus on the current month's theme when relevant
+- Keep responses conversational and human-like
+- If they seem stuck, offer a gentle prompt or question
+- Acknowledge their thoughts before asking new questions
+
+Remember: You're a supportive companion for self-reflection, not a counselor or life coach.
+
+The journey runs for six months, one theme each:
+""" + "\n".join(
+    f"{month}. {info['theme']} - {info['description']}" for month, info in sorted(MONTHLY_PROMPTS.items())
+)
+
+# Only this part changes from month to month
+MONTH_FOCUS_TEMPLATE = """
+
+Current focus (month {month}): {theme} - {description}"""
+
+
+def render_system_prompt(month: int) -> str:
+    month_info = MONTHLY_PROMPTS[month]
+    return SYSTEM_PROMPT_PREFIX + MONTH_FOCUS_TEMPLATE.format(
+        month=month, theme=month_info['theme'], description=month_info['description']
+    )
+
+
+# Compiled once at import and shared by every session
+SYSTEM_PROMPTS = {month: render_system_prompt(month) for month in MONTHLY_PROMPTS}
+
+
+def build_system_prompt(month: int) -> str:
+    """Precompiled system prompt for a month's focus"""
+    return SYSTEM_PROMPTS.get(month, SYSTEM_PROMPTS[1])
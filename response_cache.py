@@ -0,0 +1,168 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Replies are only reused for a conversation's opening message - later turns depend on what came before
+MAX_CACHEABLE_HISTORY = 0
+
+EMBEDDING_DIMENSIONS = 512
+
+_NON_WORD = re.compile(r"[^\w\s']+")
+
+
+def normalize_prompt(text: str) -> str:
+    """Case-, punctuation- and whitespace-insensitive form of a prompt"""
+    return " ".join(_NON_WORD.sub(" ", text.lower().replace("’", "'")).split())
+
+
+def embed(text: str, dimensions: int = EMBEDDING_DIMENSIONS) -> np.ndarray:
+    """Local embedding: hashed word and character-trigram counts, L2-normalized"""
+    vector = np.zeros(dimensions, dtype=np.float32)
+    words = text.split()
+    padded = f" {text} "
+    features = words + [padded[i:i + 3] for i in range(len(padded) - 2)]
+    for feature in features:
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        vector[int.from_bytes(digest[:4], "little") % dimensions] += 1.0 if digest[4] & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class ResponseCache:
+    """Replies to opening prompts keyed on (month, normalized prompt, short history), shared by all sessions"""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 24 * 3600,
+                 similarity_threshold: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        # similarity_threshold=None disables near-duplicate matching; only exact prompts hit
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        # key -> (scope, expires_at, reply, embedding)
+        self._entries: "OrderedDict[str, Tuple[str, float, str, Optional[np.ndarray]]]" = OrderedDict()
+        self._inflight: Dict[str, threading.Event] = {}
+
+        self.stats = {
+            "exact_hits": 0,
+            "similar_hits": 0,
+            "misses": 0,
+            "expirations": 0,
+            "evictions": 0,
+        }
+
+    @staticmethod
+    def scope(month: int, history: List[Dict], variant: str = "") -> Optional[str]:
+        """Everything besides the prompt that shapes the reply, or None if it is too long to cache"""
+        if len(history) > MAX_CACHEABLE_HISTORY:
+            return None
+        turns = "|".join(f"{message['role']}:{normalize_prompt(message['content'])}" for message in history)
+        return hashlib.sha256(f"{variant}|{month}|{turns}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def make_key(scope: str, prompt: str) -> str:
+        return hashlib.sha256(f"{scope}|{normalize_prompt(prompt)}".encode("utf-8")).hexdigest()
+
+    def get(self, scope: Optional[str], prompt: str) -> Optional[str]:
+        """Cached reply for this prompt in this scope, matching near-duplicates when enabled"""
+        if scope is None:
+            return None
+        key = self.make_key(scope, prompt)
+        vector = embed(normalize_prompt(prompt)) if self.similarity_threshold is not None else None
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(key)
+                    self.stats["exact_hits"] += 1
+                    return entry[2]
+                del self._entries[key]
+                self.stats["expirations"] += 1
+
+            if vector is not None:
+                reply = self._similar(scope, vector, now)
+                if reply is not None:
+                    self.stats["similar_hits"] += 1
+                    return reply
+
+            self.stats["misses"] += 1
+            return None
+
+    def peek(self, scope: Optional[str], prompt: str) -> Optional[str]:
+        """Exact-match lookup that leaves the hit/miss counters and LRU order alone"""
+        if scope is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(self.make_key(scope, prompt))
+            return entry[2] if entry is not None and entry[1] > self._clock() else None
+
+    def put(self, scope: Optional[str], prompt: str, reply: str) -> None:
+        """Store a reply; replies outside a cacheable scope are ignored"""
+        if scope is None or not reply:
+            return
+        vector = embed(normalize_prompt(prompt)) if self.similarity_threshold is not None else None
+        with self._lock:
+            key = self.make_key(scope, prompt)
+            self._entries[key] = (scope, self._clock() + self.ttl_seconds, reply, vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def get_or_create(self, scope: Optional[str], prompt: str, generate: Callable[[], Optional[str]]) -> Optional[str]:
+        """Return the cached reply or generate it once, even if several sessions ask at the same time"""
+        if scope is None:
+            return generate()
+        reply = self.get(scope, prompt)
+        if reply is not None:
+            return reply
+
+        key = self.make_key(scope, prompt)
+        with self._lock:
+            pending = self._inflight.get(key)
+            owner = pending is None
+            if owner:
+                pending = threading.Event()
+                self._inflight[key] = pending
+
+        if not owner:
+            pending.wait()
+            return self.get(scope, prompt)
+
+        try:
+            reply = generate()
+            if reply:
+                self.put(scope, prompt, reply)
+            return reply
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            pending.set()
+
+    def snapshot_stats(self) -> Dict:
+        """Return counters plus the current entry count"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["exact_hits"] + stats["similar_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["exact_hits"] + stats["similar_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    # Caller holds the lock
+
+    def _similar(self, scope: str, vector: np.ndarray, now: float) -> Optional[str]:
+        best_score, best_reply = -1.0, None
+        for entry_scope, expires_at, reply, entry_vector in self._entries.values():
+            if entry_scope != scope or entry_vector is None or expires_at <= now:
+                continue
+            score = float(np.dot(vector, entry_vector))
+            if score > best_score:
+                best_score, best_reply = score, reply
+        return best_reply if best_score >= self.similarity_threshold else None
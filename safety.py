@@ -0,0 +1,125 @@
+import re
+from typing import Dict, Iterable, List, Optional
+
+# Safety phrases for risk detection. Plain phrases: matching is case-insensitive, on whole
+# words, and treats spaces and hyphens alike. The bare verbs ("cutting", "hanging", "jumping")
+# stay in - a missed crisis costs far more than a false alarm - and BENIGN_PHRASES narrows them.
+SAFETY_KEYWORDS = [
+    'suicide', 'suicides', 'suicidal', 'kill myself', 'killing myself', 'end it all', 'end my life',
+    'want to die', 'wanna die', 'better off dead', 'hurt myself', 'hurting myself',
+    'self harm', 'self harming', 'cutting', 'cut myself', 'overdose', 'overdosed', 'overdoses',
+    'overdosing', 'jumping', 'hanging', 'hang myself', 'take my own life', 'no reason to live'
+]
+
+# Words that, directly before a flat denial, cancel it ("I'm not suicidal")
+NEGATION_CUES = [
+    'not', 'never', "isn't", "wasn't", "aren't"
+]
+
+# The only phrases a negation cue may cancel: single-word states, where "not X" is a plain denial.
+# Anything longer ("not sure I want to die", "why not just end it all") is always flagged.
+NEGATABLE_PHRASES = ['suicidal']
+
+# Figures of speech that contain a phrase but are not a concern. Each one closes the phrase
+# completely (a fixed noun or idiom, or the word that ends it, as in "hanging out with"), so
+# no continuation can turn it back into a concern - open verb phrases ("jumping at", "hanging
+# up") are never excluded, since "jumping at the station" or "hanging up a rope" must be flagged.
+BENIGN_PHRASES = [
+    'suicide squad', 'suicide doors', 'suicide sprints',
+    'killing myself laughing', 'kill myself laughing',
+    'cutting the grass', 'cutting the lawn', 'cutting back on', 'cutting corners', 'cutting edge',
+    'cutting board',
+    'hanging out with', 'hanging baskets',
+    'jumping jacks', 'jumping rope', 'jumping to conclusions'
+]
+
+
+def _phrase_tokens(phrase: str) -> List[Optional[str]]:
+    # Characters of the phrase, with None standing for any run of spaces/hyphens between words
+    tokens = []
+    for index, word in enumerate(re.split(r'[\s-]+', phrase.strip().lower())):
+        if index:
+            tokens.append(None)
+        tokens.extend(word)
+    return tokens
+
+
+def _trie_pattern(phrases: Iterable[str]) -> str:
+    """Compile phrases into one prefix-trie regex so matching cost doesn't grow with the list"""
+    root: Dict = {}
+    for phrase in phrases:
+        node = root
+        for token in _phrase_tokens(phrase):
+            node = node.setdefault(token, {})
+        node[""] = {}
+
+    def render(node: Dict) -> str:
+        branches = [
+            (r'[\s-]+' if token is None else re.escape(token)) + render(child)
+            for token, child in sorted(node.items(), key=lambda item: (item[0] is None, item[0] or ""))
+            if token != ""
+        ]
+        if not branches:
+            return ""
+        ends_here = "" in node
+        if len(branches) == 1 and not ends_here:
+            return branches[0]
+        # A phrase ending here makes the rest optional; being greedy, the longest phrase wins
+        return "(?:" + "|".join(branches) + ")" + ("?" if ends_here else "")
+
+    return render(root)
+
+
+class SafetyMatcher:
+    """Single-pass matcher for safety phrases with word boundaries and narrow denial handling"""
+
+    def __init__(self, phrases: Iterable[str], negation_cues: Iterable[str] = NEGATION_CUES,
+                 benign_phrases: Iterable[str] = BENIGN_PHRASES,
+                 negatable_phrases: Iterable[str] = NEGATABLE_PHRASES):
+        phrases = list(phrases)
+        # Benign phrases are part of the same trie: being longer they win at a position,
+        # and a benign match is simply skipped
+        self._benign = {_normalize(phrase) for phrase in benign_phrases}
+        self._negatable = {_normalize(phrase) for phrase in negatable_phrases}
+        self._pattern = re.compile(
+            rf"(?<![\w'])(?:{_trie_pattern(phrases + list(self._benign))})(?![\w'])"
+        )
+        # A negation cue immediately before the phrase, separated by whitespace only
+        cues = '|'.join(re.escape(cue) for cue in sorted(negation_cues, key=len, reverse=True))
+        self._negation = re.compile(rf"(?<![\w'])(?:{cues})\s+$")
+        # Cheap substring prefilter: text without any phrase's first word can't match, and most
+        # messages contain none, so they cost one C-level scan per anchor instead of a regex pass
+        first_words = {_normalize(phrase).split(" ")[0] for phrase in phrases}
+        # "cut" already covers "cutting", so only the shortest anchors are scanned for
+        self._anchors = sorted(
+            word for word in first_words if not any(other != word and other in word for other in first_words)
+        )
+
+    def find(self, text: str) -> List[str]:
+        """Return every concerning phrase found in the text, in order"""
+        return [match.group(0) for match in self._iter_concerns(text)]
+
+    def matches(self, text: str) -> bool:
+        """Whether the text contains any concerning phrase"""
+        return next(self._iter_concerns(text), None) is not None
+
+    def _iter_concerns(self, text: str):
+        lowered = text.lower()
+        if not any(anchor in lowered for anchor in self._anchors):
+            return
+        lowered = lowered.replace("’", "'")
+        for match in self._pattern.finditer(lowered):
+            phrase = _normalize(match.group(0))
+            if phrase in self._benign:
+                continue
+            if phrase in self._negatable and self._negation.search(lowered, max(0, match.start() - 16), match.start()):
+                continue
+            yield match
+
+
+def _normalize(phrase: str) -> str:
+    return " ".join(re.split(r'[\s-]+', phrase.strip().lower()))
+
+
+# Built once at import and shared by every session
+SAFETY_MATCHER = SafetyMatcher(SAFETY_KEYWORDS)
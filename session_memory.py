@@ -0,0 +1,227 @@
+import datetime
+import logging
+import sys
+import threading
+import time
+import types
+import weakref
+from typing import Callable, Dict, List, Optional
+
+# Objects the size estimate never walks into: shared or not owned by the session
+_OPAQUE_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType,
+                 threading.Thread, type(threading.Lock()), type(threading.RLock()), threading.Event,
+                 threading.Condition)
+
+logger = logging.getLogger(__name__)
+
+
+class MessageRecord:
+    """Compact conversation message: no per-instance dict, interned role, epoch-second timestamp
+
+    Reads like the message dicts it replaces (message["role"], .get("timestamp"), dict(message)),
+    so everything that consumes history keeps working unchanged.
+    """
+
+    __slots__ = ("role", "content", "created")
+    _FIELDS = ("role", "content", "timestamp")
+
+    def __init__(self, role: str, content: str, created: Optional[int] = None):
+        self.role = sys.intern(role)
+        self.content = content
+        self.created = int(time.time()) if created is None else created
+
+    @classmethod
+    def from_message(cls, message) -> "MessageRecord":
+        if isinstance(message, cls):
+            return message
+        created = None
+        timestamp = message.get("timestamp")
+        if timestamp:
+            try:
+                created = int(datetime.datetime.fromisoformat(timestamp).timestamp())
+            except ValueError:
+                pass
+        return cls(message["role"], message["content"], created)
+
+    @property
+    def timestamp(self) -> str:
+        return datetime.datetime.fromtimestamp(self.created).isoformat()
+
+    def __getitem__(self, key: str):
+        if key not in self._FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key) -> bool:
+        return key in self._FIELDS
+
+    def get(self, key: str, default=None):
+        return self[key] if key in self._FIELDS else default
+
+    def keys(self):
+        return self._FIELDS
+
+    def __repr__(self) -> str:
+        return f"MessageRecord({self.role!r}, {self.content[:40]!r}, {self.created})"
+
+
+def compact_history(history: List) -> List:
+    """Convert loaded message dicts to compact records"""
+    return [MessageRecord.from_message(message) if message is not None else None for message in history]
+
+
+def spill_history(history: List, upto: int, flush: Optional[Callable[[], None]] = None) -> int:
+    """Release messages before `upto` from memory; returns the bytes released
+
+    `flush` runs once before the first release, so nothing leaves memory before the store has it.
+    """
+    released = 0
+    for index in range(min(upto, len(history))):
+        if history[index] is not None:
+            if flush is not None:
+                flush()
+                flush = None
+            released += estimate_bytes(history[index])
+            history[index] = None
+    return released
+
+
+def ensure_resident(history: List, start: int, load: Callable[[int, int], List[Dict]]) -> int:
+    """Reload spilled messages in history[start:]; `load(before, count)` returns the `count` messages before `before`
+
+    Returns the bytes loaded.
+    """
+    start = max(0, start)
+    missing = [index for index in range(start, len(history)) if history[index] is None]
+    if not missing:
+        return 0
+    # Spilled messages form a prefix, so a single range read fills them all
+    first, last = missing[0], missing[-1]
+    loaded = load(last + 1, last + 1 - first)
+    # Align from the end: if the store is missing a message, the oldest ones stay unloaded
+    size = 0
+    for offset, message in enumerate(loaded):
+        record = history[last + 1 - len(loaded) + offset] = MessageRecord.from_message(message)
+        size += estimate_bytes(record)
+    return size
+
+
+def estimate_bytes(value, _seen: Optional[set] = None) -> int:
+    """Approximate deep size of a value in bytes, counting shared objects once"""
+    seen = _seen if _seen is not None else set()
+    if id(value) in seen or isinstance(value, _OPAQUE_TYPES):
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value, 0)
+    if isinstance(value, (str, bytes, bytearray, int, float, bool, type(None))):
+        return size
+    if isinstance(value, dict):
+        return size + sum(estimate_bytes(k, seen) + estimate_bytes(v, seen) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return size + sum(estimate_bytes(item, seen) for item in value)
+    for slot in getattr(type(value), "__slots__", ()):
+        size += estimate_bytes(getattr(value, slot, None), seen)
+    if hasattr(value, "__dict__"):
+        size += estimate_bytes(vars(value), seen)
+    return size
+
+
+class SessionMemory:
+    """Per-session memory bookkeeping: activity, resident message bytes and how an idle sweep frees the session
+
+    The session holds `running` for the whole of each script run. The sweep only releases a session
+    whose `running` it can take, so it never touches state a rerun is using.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = threading.Lock()
+        self.last_active = time.monotonic()
+        self.bytes = 0
+        self.evicted = False
+        self._releasable: List[Callable[[], None]] = []
+        self._history: Optional[List] = None
+
+    def touch(self, releasable: List[Callable[[], None]]) -> None:
+        """Mark the session active and register how to free its state once it goes idle"""
+        with self.lock:
+            self.last_active = time.monotonic()
+            self._releasable = releasable
+            self.evicted = False
+
+    def track(self, history: List) -> None:
+        """Count `history`'s resident bytes whenever the session replaces the list; updates keep it current after that"""
+        if history is not self._history:
+            self._history = history
+            self.bytes = sum(estimate_bytes(message) for message in history if message is not None)
+
+    def evict_if_idle(self, ttl_seconds: float) -> bool:
+        """Run the release callbacks of a session idle past the TTL and not in a script run"""
+        if not self.running.acquire(blocking=False):
+            return False  # Mid-run, so not idle
+        try:
+            with self.lock:
+                if self.evicted or time.monotonic() - self.last_active < ttl_seconds:
+                    return False
+                releasable = self._releasable
+            try:
+                for release in releasable:
+                    release()
+            except Exception:
+                # Nothing unsaved is dropped (the history spill flushes first); try again next sweep
+                logger.exception("Releasing an idle session failed")
+                return False
+            with self.lock:
+                self._releasable = []
+                self.evicted = True
+                self.bytes = 0
+            return True
+        finally:
+            self.running.release()
+
+
+class SessionRegistry:
+    """Process-wide view of live sessions for idle eviction and memory reporting"""
+
+    def __init__(self, sweep_interval: float = 60.0):
+        self.sweep_interval = sweep_interval
+        self._sessions: "weakref.WeakSet[SessionMemory]" = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+        self.evictions = 0
+
+    def register(self, memory: SessionMemory) -> None:
+        with self._lock:
+            self._sessions.add(memory)
+
+    def sweep(self, ttl_seconds: float) -> int:
+        """Release the state of sessions idle for longer than the TTL (at most once per interval)"""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_sweep < self.sweep_interval:
+                return 0
+            self._last_sweep = now
+            sessions = list(self._sessions)
+        evicted = sum(memory.evict_if_idle(ttl_seconds) for memory in sessions)
+        with self._lock:
+            self.evictions += evicted
+        return evicted
+
+    def report(self) -> Dict:
+        """Session count and resident message bytes per session, as each session last counted them"""
+        with self._lock:
+            sessions = list(self._sessions)
+            evictions = self.evictions
+        resident = [memory.bytes for memory in sessions if memory.bytes and not memory.evicted]
+        return {
+            "sessions": len(sessions),
+            "resident_sessions": len(resident),
+            "total_bytes": sum(resident),
+            "max_bytes": max(resident, default=0),
+            "mean_bytes": sum(resident) / len(resident) if resident else 0,
+            "evictions": evictions,
+        }
+
+
+# Created at import and shared by every session
+SESSION_REGISTRY = SessionRegistry()
@@ -0,0 +1,349 @@
+import itertools
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import redis
+except ImportError:  # Only needed for the key-value backend
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+class SessionStoreError(RuntimeError):
+    """Queued writes were dropped after every retry failed"""
+
+
+class SessionStore(ABC):
+    """Persistence interface for journeys: one record per journey plus a message log keyed by position"""
+
+    def __init__(self, flush_interval: float = 0.05, max_batch: int = 256, write_retries: int = 3,
+                 retry_delay: float = 0.2):
+        # Writes are queued and applied in batches by a background thread so persisting a turn
+        # adds no latency to it; reads first wait for queued writes to see a session's own writes
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.write_retries = write_retries
+        self.retry_delay = retry_delay
+        self._error: Optional[Exception] = None
+        self._error_lock = threading.Lock()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name=f"{type(self).__name__}-writer", daemon=True)
+        self._writer.start()
+
+    # Public API
+
+    def save_session(self, journey_id: str, record: Dict) -> None:
+        """Queue an upsert of the journey record (month, session count, themes, ...)"""
+        self._queue.put(("session", journey_id, dict(record)))
+
+    def append_message(self, journey_id: str, conversation: int, position: int, message: Dict) -> None:
+        """Queue a write of one message at its position in a conversation's log (replacing any message there)"""
+        self._queue.put(("message", journey_id, (conversation, position, dict(message))))
+
+    def load_session(self, journey_id: str) -> Optional[Dict]:
+        """Return the journey record, or None for a new journey"""
+        self._wait_for_writes()
+        return self._load_session(journey_id)
+
+    def load_messages(self, journey_id: str, conversation: int, limit: Optional[int] = None,
+                      before: Optional[int] = None) -> List[Dict]:
+        """Return a conversation's messages in order - the most recent `limit` ones before `before`"""
+        self._wait_for_writes()
+        return self._load_messages(journey_id, conversation, limit, before)
+
+    def message_count(self, journey_id: str, conversation: int) -> int:
+        """Number of messages stored for a conversation"""
+        self._wait_for_writes()
+        return self._message_count(journey_id, conversation)
+
+    def iter_journeys(self, batch_size: int = 500) -> Iterator[Tuple[str, Dict]]:
+        """Every stored journey record, read a batch at a time"""
+        self._wait_for_writes()
+        return self._iter_journeys(batch_size)
+
+    def iter_conversations(self, journey_id: str, flush: bool = True) -> Iterator[Tuple[int, List[Dict]]]:
+        """A journey's conversations in order, each with its messages
+
+        Bulk readers that already flushed (iter_journeys does) pass flush=False to skip a wait per journey.
+        """
+        if flush:
+            self._wait_for_writes()
+        return self._iter_conversations(journey_id)
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Wait until every queued write has been applied; raises SessionStoreError if any was dropped since the last flush"""
+        self._wait_for_writes(timeout)
+        with self._error_lock:
+            error, self._error = self._error, None
+        if error is not None:
+            raise SessionStoreError(f"Queued session store writes were dropped: {error}") from error
+
+    def _wait_for_writes(self, timeout: Optional[float] = None) -> None:
+        done = threading.Event()
+        self._queue.put(("flush", None, done))
+        done.wait(timeout)
+
+    # Backend hooks
+
+    @abstractmethod
+    def _apply(self, sessions: Dict[str, Dict], messages: List[Tuple[str, int, int, Dict]]) -> None:
+        ...
+
+    @abstractmethod
+    def _load_session(self, journey_id: str) -> Optional[Dict]:
+        ...
+
+    @abstractmethod
+    def _load_messages(self, journey_id: str, conversation: int, limit: Optional[int],
+                       before: Optional[int]) -> List[Dict]:
+        ...
+
+    @abstractmethod
+    def _message_count(self, journey_id: str, conversation: int) -> int:
+        ...
+
+    @abstractmethod
+    def _iter_journeys(self, batch_size: int) -> Iterator[Tuple[str, Dict]]:
+        ...
+
+    @abstractmethod
+    def _iter_conversations(self, journey_id: str) -> Iterator[Tuple[int, List[Dict]]]:
+        ...
+
+    # Batching writer
+
+    def _write_loop(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch and batch[-1][0] != "flush":
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # Only the latest record per journey needs writing; messages keep their order
+            sessions: Dict[str, Dict] = {}
+            messages = []
+            waiters = []
+            for kind, journey_id, payload in batch:
+                if kind == "session":
+                    sessions[journey_id] = payload
+                elif kind == "message":
+                    messages.append((journey_id, *payload))
+                else:
+                    waiters.append(payload)
+            if sessions or messages:
+                self._apply_with_retry(sessions, messages)
+            for waiter in waiters:
+                waiter.set()
+
+    def _apply_with_retry(self, sessions: Dict[str, Dict], messages: List[Tuple[str, int, int, Dict]]) -> None:
+        # A batch is one transaction and every write is keyed, so applying it again is safe
+        for attempt in range(self.write_retries + 1):
+            try:
+                self._apply(sessions, messages)
+                return
+            except Exception as e:
+                if attempt < self.write_retries:
+                    time.sleep(self.retry_delay * 2 ** attempt)
+                    continue
+                logger.exception("Session store write failed; dropped %d records and %d messages",
+                                 len(sessions), len(messages))
+                with self._error_lock:
+                    self._error = e
+
+
+class SQLiteSessionStore(SessionStore):
+    """Default store backed by a local SQLite database in WAL mode"""
+
+    def __init__(self, path: str, **kwargs):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    journey_id TEXT PRIMARY KEY,
+                    record TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS messages (
+                    journey_id TEXT NOT NULL,
+                    conversation INTEGER NOT NULL,
+                    position INTEGER NOT NULL,
+                    role TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    timestamp TEXT,
+                    PRIMARY KEY (journey_id, conversation, position)
+                ) WITHOUT ROWID;
+            """)
+        super().__init__(**kwargs)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread: the writer thread writes, script threads read concurrently
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _apply(self, sessions, messages) -> None:
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT INTO sessions (journey_id, record, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(journey_id) DO UPDATE SET record = excluded.record, updated_at = excluded.updated_at",
+                [(journey_id, json.dumps(record), time.time()) for journey_id, record in sessions.items()]
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO messages (journey_id, conversation, position, role, content, timestamp) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (journey_id, conversation, position, message["role"], message["content"], message.get("timestamp"))
+                    for journey_id, conversation, position, message in messages
+                ]
+            )
+
+    def _load_session(self, journey_id):
+        row = self._connect().execute(
+            "SELECT record FROM sessions WHERE journey_id = ?", (journey_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _load_messages(self, journey_id, conversation, limit, before):
+        query = "SELECT role, content, timestamp FROM messages WHERE journey_id = ? AND conversation = ?"
+        params: List[Any] = [journey_id, conversation]
+        if before is not None:
+            query += " AND position < ?"
+            params.append(before)
+        query += " ORDER BY position DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        rows = self._connect().execute(query, params).fetchall()
+        return [{"role": role, "content": content, "timestamp": timestamp} for role, content, timestamp in reversed(rows)]
+
+    def _message_count(self, journey_id, conversation):
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM messages WHERE journey_id = ? AND conversation = ?", (journey_id, conversation)
+        ).fetchone()[0]
+
+    def _iter_journeys(self, batch_size):
+        # Keyset pagination keeps each read small however many journeys there are
+        after = ""
+        while True:
+            rows = self._connect().execute(
+                "SELECT journey_id, record FROM sessions WHERE journey_id > ? ORDER BY journey_id LIMIT ?",
+                (after, batch_size)
+            ).fetchall()
+            for journey_id, record in rows:
+                yield journey_id, json.loads(record)
+            if len(rows) < batch_size:
+                return
+            after = rows[-1][0]
+
+    def _iter_conversations(self, journey_id):
+        rows = self._connect().execute(
+            "SELECT conversation, role, content, timestamp FROM messages WHERE journey_id = ? "
+            "ORDER BY conversation, position", (journey_id,)
+        )
+        for conversation, group in itertools.groupby(rows, key=lambda row: row[0]):
+            yield conversation, [
+                {"role": role, "content": content, "timestamp": timestamp} for _, role, content, timestamp in group
+            ]
+
+
+class KeyValueSessionStore(SessionStore):
+    """Store for any Redis-compatible client (get/set/mget, hset/hmget/hlen/hgetall, zadd/zrange and pipeline)"""
+
+    def __init__(self, client, prefix: str = "existentia", **kwargs):
+        self.client = client
+        self.prefix = prefix
+        super().__init__(**kwargs)
+
+    def _session_key(self, journey_id: str) -> str:
+        return f"{self.prefix}:session:{journey_id}"
+
+    def _messages_key(self, journey_id: str, conversation: int) -> str:
+        return f"{self.prefix}:messages:{journey_id}:{conversation}"
+
+    def _journeys_key(self) -> str:
+        # Sorted set of every journey id (all scored 0, so ordered by id for keyset paging)
+        return f"{self.prefix}:journeys"
+
+    def _conversations_key(self, journey_id: str) -> str:
+        # Sorted set of a journey's conversation numbers, scored by the number itself
+        return f"{self.prefix}:conversations:{journey_id}"
+
+    def _apply(self, sessions, messages) -> None:
+        pipe = self.client.pipeline()
+        for journey_id, record in sessions.items():
+            pipe.set(self._session_key(journey_id), json.dumps(record))
+            pipe.zadd(self._journeys_key(), {journey_id: 0})
+        # A conversation is a hash from position to message, so writing a position again replaces it
+        for journey_id, conversation, position, message in messages:
+            pipe.hset(self._messages_key(journey_id, conversation), position, json.dumps(message))
+            pipe.zadd(self._conversations_key(journey_id), {str(conversation): conversation})
+        pipe.execute()
+
+    def _load_session(self, journey_id):
+        raw = self.client.get(self._session_key(journey_id))
+        return json.loads(raw) if raw else None
+
+    def _load_messages(self, journey_id, conversation, limit, before):
+        key = self._messages_key(journey_id, conversation)
+        end = (before if before is not None else self.client.hlen(key)) - 1
+        if end < 0:
+            return []
+        start = max(0, end - limit + 1) if limit is not None else 0
+        return [json.loads(raw) for raw in self.client.hmget(key, list(range(start, end + 1))) if raw is not None]
+
+    def _message_count(self, journey_id, conversation):
+        return self.client.hlen(self._messages_key(journey_id, conversation))
+
+    def _iter_journeys(self, batch_size):
+        # Keyset pagination over the journey index: every id exactly once, unlike SCAN
+        after = "-"
+        while True:
+            ids = [
+                key.decode("utf-8") if isinstance(key, bytes) else key
+                for key in self.client.zrangebylex(self._journeys_key(), after, "+", start=0, num=batch_size)
+            ]
+            if ids:
+                for journey_id, raw in zip(ids, self.client.mget([self._session_key(journey_id) for journey_id in ids])):
+                    if raw:
+                        yield journey_id, json.loads(raw)
+            if len(ids) < batch_size:
+                return
+            after = f"({ids[-1]}"
+
+    def _iter_conversations(self, journey_id):
+        for conversation in self.client.zrange(self._conversations_key(journey_id), 0, -1):
+            conversation = int(conversation)
+            positions = self.client.hgetall(self._messages_key(journey_id, conversation))
+            yield conversation, [json.loads(raw) for _, raw in sorted(positions.items(), key=lambda item: int(item[0]))]
+
+
+def open_session_store(backend: str = "sqlite", path: str = "existentia.db",
+                       url: Optional[str] = None) -> SessionStore:
+    """Create the configured store: "sqlite" (default) or "redis" for a Redis-compatible server"""
+    if backend == "redis":
+        if redis is None:
+            raise RuntimeError("The redis session store needs the 'redis' package installed")
+        return KeyValueSessionStore(redis.Redis.from_url(url or "redis://localhost:6379/0"))
+    return SQLiteSessionStore(path)
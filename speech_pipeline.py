@@ -0,0 +1,162 @@
+import re
+import time
+from concurrent.futures import Executor, Future
+from typing import Callable, List, Optional
+
+# A sentence ends at terminal punctuation (plus closing quotes/brackets) followed by
+# whitespace, or at a line break. Requiring the whitespace keeps "3.5" or "e.g." mid-token intact.
+SENTENCE_BOUNDARY = re.compile(r'(?:[.!?…]+["\'”’)\]]*\s+|\n+)')
+
+# MPEG audio tables for Layer III frames: bitrates in kbps (MPEG-1 vs MPEG-2/2.5) and sample rates per version
+_MP3_BITRATES = {
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_MP3_SAMPLE_RATES = {
+    1: [44100, 48000, 32000],
+    2: [22050, 24000, 16000],
+    25: [11025, 12000, 8000],
+}
+
+
+class SentenceChunker:
+    """Splits streamed text into sentence-sized chunks as soon as each one is complete"""
+
+    def __init__(self, min_chars: int = 24):
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        """Add streamed text and return any chunks that are now complete"""
+        self._buffer += text
+        chunks = []
+        cut = 0
+        for match in SENTENCE_BOUNDARY.finditer(self._buffer):
+            # Merge very short sentences ("Hmm.") into the next one to avoid tiny clips
+            if match.end() - cut < self.min_chars:
+                continue
+            chunk = self._buffer[cut:match.end()].strip()
+            if chunk:
+                chunks.append(chunk)
+            cut = match.end()
+        self._buffer = self._buffer[cut:]
+        return chunks
+
+    def flush(self) -> Optional[str]:
+        """Return whatever text is left once the stream has ended"""
+        tail = self._buffer.strip()
+        self._buffer = ""
+        return tail or None
+
+
+class SpeechPipeline:
+    """Synthesizes sentence chunks concurrently on a worker pool and hands the audio back in order"""
+
+    def __init__(self, executor: Executor, synthesize: Callable[[str], Optional[bytes]],
+                 player: Optional["SegmentPlayer"] = None, min_chars: int = 24):
+        self._executor = executor
+        self._synthesize = synthesize
+        self.player = player
+        self._chunker = SentenceChunker(min_chars)
+        self._futures: List[Future] = []
+        self._next = 0
+        self.segments: List[bytes] = []
+        self.failed = False
+
+    def feed(self, text: str) -> None:
+        """Queue synthesis for every sentence completed by this piece of streamed text"""
+        for chunk in self._chunker.feed(text):
+            self._futures.append(self._executor.submit(self._synthesize, chunk))
+
+    def finish(self) -> None:
+        """Queue the final partial sentence once the reply is complete"""
+        tail = self._chunker.flush()
+        if tail:
+            self._futures.append(self._executor.submit(self._synthesize, tail))
+
+    @property
+    def pending(self) -> bool:
+        """Whether any queued segment has not been handed out yet"""
+        return self._next < len(self._futures)
+
+    def next_segment(self, block: bool = False) -> Optional[bytes]:
+        """Return the next segment in order, or None if it is not ready (or nothing is queued)"""
+        while self.pending:
+            future = self._futures[self._next]
+            if not block and not future.done():
+                return None
+            self._next += 1
+            try:
+                audio = future.result()
+            except Exception:
+                audio = None
+            if audio:
+                self.segments.append(audio)
+                return audio
+            # A failed chunk is skipped so the rest of the reply still plays
+            self.failed = True
+        return None
+
+
+class SegmentPlayer:
+    """Plays audio segments back to back through a single render slot"""
+
+    def __init__(self, render: Callable[[bytes], None], margin: float = 0.25):
+        self._render = render
+        self._margin = margin
+        self._busy_until = 0.0
+        self.started: Optional[float] = None  # Wall-clock time the first segment started playing
+
+    @property
+    def ready(self) -> bool:
+        """Whether the previous segment has finished playing"""
+        return time.monotonic() >= self._busy_until
+
+    def play(self, audio: bytes) -> None:
+        """Render a segment and remember when it will have finished"""
+        self._render(audio)
+        if self.started is None:
+            self.started = time.time()
+        self._busy_until = time.monotonic() + estimate_mp3_duration(audio) + self._margin
+
+
+def estimate_mp3_duration(audio: bytes) -> float:
+    """Estimate the playing time of an MP3 clip in seconds by walking its frame headers"""
+    position = 0
+    # Skip an ID3v2 tag if present
+    if audio[:3] == b"ID3" and len(audio) >= 10:
+        tag_size = (audio[6] << 21) | (audio[7] << 14) | (audio[8] << 7) | audio[9]
+        position = 10 + tag_size
+
+    duration = 0.0
+    frames = 0
+    while position + 4 <= len(audio):
+        header = int.from_bytes(audio[position:position + 4], "big")
+        if (header >> 21) & 0x7FF != 0x7FF:
+            position += 1
+            continue
+
+        version_bits = (header >> 19) & 0x3
+        layer_bits = (header >> 17) & 0x3
+        bitrate_index = (header >> 12) & 0xF
+        sample_rate_index = (header >> 10) & 0x3
+        padding = (header >> 9) & 0x1
+
+        version = {3: 1, 2: 2, 0: 25}.get(version_bits)
+        if version is None or layer_bits != 1 or bitrate_index in (0, 15) or sample_rate_index == 3:
+            position += 1
+            continue
+
+        bitrate = _MP3_BITRATES[1 if version == 1 else 2][bitrate_index] * 1000
+        sample_rate = _MP3_SAMPLE_RATES[version][sample_rate_index]
+        samples_per_frame = 1152 if version == 1 else 576
+        frame_length = (samples_per_frame // 8) * bitrate // sample_rate + padding
+
+        duration += samples_per_frame / sample_rate
+        frames += 1
+        position += max(frame_length, 1)
+
+    if frames == 0:
+        # Not a parseable MP3 stream - assume a typical 128 kbps encoding
+        return len(audio) * 8 / 128000
+    return duration
@@ -0,0 +1,263 @@
+import re
+
+# Page-wide styles
+APP_CSS = """
+/* Main container max width */
+.main .block-container {
+    max-width: 1200px;
+    padding-top: 2rem;
+    padding-bottom: 2rem;
+}
+
+.main-header {
+    text-align: center;
+    padding: 2rem 0;
+    background: linear-gradient(135deg, #1e3c72 0%, #2a5298 100%);
+    color: white;
+    border-radius: 15px;
+    margin-bottom: 2rem;
+    box-shadow: 0 4px 20px rgba(0,0,0,0.1);
+}
+
+.hero-image {
+    width: 100%;
+    max-width: 600px;
+    height: auto;
+    border-radius: 10px;
+    margin: 1rem 0;
+    box-shadow: 0 4px 15px rgba(0,0,0,0.1);
+}
+
+.chat-message {
+    padding: 1.5rem;
+    margin: 1rem 0;
+    border-radius: 15px;
+    box-shadow: 0 2px 10px rgba(0,0,0,0.05);
+}
+
+.user-message {
+    background: linear-gradient(135deg, #e3f2fd 0%, #bbdefb 100%);
+    border-left: 4px solid #1976d2;
+    margin-left: 2rem;
+}
+
+.ai-message {
+    background: linear-gradient(135deg, #f3e5f5 0%, #e1bee7 100%);
+    border-left: 4px solid #7b1fa2;
+    margin-right: 2rem;
+}
+
+.theme-box {
+    background: linear-gradient(135deg, #fff3e0 0%, #ffe0b2 100%);
+    padding: 1.5rem;
+    border-radius: 12px;
+    border-left: 4px solid #ff9800;
+    margin: 1rem 0;
+    box-shadow: 0 2px 8px rgba(0,0,0,0.05);
+}
+
+.warning-box {
+    background: linear-gradient(135deg, #ffebee 0%, #ffcdd2 100%);
+    padding: 1.5rem;
+    border-radius: 12px;
+    border-left: 4px solid #f44336;
+    margin: 1rem 0;
+    box-shadow: 0 2px 8px rgba(0,0,0,0.05);
+}
+
+/* Big Talk Button */
+.talk-button {
+    display: flex;
+    justify-content: center;
+    align-items: center;
+    margin: 2rem 0;
+}
+
+.talk-btn {
+    background: linear-gradient(135deg, #4caf50 0%, #45a049 100%);
+    color: white;
+    border: none;
+    border-radius: 50px;
+    padding: 20px 40px;
+    font-size: 24px;
+    font-weight: bold;
+    cursor: pointer;
+    transition: all 0.3s ease;
+    box-shadow: 0 4px 15px rgba(76, 175, 80, 0.3);
+    min-width: 200px;
+    text-transform: uppercase;
+    letter-spacing: 1px;
+}
+
+.talk-btn:hover {
+    transform: translateY(-2px);
+    box-shadow: 0 6px 20px rgba(76, 175, 80, 0.4);
+}
+
+.talk-btn.recording {
+    background: linear-gradient(135deg, #f44336 0%, #d32f2f 100%);
+    box-shadow: 0 4px 15px rgba(244, 67, 54, 0.3);
+    animation: pulse 1.5s infinite;
+}
+
+.talk-btn.recording:hover {
+    box-shadow: 0 6px 20px rgba(244, 67, 54, 0.4);
+}
+
+@keyframes pulse {
+    0% { transform: scale(1); }
+    50% { transform: scale(1.05); }
+    100% { transform: scale(1); }
+}
+
+/* Audio player styling */
+.audio-player, .stAudio {
+    margin: 1rem 0;
+    text-align: center;
+}
+
+.audio-player audio, .stAudio audio {
+    width: 100%;
+    max-width: 400px;
+    border-radius: 25px;
+}
+
+/* Input styling */
+.stTextArea textarea {
+    border-radius: 15px;
+    border: 2px solid #e0e0e0;
+    font-size: 16px;
+    padding: 15px;
+}
+
+.stTextArea textarea:focus {
+    border-color: #2a5298;
+    box-shadow: 0 0 10px rgba(42, 82, 152, 0.1);
+}
+
+/* Button styling */
+.stButton button {
+    border-radius: 25px;
+    border: none;
+    padding: 12px 24px;
+    font-weight: 600;
+    transition: all 0.3s ease;
+}
+
+.stButton button:hover {
+    transform: translateY(-1px);
+    box-shadow: 0 4px 12px rgba(0,0,0,0.15);
+}
+
+/* Sidebar styling */
+.css-1d391kg {
+    background: linear-gradient(180deg, #f8f9fa 0%, #e9ecef 100%);
+}
+
+/* Hide Streamlit elements */
+#MainMenu {visibility: hidden;}
+footer {visibility: hidden;}
+header {visibility: hidden;}
+
+/* Responsive design */
+@media (max-width: 768px) {
+    .main .block-container {
+        padding-left: 1rem;
+        padding-right: 1rem;
+    }
+
+    .talk-btn {
+        font-size: 20px;
+        padding: 15px 30px;
+        min-width: 150px;
+    }
+
+    .user-message, .ai-message {
+        margin-left: 0;
+        margin-right: 0;
+    }
+}
+"""
+
+# Styles the Streamlit audio input like the big talk button
+AUDIO_INPUT_CSS = """
+/* Hide the default audio input styling and create custom button look */
+.stAudioInput > div > div > div > button {
+    background: linear-gradient(135deg, #4caf50 0%, #45a049 100%) !important;
+    color: white !important;
+    border: none !important;
+    border-radius: 50px !important;
+    padding: 20px 40px !important;
+    font-size: 24px !important;
+    font-weight: bold !important;
+    cursor: pointer !important;
+    transition: all 0.3s ease !important;
+    box-shadow: 0 4px 15px rgba(76, 175, 80, 0.3) !important;
+    min-width: 200px !important;
+    text-transform: uppercase !important;
+    letter-spacing: 1px !important;
+    width: 100% !important;
+    max-width: 300px !important;
+    margin: 0 auto !important;
+    display: block !important;
+}
+
+.stAudioInput > div > div > div > button:hover {
+    transform: translateY(-2px) !important;
+    box-shadow: 0 6px 20px rgba(76, 175, 80, 0.4) !important;
+}
+
+.stAudioInput > div > div > div > button:active,
+.stAudioInput > div > div > div > button[aria-pressed="true"] {
+    background: linear-gradient(135deg, #f44336 0%, #d32f2f 100%) !important;
+    box-shadow: 0 4px 15px rgba(244, 67, 54, 0.3) !important;
+    animation: pulse 1.5s infinite !important;
+}
+
+.stAudioInput > div > div > div > button[aria-pressed="true"]:hover {
+    box-shadow: 0 6px 20px rgba(244, 67, 54, 0.4) !important;
+}
+
+@keyframes pulse {
+    0% { transform: scale(1); }
+    50% { transform: scale(1.05); }
+    100% { transform: scale(1); }
+}
+
+/* Center the audio input */
+.stAudioInput {
+    display: flex !important;
+    justify-content: center !important;
+    align-items: center !important;
+    margin: 2rem 0 !important;
+}
+
+/* Hide the label */
+.stAudioInput > label {
+    display: none !important;
+}
+
+/* Style the recording indicator */
+.stAudioInput > div > div > div > div {
+    text-align: center !important;
+    margin-top: 1rem !important;
+    font-weight: bold !important;
+    color: #666 !important;
+}
+"""
+
+_COMMENTS = re.compile(r"/\*.*?\*/", re.DOTALL)
+_SPACE_AROUND_PUNCTUATION = re.compile(r"\s*([{}:;,>])\s*")
+
+
+def minify_css(css: str) -> str:
+    """Strip comments and insignificant whitespace"""
+    css = _COMMENTS.sub("", css)
+    css = " ".join(css.split())
+    css = _SPACE_AROUND_PUNCTUATION.sub(r"\1", css)
+    return css.replace(";}", "}")
+
+
+# Minified once at import; every rerun of every session sends these exact strings
+APP_STYLE_HTML = f"<style>{minify_css(APP_CSS)}</style>"
+AUDIO_INPUT_STYLE_HTML = f"<style>{minify_css(AUDIO_INPUT_CSS)}</style>"
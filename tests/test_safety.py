@@ -0,0 +1,29 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from safety import SAFETY_MATCHER  # noqa: E402
+from safety_bench import LEGACY_KEYWORDS, accuracy, legacy_matcher, load_corpus  # noqa: E402
+
+
+def test_recall_never_below_legacy_substring_check():
+    corpus = load_corpus()
+    assert accuracy(SAFETY_MATCHER.matches, corpus)["recall"] >= accuracy(legacy_matcher(LEGACY_KEYWORDS), corpus)["recall"]
+
+
+def test_every_legacy_hit_is_still_flagged():
+    legacy = legacy_matcher(LEGACY_KEYWORDS)
+    missed = [
+        example["text"] for example in load_corpus()
+        if example["concern"] and legacy(example["text"]) and not SAFETY_MATCHER.matches(example["text"])
+    ]
+    assert missed == []
+
+
+def test_only_flat_denials_are_negated():
+    assert not SAFETY_MATCHER.matches("I'm not suicidal, I just feel stuck.")
+    for text in ["I'm not sure I want to die", "why not just end it all", "I'm not afraid to end my life"]:
+        assert SAFETY_MATCHER.matches(text), text
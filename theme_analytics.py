@@ -0,0 +1,254 @@
+"""Offline theme analytics across every stored conversation.
+
+    python theme_analytics.py reports/ [--db existentia.db] [--workers 8] [--period month]
+    python theme_analytics.py reports/ --input journeys.ndjson.gz
+
+Scans the user messages of all journeys (from the session store, or from a file written by
+journey_export.py) in parallel worker processes and writes theme frequencies per journey month,
+per cohort (the month a journey started) and over time as CSV files, plus a JSON summary.
+"""
+import argparse
+import csv
+import datetime
+import json
+import multiprocessing
+import os
+import sys
+import time
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+from journey_export import iter_documents, read_documents
+from session_store import open_session_store
+from themes import THEME_MATCHER
+
+DIMENSIONS = ("month", "cohort", "period")
+PERIOD_UNITS = {"day": "D", "week": "W", "month": "M"}
+UNKNOWN = -1
+
+# A chunk is one unit of work for a worker: (cohort, current month, journey start, messages) per journey
+Journey = Tuple[int, int, str, List[Tuple[str, str]]]
+
+
+def parse_times(values: List, unit: str) -> np.ndarray:
+    """ISO timestamps as datetime64 in `unit`; missing or malformed ones become NaT"""
+    try:
+        return np.array(values, dtype="datetime64[us]").astype(f"datetime64[{unit}]")
+    except ValueError:
+        parsed = []
+        for value in values:
+            try:
+                parsed.append(np.datetime64(value, "us"))
+            except (TypeError, ValueError):
+                parsed.append(np.datetime64("NaT"))
+        return np.array(parsed, dtype="datetime64[us]").astype(f"datetime64[{unit}]")
+
+
+def time_keys(times: np.ndarray) -> np.ndarray:
+    keys = times.astype(np.int64)
+    keys[np.isnat(times)] = UNKNOWN
+    return keys
+
+
+def reduce_counts(keys: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Sum `weights` per distinct key"""
+    if not len(keys):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    unique, inverse = np.unique(keys, return_inverse=True)
+    return unique, np.bincount(inverse, weights=weights, minlength=len(unique))
+
+
+def analyze_chunk(args: Tuple[List[Journey], str, int]) -> Dict:
+    """Worker: theme mentions, scores and message counts for one chunk, keyed per dimension"""
+    journeys, period_unit, days_per_month = args
+    themes = {theme: index for index, theme in enumerate(THEME_MATCHER.themes)}
+    theme_count = len(themes)
+
+    texts, stamps, current_months, starts, cohorts = [], [], [], [], []
+    for cohort, current_month, started, messages in journeys:
+        for text, timestamp in messages:
+            texts.append(text)
+            stamps.append(timestamp)
+            current_months.append(current_month)
+            starts.append(started)
+            cohorts.append(cohort)
+
+    # The regex pass is the only per-message Python loop; everything after it is array arithmetic
+    hit_message, hit_theme, hit_weight = [], [], []
+    for index, text in enumerate(texts):
+        for theme, weight in THEME_MATCHER.matches(text):
+            hit_message.append(index)
+            hit_theme.append(themes[theme])
+            hit_weight.append(weight)
+    hit_message = np.array(hit_message, dtype=np.int64)
+    hit_theme = np.array(hit_theme, dtype=np.int64)
+    hit_weight = np.array(hit_weight, dtype=np.float64)
+
+    days = parse_times(stamps, "D")
+    current_months = np.array(current_months, dtype=np.int64)
+    # Journey month when the message was written, estimated from the journey's start and never past
+    # the month the user has actually reached
+    start_days = parse_times(starts, "D")
+    elapsed = (days - start_days).astype(np.int64)
+    known = ~(np.isnat(days) | np.isnat(start_days))
+    months = current_months.copy()
+    months[known] = np.clip(1 + elapsed[known] // days_per_month, 1, current_months[known])
+
+    group_keys = {
+        "month": months,
+        "cohort": np.array(cohorts, dtype=np.int64),
+        "period": time_keys(parse_times(stamps, period_unit)),
+    }
+    result = {"messages": len(texts), "journeys": len(journeys)}
+    for dimension, keys in group_keys.items():
+        combined = keys[hit_message] * theme_count + hit_theme
+        result[dimension] = {
+            "mentions": reduce_counts(combined, np.ones(len(combined))),
+            "scores": reduce_counts(combined, hit_weight),
+            "messages": reduce_counts(keys, np.ones(len(keys))),
+        }
+    return result
+
+
+def merge_results(results: Iterable[Dict]) -> Dict:
+    """Combine worker results, re-reducing each dimension's partial counts"""
+    parts: Dict[str, Dict[str, List]] = {
+        dimension: {"mentions": [], "scores": [], "messages": []} for dimension in DIMENSIONS
+    }
+    totals = {"messages": 0, "journeys": 0}
+    for result in results:
+        totals["messages"] += result["messages"]
+        totals["journeys"] += result["journeys"]
+        for dimension in DIMENSIONS:
+            for measure, pair in result[dimension].items():
+                parts[dimension][measure].append(pair)
+    merged = dict(totals)
+    for dimension in DIMENSIONS:
+        merged[dimension] = {}
+        for measure, pairs in parts[dimension].items():
+            keys = np.concatenate([keys for keys, _ in pairs]) if pairs else np.empty(0, dtype=np.int64)
+            values = np.concatenate([values for _, values in pairs]) if pairs else np.empty(0)
+            merged[dimension][measure] = reduce_counts(keys, values)
+    return merged
+
+
+def chunk_journeys(documents: Iterable[Dict], messages_per_chunk: int) -> Iterator[List[Journey]]:
+    """Reduce documents to what the workers need and group them into chunks of about equal size"""
+    chunk: List[Journey] = []
+    size = 0
+    for document in documents:
+        record = document["record"]
+        messages = [
+            (message["content"], message.get("timestamp"))
+            for conversation in document["conversations"]
+            for message in conversation["messages"]
+            if message["role"] == "user"
+        ]
+        started = record.get("journey_started")
+        if not started:
+            started = next((timestamp for _, timestamp in messages if timestamp), None)
+        cohort = time_keys(parse_times([started], "M"))[0]
+        chunk.append((int(cohort), int(record.get("current_month", 1)), started, messages))
+        size += len(messages)
+        if size >= messages_per_chunk:
+            yield chunk
+            chunk, size = [], 0
+    if chunk:
+        yield chunk
+
+
+def label(dimension: str, key: int, period_unit: str) -> str:
+    if key == UNKNOWN:
+        return "unknown"
+    if dimension == "month":
+        return str(key)
+    unit = "M" if dimension == "cohort" else period_unit
+    return str(np.datetime64(int(key), unit))
+
+
+def write_reports(merged: Dict, out_dir: str, period_unit: str, elapsed: float) -> Dict[str, str]:
+    """One CSV per dimension (group, theme, mentions, score, messages, mentions per 1k messages)"""
+    os.makedirs(out_dir, exist_ok=True)
+    themes = THEME_MATCHER.themes
+    paths = {}
+    for dimension in DIMENSIONS:
+        data = merged[dimension]
+        messages = dict(zip(data["messages"][0].tolist(), data["messages"][1].tolist()))
+        scores = dict(zip(data["scores"][0].tolist(), data["scores"][1].tolist()))
+        path = paths[dimension] = os.path.join(out_dir, f"themes_by_{dimension}.csv")
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow([dimension, "theme", "mentions", "score", "messages", "mentions_per_1k_messages"])
+            for combined, mentions in zip(*(values.tolist() for values in data["mentions"])):
+                group, theme = divmod(combined, len(themes))
+                group_messages = messages.get(group, 0)
+                writer.writerow([
+                    label(dimension, group, period_unit),
+                    themes[theme],
+                    int(mentions),
+                    round(scores[combined], 2),
+                    int(group_messages),
+                    round(1000 * mentions / group_messages, 2) if group_messages else 0,
+                ])
+
+    overall = np.zeros(len(themes))
+    keys, mentions = merged["month"]["mentions"]
+    np.add.at(overall, keys % len(themes), mentions)
+    summary = {
+        "generated_at": datetime.datetime.now().isoformat(),
+        "journeys": merged["journeys"],
+        "messages": merged["messages"],
+        "seconds": round(elapsed, 2),
+        "mentions_by_theme": {theme: int(count) for theme, count in zip(themes, overall)},
+        "reports": paths,
+    }
+    with open(os.path.join(out_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    return paths
+
+
+def run(documents: Iterable[Dict], out_dir: str, workers: int, period: str = "month",
+        days_per_month: int = 30, messages_per_chunk: int = 20000) -> Dict:
+    """Analyze every document across `workers` processes and write the reports; returns the summary counts"""
+    started = time.perf_counter()
+    period_unit = PERIOD_UNITS[period]
+    tasks = ((chunk, period_unit, days_per_month) for chunk in chunk_journeys(documents, messages_per_chunk))
+    if workers > 1:
+        with multiprocessing.Pool(workers) as pool:
+            # imap keeps only a few chunks in flight, so memory stays flat however big the store is
+            merged = merge_results(pool.imap_unordered(analyze_chunk, tasks))
+    else:
+        merged = merge_results(map(analyze_chunk, tasks))
+    elapsed = time.perf_counter() - started
+    write_reports(merged, out_dir, period_unit, elapsed)
+    return {"journeys": merged["journeys"], "messages": merged["messages"], "seconds": elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("out_dir", help="directory for the CSV reports and summary.json")
+    parser.add_argument("--input", help="journey export file to analyze instead of the session store")
+    parser.add_argument("--store", default="sqlite", choices=["sqlite", "redis"])
+    parser.add_argument("--db", default="existentia.db", help="SQLite database path")
+    parser.add_argument("--url", help="Redis URL for --store redis")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--period", choices=sorted(PERIOD_UNITS), default="month", help="time bucket for the trend report")
+    parser.add_argument("--days-per-month", type=int, default=30, help="journey pacing used to date messages to a month")
+    parser.add_argument("--chunk-messages", type=int, default=20000, help="messages per worker task")
+    args = parser.parse_args()
+
+    if args.input:
+        documents = read_documents(args.input)
+    else:
+        documents = iter_documents(open_session_store(backend=args.store, path=args.db, url=args.url))
+    summary = run(documents, args.out_dir, args.workers, args.period, args.days_per_month, args.chunk_messages)
+    print(
+        f"Analyzed {summary['messages']} messages from {summary['journeys']} journeys "
+        f"in {summary['seconds']:.1f}s; reports in {args.out_dir}",
+        file=sys.stderr
+    )
+
+
+if __name__ == "__main__":
+    main()
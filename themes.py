@@ -0,0 +1,86 @@
+import re
+from typing import Dict, Iterator, List, Tuple
+
+# Theme keywords with weights - specific words count for more than everyday ones
+THEME_KEYWORDS = {
+    "Work Dissatisfaction": {"work": 1.0, "job": 1.0, "career": 1.5, "meaningless": 2.0, "unfulfilled": 2.0},
+    "Relationship Concerns": {"lonely": 2.0, "connection": 1.5, "relationship": 1.5, "family": 1.0, "friends": 1.0},
+    "Time Awareness": {"time": 0.5, "aging": 2.0, "years": 0.5, "future": 1.0, "past": 0.5, "regret": 2.0},
+    "Purpose & Meaning": {"purpose": 2.0, "meaning": 1.5, "point": 0.5, "why": 0.5, "direction": 1.0},
+    "Identity Questions": {"who am i": 2.0, "identity": 2.0, "self": 0.5, "authentic": 1.5, "real me": 2.0},
+    "Freedom & Control": {"trapped": 2.0, "stuck": 1.5, "control": 1.0, "choice": 1.0, "freedom": 1.5},
+}
+
+
+class ThemeMatcher:
+    """Scores every theme in a single regex pass over the text"""
+
+    def __init__(self, theme_keywords: Dict[str, Dict[str, float]] = THEME_KEYWORDS):
+        self.themes = list(theme_keywords)
+        self._weights: Dict[str, List] = {}
+        for theme, keywords in theme_keywords.items():
+            for keyword, weight in keywords.items():
+                self._weights.setdefault(" ".join(keyword.lower().split()), []).append((theme, weight))
+        # Longest first so "who am i" wins over shorter overlapping keywords
+        alternation = "|".join(
+            r"\s+".join(re.escape(word) for word in keyword.split())
+            for keyword in sorted(self._weights, key=len, reverse=True)
+        )
+        self._pattern = re.compile(rf"\b(?:{alternation})\b", re.IGNORECASE)
+
+    def matches(self, text: str) -> Iterator[Tuple[str, float]]:
+        """(theme, weight) for every keyword hit in the text"""
+        for match in self._pattern.finditer(text):
+            yield from self._weights[" ".join(match.group(0).lower().split())]
+
+    def score(self, text: str) -> Dict[str, float]:
+        """Weighted keyword hits per theme"""
+        scores: Dict[str, float] = {}
+        for theme, weight in self.matches(text):
+            scores[theme] = scores.get(theme, 0.0) + weight
+        return scores
+
+
+# Built once at import and shared by every session
+THEME_MATCHER = ThemeMatcher()
+
+
+class ThemeTracker:
+    """Per-session running theme scores, updated only with messages added since the last update"""
+
+    def __init__(self):
+        self.scores: Dict[str, float] = {}
+        self.processed = 0  # Number of history messages already scanned
+
+    def to_record(self) -> Dict:
+        """Persistable form of the running scores"""
+        return {"scores": dict(self.scores), "processed": self.processed}
+
+    @classmethod
+    def from_record(cls, record: Dict) -> "ThemeTracker":
+        tracker = cls()
+        tracker.scores = dict(record.get("scores", {}))
+        tracker.processed = record.get("processed", 0)
+        return tracker
+
+    def start_conversation(self) -> None:
+        """Restart the cursor for a new session's conversation, keeping the accumulated life themes"""
+        self.processed = 0
+
+    def update(self, conversation: List[Dict], matcher: ThemeMatcher = THEME_MATCHER) -> None:
+        """Scan the user messages appended since the last update"""
+        new_text = " ".join(
+            message["content"] for message in conversation[self.processed:] if message["role"] == "user"
+        )
+        for theme, score in matcher.score(new_text).items():
+            self.scores[theme] = self.scores.get(theme, 0.0) + score
+        self.processed = len(conversation)
+
+    def top(self, limit: int = 5, matcher: ThemeMatcher = THEME_MATCHER) -> List[str]:
+        """Themes ranked by weighted frequency"""
+        order = {theme: index for index, theme in enumerate(matcher.themes)}
+        ranked = sorted(
+            (theme for theme, score in self.scores.items() if score > 0),
+            key=lambda theme: (-self.scores[theme], order.get(theme, len(order)))
+        )
+        return ranked[:limit]
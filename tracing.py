@@ -0,0 +1,201 @@
+import contextvars
+import functools
+import json
+import logging
+import math
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+_current_turn: contextvars.ContextVar = contextvars.ContextVar("turn_id", default=None)
+
+
+class Span:
+    """One timed stage; attributes can be added while it runs"""
+
+    __slots__ = ("name", "turn_id", "attributes", "started", "duration_ms", "error")
+
+    def __init__(self, name: str, turn_id: Optional[str], attributes: Dict):
+        self.name = name
+        self.turn_id = turn_id
+        self.attributes = attributes
+        self.started = time.time()
+        self.duration_ms = 0.0
+        self.error: Optional[str] = None
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    def to_record(self) -> Dict:
+        record = {
+            "name": self.name,
+            "turn_id": self.turn_id,
+            "started": round(self.started, 3),
+            "duration_ms": round(self.duration_ms, 3),
+            **self.attributes,
+        }
+        if self.error:
+            record["error"] = self.error
+        return record
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """Thread pool whose tasks run in a copy of the submitter's context, so their spans keep its turn id"""
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+class Tracer:
+    """In-process span recorder with per-stage latency percentiles, shared by every session"""
+
+    def __init__(self, window: int = 2048, recent: int = 500, jsonl_path: Optional[str] = None):
+        # Percentiles come from the last `window` spans of each stage; counts and sums never reset
+        self.window = window
+        self.jsonl_path = jsonl_path
+        self._lock = threading.Lock()
+        self._durations: Dict[str, Deque[float]] = {}
+        self._counts: Dict[str, int] = {}
+        self._sums: Dict[str, float] = {}
+        self._attribute_totals: Dict[str, Dict[str, float]] = {}
+        self._recent: Deque[Dict] = deque(maxlen=recent)
+
+    @contextmanager
+    def turn(self, turn_id: Optional[str] = None) -> Iterator[str]:
+        """Group the spans recorded inside this block (on this thread) under one turn id
+
+        A nested turn joins the enclosing one, so a voice turn's transcription and reply share an id.
+        """
+        token = _current_turn.set(turn_id or _current_turn.get() or uuid.uuid4().hex[:12])
+        try:
+            yield _current_turn.get()
+        finally:
+            _current_turn.reset(token)
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Span]:
+        """Time a stage; the span is recorded however the block exits"""
+        span = Span(name, _current_turn.get(), attributes)
+        started = time.perf_counter()
+        try:
+            yield span
+        except Exception as e:
+            span.error = type(e).__name__
+            raise
+        finally:
+            span.duration_ms = (time.perf_counter() - started) * 1000
+            self.record(span)
+
+    def traced(self, name: str):
+        """Decorator running the function as one turn-level span"""
+        def decorate(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.turn(), self.span(name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def add(self, name: str, duration_ms: float, **attributes) -> None:
+        """Record a stage that was timed elsewhere"""
+        span = Span(name, _current_turn.get(), attributes)
+        span.duration_ms = duration_ms
+        self.record(span)
+
+    def record(self, span: Span) -> None:
+        record = span.to_record()
+        with self._lock:
+            durations = self._durations.get(span.name)
+            if durations is None:
+                durations = self._durations[span.name] = deque(maxlen=self.window)
+            durations.append(span.duration_ms)
+            self._counts[span.name] = self._counts.get(span.name, 0) + 1
+            self._sums[span.name] = self._sums.get(span.name, 0.0) + span.duration_ms
+            totals = self._attribute_totals.setdefault(span.name, {})
+            for key, value in span.attributes.items():
+                # Numbers and flags (token counts, bytes, cache hits) add up per stage
+                if isinstance(value, (bool, int, float)):
+                    totals[key] = totals.get(key, 0.0) + float(value)
+            self._recent.append(record)
+        if self.jsonl_path:
+            self._append_jsonl(record)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Per-stage count, mean and p50/p95/p99 in milliseconds, plus attribute totals"""
+        with self._lock:
+            windows = {name: sorted(durations) for name, durations in self._durations.items()}
+            counts = dict(self._counts)
+            sums = dict(self._sums)
+            totals = {name: dict(values) for name, values in self._attribute_totals.items()}
+        stages = {}
+        for name, durations in sorted(windows.items()):
+            stage = {"count": counts[name], "sum_ms": sums[name], "mean_ms": sums[name] / counts[name]}
+            for quantile in QUANTILES:
+                stage[f"p{round(quantile * 100)}_ms"] = _percentile(durations, quantile)
+            stage["totals"] = totals.get(name, {})
+            stages[name] = stage
+        return stages
+
+    def recent_spans(self) -> List[Dict]:
+        with self._lock:
+            return list(self._recent)
+
+    def export_jsonl(self) -> str:
+        """The most recent spans, one JSON object per line"""
+        return "".join(json.dumps(record) + "\n" for record in self.recent_spans())
+
+    def export_openmetrics(self, prefix: str = "existentia") -> str:
+        """Stage latencies as OpenMetrics summaries and attribute totals as counters"""
+        snapshot = self.snapshot()
+        lines = [
+            f"# TYPE {prefix}_stage_duration_seconds summary",
+            f"# UNIT {prefix}_stage_duration_seconds seconds",
+            f"# HELP {prefix}_stage_duration_seconds Time spent in each stage of a turn.",
+        ]
+        for name, stage in snapshot.items():
+            label = _label(name)
+            for quantile in QUANTILES:
+                seconds = stage[f"p{round(quantile * 100)}_ms"] / 1000
+                lines.append(f'{prefix}_stage_duration_seconds{{stage="{label}",quantile="{quantile}"}} {seconds:.6f}')
+            lines.append(f'{prefix}_stage_duration_seconds_count{{stage="{label}"}} {stage["count"]}')
+            lines.append(f'{prefix}_stage_duration_seconds_sum{{stage="{label}"}} {stage["sum_ms"] / 1000:.6f}')
+        lines += [
+            f"# TYPE {prefix}_stage_attribute counter",
+            f"# HELP {prefix}_stage_attribute Sum of numeric span attributes (tokens, bytes, cache hits).",
+        ]
+        for name, stage in snapshot.items():
+            for key, value in sorted(stage["totals"].items()):
+                lines.append(f'{prefix}_stage_attribute_total{{stage="{_label(name)}",attribute="{_label(key)}"}} {value:g}')
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def _append_jsonl(self, record: Dict) -> None:
+        try:
+            with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError:
+            logger.exception("Could not append span to %s", self.jsonl_path)
+
+
+def _percentile(sorted_values: List[float], quantile: float) -> float:
+    # Nearest-rank percentile; the window is small enough to sort on every snapshot
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, math.ceil(quantile * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+# Created at import and shared by every session; set TRACER.jsonl_path to also append spans to a file
+TRACER = Tracer()
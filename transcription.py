@@ -0,0 +1,142 @@
+import hashlib
+import re
+from collections import OrderedDict
+from concurrent.futures import Executor, as_completed
+from typing import Any, Callable, List, Optional, Tuple
+
+import numpy as np
+
+from audio_preprocess import FRAME_MS, TARGET_SAMPLE_RATE, frame_energy_db, speech_frames
+
+# Recordings longer than this (after trimming) are split and transcribed in parallel
+LONG_RECORDING_SECONDS = 45.0
+# Chunks are cut at the quietest point between these lengths
+MIN_CHUNK_SECONDS = 15.0
+MAX_CHUNK_SECONDS = 30.0
+# When no pause exists in the window the cut is forced, overlapping by this much so no word is lost
+FORCED_CUT_OVERLAP_SECONDS = 1.0
+# Longest run of repeated words looked for where two overlapping chunks meet
+MAX_OVERLAP_WORDS = 12
+
+# Recordings remembered per session, for both the processed set and the transcript memo
+LEDGER_SIZE = 32
+
+_WORD = re.compile(r"[\w']+")
+
+
+def split_at_silence(samples: np.ndarray, rate: int = TARGET_SAMPLE_RATE,
+                     min_seconds: float = MIN_CHUNK_SECONDS, max_seconds: float = MAX_CHUNK_SECONDS,
+                     overlap_seconds: float = FORCED_CUT_OVERLAP_SECONDS) -> List[Tuple[int, int, bool]]:
+    """Chunk boundaries as (start, end, overlaps_previous) sample offsets, cut in pauses where possible"""
+    frame = max(1, rate * FRAME_MS // 1000)
+    energy_db = frame_energy_db(samples, rate)
+    voiced = speech_frames(samples, rate)
+    min_frames = int(min_seconds * rate) // frame
+    max_frames = int(max_seconds * rate) // frame
+    overlap_frames = int(overlap_seconds * rate) // frame
+
+    chunks = []
+    start, overlapped = 0, False
+    while len(energy_db) - start > max_frames:
+        window = energy_db[start + min_frames:start + max_frames]
+        quietest = start + min_frames + int(np.argmin(window))
+        if not voiced[quietest]:
+            chunks.append((start * frame, quietest * frame, overlapped))
+            start, overlapped = quietest, False
+        else:
+            cut = start + max_frames
+            chunks.append((start * frame, cut * frame, overlapped))
+            start, overlapped = cut - overlap_frames, True
+    chunks.append((start * frame, len(samples), overlapped))
+    return chunks
+
+
+def _normalize(word: str) -> str:
+    # Whisper may punctuate or capitalize the same word differently in each chunk
+    return "".join(_WORD.findall(word.lower()))
+
+
+def stitch_transcripts(parts: List[str], overlapped: List[bool]) -> str:
+    """Join chunk transcripts in order, dropping words repeated where chunks overlap"""
+    words: List[str] = []
+    for text, overlaps_previous in zip(parts, overlapped):
+        new_words = text.split()
+        if overlaps_previous and words:
+            tail = [_normalize(word) for word in words[-MAX_OVERLAP_WORDS:]]
+            head = [_normalize(word) for word in new_words[:MAX_OVERLAP_WORDS]]
+            for size in range(min(len(tail), len(head)), 0, -1):
+                if tail[-size:] == head[:size]:
+                    new_words = new_words[size:]
+                    break
+        words.extend(new_words)
+    return " ".join(words)
+
+
+def transcribe_chunks(chunks: List[Any], overlapped: List[bool], executor: Executor,
+                      transcribe: Callable[[Any], str],
+                      on_progress: Optional[Callable[[int, int, str], None]] = None) -> str:
+    """Transcribe every chunk concurrently and stitch the results back in order
+
+    `on_progress(done, total, partial)` is called on the calling thread as chunks complete, with
+    the stitched text of the leading chunks that are already transcribed.
+    """
+    futures = {executor.submit(transcribe, chunk): index for index, chunk in enumerate(chunks)}
+    results: List[Optional[str]] = [None] * len(chunks)
+    try:
+        for done, future in enumerate(as_completed(futures), start=1):
+            results[futures[future]] = future.result()
+            if on_progress is not None:
+                ready = 0
+                while ready < len(results) and results[ready] is not None:
+                    ready += 1
+                on_progress(done, len(chunks), stitch_transcripts(results[:ready], overlapped[:ready]))
+    finally:
+        for future in futures:
+            future.cancel()
+    return stitch_transcripts(results, overlapped)
+
+
+class RecordingLedger:
+    """Per-session record of which recordings were answered, keyed by a hash of their bytes
+
+    The audio widget hands back a fresh object on reruns, so identity says nothing about whether
+    a clip is new; its content does. Transcripts are memoized by the same hash so a run
+    interrupted between transcription and reply never pays for Whisper twice.
+    """
+
+    def __init__(self, max_entries: int = LEDGER_SIZE):
+        self.max_entries = max_entries
+        self._processed: "OrderedDict[str, None]" = OrderedDict()
+        self._transcripts: "OrderedDict[str, str]" = OrderedDict()
+
+    @staticmethod
+    def fingerprint(audio_bytes: bytes) -> str:
+        """Content hash identifying a recording"""
+        return hashlib.blake2b(audio_bytes, digest_size=16).hexdigest()
+
+    def is_processed(self, digest: str) -> bool:
+        """Whether this recording has already been handled"""
+        return digest in self._processed
+
+    def mark_processed(self, digest: str) -> None:
+        """Record that this recording was handled, so later reruns skip it"""
+        self._remember(self._processed, digest, None)
+
+    def transcript(self, digest: str) -> Optional[str]:
+        """Memoized transcript of this recording, if any"""
+        return self._transcripts.get(digest)
+
+    def remember_transcript(self, digest: str, text: str) -> None:
+        """Memoize a successful transcription"""
+        self._remember(self._transcripts, digest, text)
+
+    def clear(self) -> None:
+        """Forget everything (used when an idle session's state is released)"""
+        self._processed.clear()
+        self._transcripts.clear()
+
+    def _remember(self, entries: OrderedDict, digest: str, value) -> None:
+        entries[digest] = value
+        entries.move_to_end(digest)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
@@ -0,0 +1,205 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+
+class TTSCache:
+    """Content-addressed cache for synthesized speech with a memory and an optional disk tier"""
+
+    def __init__(self, max_memory_bytes: int = 32 * 1024 * 1024,
+                 disk_dir: Optional[str] = None, max_disk_bytes: int = 512 * 1024 * 1024):
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.disk_dir = disk_dir
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_index: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+        self._inflight: Dict[str, threading.Event] = {}
+
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "bytes_served_from_cache": 0,
+            "bytes_synthesized": 0,
+            "evictions": 0,
+        }
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._load_disk_index()
+
+    @staticmethod
+    def make_key(text: str, voice: str, model: str, speed: float, response_format: str) -> str:
+        """Build the cache key from the text hash and every parameter that changes the audio"""
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        raw = f"{text_hash}|{voice}|{model}|{speed}|{response_format}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return cached audio for a key, promoting disk hits into memory"""
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                self.stats["bytes_served_from_cache"] += len(audio)
+                return audio
+
+        audio = self._read_disk(key)
+        if audio is None:
+            return None
+
+        with self._lock:
+            self.stats["disk_hits"] += 1
+            self.stats["bytes_served_from_cache"] += len(audio)
+            self._store_memory(key, audio)
+        return audio
+
+    def put(self, key: str, audio: bytes) -> None:
+        """Store audio in both tiers"""
+        if not audio:
+            return
+        with self._lock:
+            self._store_memory(key, audio)
+        self._write_disk(key, audio)
+
+    def get_or_create(self, key: str, synthesize: Callable[[], Optional[bytes]]) -> Optional[bytes]:
+        """Return cached audio or synthesize it once, even if several sessions ask at the same time"""
+        audio = self.get(key)
+        if audio is not None:
+            return audio
+
+        with self._lock:
+            pending = self._inflight.get(key)
+            owner = pending is None
+            if owner:
+                pending = threading.Event()
+                self._inflight[key] = pending
+
+        if not owner:
+            # Another session is synthesizing the same clip - wait for it and re-check
+            pending.wait()
+            return self.get(key)
+
+        try:
+            with self._lock:
+                self.stats["misses"] += 1
+            audio = synthesize()
+            if audio:
+                with self._lock:
+                    self.stats["bytes_synthesized"] += len(audio)
+                self.put(key, audio)
+            return audio
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            pending.set()
+
+    def snapshot_stats(self) -> Dict:
+        """Return counters plus current tier sizes"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["memory_bytes"] = self._memory_bytes
+            stats["disk_entries"] = len(self._disk_index)
+            stats["disk_bytes"] = self._disk_bytes
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    # Memory tier (caller holds the lock)
+
+    def _store_memory(self, key: str, audio: bytes) -> None:
+        if len(audio) > self.max_memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = audio
+        self._memory_bytes += len(audio)
+        while self._memory_bytes > self.max_memory_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self.stats["evictions"] += 1
+
+    # Disk tier
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.audio")
+
+    def _load_disk_index(self) -> None:
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            if not name.endswith(".audio"):
+                continue
+            path = os.path.join(self.disk_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, name[:-len(".audio")], stat.st_size))
+
+        # Oldest first so the front of the index is the next eviction candidate
+        for _, key, size in sorted(entries):
+            self._disk_index[key] = size
+            self._disk_bytes += size
+        with self._lock:
+            self._evict_disk()
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        if not self.disk_dir:
+            return None
+        with self._lock:
+            if key not in self._disk_index:
+                return None
+            self._disk_index.move_to_end(key)
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+            os.utime(path)
+            return audio
+        except OSError:
+            with self._lock:
+                size = self._disk_index.pop(key, 0)
+                self._disk_bytes -= size
+            return None
+
+    def _write_disk(self, key: str, audio: bytes) -> None:
+        if not self.disk_dir or len(audio) > self.max_disk_bytes:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+
+        with self._lock:
+            self._disk_bytes -= self._disk_index.pop(key, 0)
+            self._disk_index[key] = len(audio)
+            self._disk_bytes += len(audio)
+            self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        # Caller holds the lock
+        while self._disk_bytes > self.max_disk_bytes and self._disk_index:
+            key, size = self._disk_index.popitem(last=False)
+            self._disk_bytes -= size
+            self.stats["evictions"] += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass